@@ -0,0 +1,156 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from datetime import date, timedelta
+from app.core.config import settings
+from app.core.database import get_read_db
+from app.core.dependencies import Principal, get_current_teacher
+from app.models.class_model import Class
+from app.services.analytics import analytics_service, AttendanceMatrix
+
+router = APIRouter(prefix="/attendance/analytics", tags=["Analytics"])
+
+
+def _resolve_window(start_date: Optional[date], end_date: Optional[date]) -> Tuple[date, date]:
+    """Default to the 6-month retention window ending today; cap the window length."""
+    end_date = end_date or date.today()
+    # Same 6-month period as the cleanup service
+    start_date = start_date or end_date - timedelta(days=int(6 * 30.44))
+
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must be on or before end_date"
+        )
+    if (end_date - start_date).days + 1 > settings.ANALYTICS_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range cannot exceed {settings.ANALYTICS_MAX_DAYS} days"
+        )
+    return start_date, end_date
+
+
+def _get_class_matrix(
+    class_id: int,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    current_user: Principal,
+    db: Session
+) -> AttendanceMatrix:
+    """Check class ownership and load its attendance window."""
+    class_obj = db.query(Class).filter(Class.class_id == class_id).first()
+    if not class_obj:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Class not found"
+        )
+
+    if class_obj.teacher_id != current_user.user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to view analytics for this class"
+        )
+
+    start_date, end_date = _resolve_window(start_date, end_date)
+    return analytics_service.get_matrix(db, [class_id], start_date, end_date)
+
+
+@router.get("/class/{class_id}/heatmap")
+def get_class_heatmap(
+    class_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_user: Principal = Depends(get_current_teacher),
+    db: Session = Depends(get_read_db)
+):
+    """Weekly attendance percentage per student (null for weeks with no records)."""
+    matrix = _get_class_matrix(class_id, start_date, end_date, current_user, db)
+    return {
+        "class_id": class_id,
+        "start_date": matrix.start_date.isoformat(),
+        "end_date": matrix.end_date.isoformat(),
+        **analytics_service.weekly_heatmap(matrix)
+    }
+
+
+@router.get("/class/{class_id}/weekday-trends")
+def get_class_weekday_trends(
+    class_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_user: Principal = Depends(get_current_teacher),
+    db: Session = Depends(get_read_db)
+):
+    """Class-wide attendance percentage by day of the week."""
+    matrix = _get_class_matrix(class_id, start_date, end_date, current_user, db)
+    return {
+        "class_id": class_id,
+        "start_date": matrix.start_date.isoformat(),
+        "end_date": matrix.end_date.isoformat(),
+        "weekdays": analytics_service.weekday_trends(matrix)
+    }
+
+
+@router.get("/class/{class_id}/rolling")
+def get_class_rolling_percentage(
+    class_id: int,
+    window_days: int = Query(7, ge=1, le=90),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_user: Principal = Depends(get_current_teacher),
+    db: Session = Depends(get_read_db)
+):
+    """Class-wide attendance percentage over a trailing window, for each day."""
+    matrix = _get_class_matrix(class_id, start_date, end_date, current_user, db)
+    return {
+        "class_id": class_id,
+        "window_days": window_days,
+        "days": analytics_service.rolling_percentage(matrix, window_days)
+    }
+
+
+@router.get("/class/{class_id}/below-threshold")
+def get_class_below_threshold(
+    class_id: int,
+    threshold: float = Query(settings.ATTENDANCE_THRESHOLD, ge=0, le=100),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_user: Principal = Depends(get_current_teacher),
+    db: Session = Depends(get_read_db)
+):
+    """Students in the class whose attendance is below the threshold, lowest first."""
+    matrix = _get_class_matrix(class_id, start_date, end_date, current_user, db)
+    return {
+        "class_id": class_id,
+        "threshold": threshold,
+        "students": analytics_service.below_threshold(matrix, threshold)
+    }
+
+
+@router.get("/branch/{branch}/below-threshold")
+def get_branch_below_threshold(
+    branch: str,
+    threshold: float = Query(settings.ATTENDANCE_THRESHOLD, ge=0, le=100),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_user: Principal = Depends(get_current_teacher),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Students of a branch whose attendance across the current teacher's classes
+    is below the threshold, lowest first.
+    """
+    start_date, end_date = _resolve_window(start_date, end_date)
+    class_ids: List[int] = [
+        class_id for (class_id,) in
+        db.query(Class.class_id).filter(Class.teacher_id == current_user.user_id).all()
+    ]
+    if not class_ids:
+        return {"branch": branch.upper(), "threshold": threshold, "students": []}
+
+    matrix = analytics_service.get_matrix(db, class_ids, start_date, end_date, branch=branch)
+    return {
+        "branch": branch.upper(),
+        "threshold": threshold,
+        "students": analytics_service.below_threshold(matrix, threshold)
+    }
@@ -1,151 +1,250 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
-from typing import List, Optional
+from sqlalchemy import select, func, and_, or_
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional, Tuple
 from datetime import date, datetime, timedelta
-from app.core.database import get_db
-from app.core.dependencies import get_current_user, get_current_teacher
-from app.schemas.attendance import AttendanceResponse, AttendanceUpdate
+import base64
+from app.core.config import settings
+from app.core.database import get_db, get_read_db, get_async_read_db
+from app.core.dependencies import Principal, get_current_principal, get_current_teacher
+from app.core.etag import apply_etag
+from app.schemas.attendance import AttendanceResponse, AttendanceUpdate, BulkAttendanceItem, BulkAttendanceUpdate
 from app.models.user import User
-from app.models.attendance import Attendance, AttendanceStatus
+from app.models.attendance import Attendance, AttendanceStatus, MarkedBy
 from app.models.class_model import Class, Enrollment
+from app.services.archive import archive_service
 from app.services.cleanup import cleanup_service
+from app.services.export import export_service, EXPORT_FORMATS, PARQUET_AVAILABLE
+from app.services.rollup import rollup_service, month_start, next_month_start
+from app.services.versions import version_service, SCOPE_CLASS, SCOPE_STUDENT
 
 router = APIRouter(prefix="/attendance", tags=["Attendance"])
 
 
+def _encode_cursor(attendance_date: date, attendance_id: int) -> str:
+    """Encode a keyset position as an opaque cursor string."""
+    raw = f"{attendance_date.isoformat()}:{attendance_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[date, int]:
+    """Decode a cursor produced by _encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date_str, attendance_id = base64.urlsafe_b64decode(padded.encode()).decode().split(":")
+        return date.fromisoformat(date_str), int(attendance_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
 @router.get("/", response_model=List[AttendanceResponse])
-def get_attendance(
+async def get_attendance(
+    request: Request,
+    response: Response,
     class_id: int = None,
     start_date: date = None,
     end_date: date = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.ATTENDANCE_PAGE_SIZE, ge=1, le=settings.ATTENDANCE_MAX_PAGE_SIZE),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Get attendance records based on user role and filters."""
-    query = db.query(Attendance)
+    """
+    Get attendance records based on user role and filters.
+    Results are ordered newest first and paginated by keyset: pass the
+    X-Next-Cursor response header back as `cursor` to fetch the next page.
+    When no date range is given, only the last ATTENDANCE_DEFAULT_WINDOW_DAYS are returned.
+    Honours If-None-Match: returns 304 while none of the underlying data has changed.
+    """
+    # Students' views are versioned per student; teachers' per class they teach
+    if current_user.role == "teacher":
+        class_ids = (await db.execute(
+            select(Class.class_id).where(Class.teacher_id == current_user.user_id)
+        )).scalars().all()
+        scopes = {SCOPE_CLASS: class_ids}
+    else:
+        scopes = {SCOPE_STUDENT: [current_user.user_id]}
+    etag = await version_service.etag_async(
+        db, scopes, current_user.user_id, class_id, start_date, end_date, cursor, limit
+    )
+    apply_etag(request, response, etag)
+    
+    # Single projection query: names come from joins instead of lazy loads per row
+    query = select(
+        Attendance.attendance_id,
+        Attendance.student_id,
+        Attendance.class_id,
+        Attendance.attendance_date,
+        Attendance.status,
+        Attendance.marked_by,
+        Attendance.marked_at,
+        Attendance.notes,
+        Attendance.teacher_modified,
+        User.full_name.label("student_name"),
+        Class.class_name.label("class_name")
+    ).join(
+        User, User.user_id == Attendance.student_id
+    ).join(
+        Class, Class.class_id == Attendance.class_id
+    )
     
     # Students can only see their own attendance
     if current_user.role == "student":
-        query = query.filter(Attendance.student_id == current_user.user_id)
+        query = query.where(Attendance.student_id == current_user.user_id)
         
         # If filtering by class, verify student is enrolled in that class
         if class_id:
-            enrollment = db.query(Enrollment).filter(
-                Enrollment.student_id == current_user.user_id,
-                Enrollment.class_id == class_id
-            ).first()
+            enrollment = (await db.execute(
+                select(Enrollment.enrollment_id).where(
+                    Enrollment.student_id == current_user.user_id,
+                    Enrollment.class_id == class_id
+                )
+            )).first()
             if not enrollment:
                 # Student is not enrolled in this class, return empty list
                 return []
-            query = query.filter(Attendance.class_id == class_id)
+            query = query.where(Attendance.class_id == class_id)
     
     # Teachers can see all attendance for their classes
     elif current_user.role == "teacher":
-        # Get all classes taught by this teacher
-        teacher_classes = db.query(Class.class_id).filter(Class.teacher_id == current_user.user_id).all()
-        class_ids = [cls.class_id for cls in teacher_classes]
-        if not class_ids:
-            return []
-        query = query.filter(Attendance.class_id.in_(class_ids))
+        query = query.where(Class.teacher_id == current_user.user_id)
         
-        # Apply class filter if provided
+        # Apply class filter if provided (classes taught by others simply match nothing)
         if class_id:
-            if class_id not in class_ids:
-                # Teacher doesn't teach this class, return empty list
-                return []
-            query = query.filter(Attendance.class_id == class_id)
+            query = query.where(Attendance.class_id == class_id)
+    
+    # Apply default window when no range is given
+    if start_date is None and end_date is None:
+        start_date = date.today() - timedelta(days=settings.ATTENDANCE_DEFAULT_WINDOW_DAYS)
     if start_date:
-        query = query.filter(Attendance.attendance_date >= start_date)
+        query = query.where(Attendance.attendance_date >= start_date)
     if end_date:
-        query = query.filter(Attendance.attendance_date <= end_date)
-    
-    # Order by date descending
-    query = query.order_by(Attendance.attendance_date.desc())
-    
-    attendances = query.all()
-    
-    # Add names for better display
-    result = []
-    for att in attendances:
-        att_dict = {
-            "attendance_id": att.attendance_id,
-            "student_id": att.student_id,
-            "class_id": att.class_id,
-            "attendance_date": att.attendance_date,
-            "status": att.status,
-            "marked_by": att.marked_by,
-            "marked_at": att.marked_at,
-            "notes": att.notes,
-            "teacher_modified": att.teacher_modified,
-            "student_name": att.student.full_name if att.student else None,
-            "class_name": att.class_obj.class_name if att.class_obj else None
-        }
-        result.append(AttendanceResponse(**att_dict))
+        query = query.where(Attendance.attendance_date <= end_date)
     
-    return result
+    # Keyset pagination on (attendance_date, attendance_id), newest first
+    if cursor:
+        cursor_date, cursor_id = _decode_cursor(cursor)
+        query = query.where(or_(
+            Attendance.attendance_date < cursor_date,
+            and_(Attendance.attendance_date == cursor_date, Attendance.attendance_id < cursor_id)
+        ))
+    
+    query = query.order_by(Attendance.attendance_date.desc(), Attendance.attendance_id.desc())
+    
+    # Fetch one extra row to know whether another page exists
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = _encode_cursor(last.attendance_date, last.attendance_id)
+    
+    return [row._asdict() for row in rows]
+
+
+def _parse_month(value: str, field: str) -> date:
+    """Parse a YYYY-MM month string into the first day of that month."""
+    try:
+        return datetime.strptime(value, "%Y-%m").date()
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid {field}. Use YYYY-MM"
+        )
 
 
 @router.get("/calendar")
-def get_attendance_calendar(
+async def get_attendance_calendar(
     class_id: Optional[int] = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    start_month: Optional[str] = Query(None, description="First month to include (YYYY-MM), defaults to the current month"),
+    end_month: Optional[str] = Query(None, description="Last month to include (YYYY-MM), defaults to start_month"),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Get attendance records in calendar format (date -> status) for students."""
+    """
+    Get attendance for a range of months as compact per-class day bitmaps (students only).
+    
+    For each month and class, bit (day - 1) of `present` is set if the student was
+    present that day, and likewise for `absent`.
+    """
     if current_user.role != "student":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="This endpoint is for students only"
         )
     
-    # Get attendance records for the student
-    query = db.query(Attendance).filter(
-        Attendance.student_id == current_user.user_id
+    start = _parse_month(start_month, "start_month") if start_month else month_start(date.today())
+    end = _parse_month(end_month, "end_month") if end_month else start
+    if end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_month must not be before start_month"
+        )
+    if (end.year - start.year) * 12 + end.month - start.month >= settings.CALENDAR_MAX_MONTHS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.CALENDAR_MAX_MONTHS} months can be requested at once"
+        )
+    
+    # Only the requested months are read, with class names from a join
+    query = select(
+        Attendance.class_id,
+        Class.class_name,
+        Attendance.attendance_date,
+        Attendance.status
+    ).join(
+        Class, Class.class_id == Attendance.class_id
+    ).where(
+        Attendance.student_id == current_user.user_id,
+        Attendance.attendance_date >= start,
+        Attendance.attendance_date < next_month_start(end)
     )
     
     if class_id is not None:
-        query = query.filter(Attendance.class_id == class_id)
-    
-    # Get all records (for calendar view, we want all dates)
-    records = query.order_by(Attendance.attendance_date.desc()).all()
-    
-    # Build calendar map: date -> list of attendance records
-    # If filtering by class_id, we show single status per date
-    # If not filtering, we show the overall status (present if any class is present, absent if all are absent)
-    calendar_map = {}
-    for record in records:
-        date_str = record.attendance_date.isoformat()
-        if date_str not in calendar_map:
-            calendar_map[date_str] = {
-                "status": record.status,
-                "classes": [],
-                "marked_by": record.marked_by
-            }
-        
-        # Add class info
-        class_info = {
-            "class_id": record.class_id,
-            "class_name": record.class_obj.class_name if record.class_obj else None,
-            "status": record.status
-        }
-        calendar_map[date_str]["classes"].append(class_info)
-        
-        # If any class is present, mark overall as present
-        if record.status == "present":
-            calendar_map[date_str]["status"] = "present"
+        query = query.where(Attendance.class_id == class_id)
     
-    return {
-        "calendar": calendar_map,
-        "total_records": len(records)
-    }
+    # Build month -> class -> bitmaps
+    bitmaps = {}
+    for row in await db.execute(query):
+        classes = bitmaps.setdefault(month_start(row.attendance_date), {})
+        entry = classes.setdefault(row.class_id, {
+            "class_id": row.class_id,
+            "class_name": row.class_name,
+            "present": 0,
+            "absent": 0
+        })
+        bit = 1 << (row.attendance_date.day - 1)
+        if row.status == AttendanceStatus.present:
+            entry["present"] |= bit
+        else:
+            entry["absent"] |= bit
+    
+    months = []
+    month = start
+    while month <= end:
+        classes = bitmaps.get(month, {})
+        months.append({
+            "month": month.strftime("%Y-%m"),
+            "days": (next_month_start(month) - month).days,
+            "classes": [classes[cls_id] for cls_id in sorted(classes)]
+        })
+        month = next_month_start(month)
+    
+    return {"months": months}
 
 
 @router.get("/my-stats")
-def get_my_attendance_stats(
+async def get_my_attendance_stats(
+    request: Request,
+    response: Response,
     class_id: int = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get attendance statistics for current user (last 6 months only).
@@ -157,22 +256,25 @@ def get_my_attendance_stats(
             detail="This endpoint is for students only"
         )
     
+    etag = await version_service.etag_async(db, {SCOPE_STUDENT: [current_user.user_id]}, current_user.user_id, class_id)
+    apply_etag(request, response, etag)
+    
     # Calculate cutoff date (6 months ago) - same as cleanup service
     cutoff_date = date.today() - timedelta(days=int(6 * 30.44))
     
-    query = db.query(Attendance).filter(
-        Attendance.student_id == current_user.user_id,
-        Attendance.attendance_date >= cutoff_date  # Only last 6 months
+    # Read counts from the monthly rollups (only the partial first month touches raw rows)
+    counts = rollup_service.window_counts_subquery(
+        cutoff_date,
+        student_id=current_user.user_id,
+        class_id=class_id or None
     )
-    
-    if class_id:
-        query = query.filter(Attendance.class_id == class_id)
-    
-    all_records = query.all()
-    
-    total_classes = len(all_records)
-    present_count = sum(1 for r in all_records if r.status == "present")
-    absent_count = sum(1 for r in all_records if r.status == "absent")
+    present_count, absent_count = (await db.execute(select(
+        func.coalesce(func.sum(counts.c.present_count), 0),
+        func.coalesce(func.sum(counts.c.absent_count), 0)
+    ))).one()
+    present_count = int(present_count)
+    absent_count = int(absent_count)
+    total_classes = present_count + absent_count
     
     percentage = (present_count / total_classes * 100) if total_classes > 0 else 0
     
@@ -187,11 +289,290 @@ def get_my_attendance_stats(
     }
 
 
+@router.get("/export")
+def export_attendance(
+    format: str = Query("csv", description="csv, csv.gz or parquet"),
+    class_id: Optional[int] = None,
+    student_id: Optional[int] = None,
+    branch: Optional[str] = None,
+    year_of_joining: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_user: Principal = Depends(get_current_teacher),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Export attendance for the teacher's classes (Teachers only).
+    Rows are streamed from a server-side cursor, so any date range can be exported.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid format. Please select one of: {', '.join(EXPORT_FORMATS)}"
+        )
+    
+    if format == "parquet" and not PARQUET_AVAILABLE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Parquet export is not available on this server"
+        )
+    
+    query = export_service.build_query(
+        db,
+        teacher_id=current_user.user_id,
+        class_id=class_id,
+        student_id=student_id,
+        branch=branch,
+        year_of_joining=year_of_joining,
+        start_date=start_date,
+        end_date=end_date
+    )
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"attendance_{date.today().isoformat()}.{extension}"
+    return StreamingResponse(
+        export_service.stream(query, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/archive")
+def export_archived_attendance(
+    start_date: date,
+    end_date: date,
+    format: str = Query("csv", description="csv, csv.gz or parquet"),
+    class_id: Optional[int] = None,
+    student_id: Optional[int] = None,
+    current_user: Principal = Depends(get_current_teacher),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Export archived (past retention) attendance for the teacher's classes (Teachers only).
+    Scans the monthly archive files overlapping the date range; the database is not queried
+    beyond the teacher's class list.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid format. Please select one of: {', '.join(EXPORT_FORMATS)}"
+        )
+    
+    if format == "parquet" and not PARQUET_AVAILABLE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Parquet export is not available on this server"
+        )
+    
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must be on or before end_date"
+        )
+    
+    class_ids = {
+        row.class_id for row in
+        db.query(Class.class_id).filter(Class.teacher_id == current_user.user_id).all()
+    }
+    if class_id is not None:
+        class_ids &= {class_id}
+    
+    rows = archive_service.iter_rows(start_date, end_date, class_ids=class_ids, student_id=student_id)
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"attendance_archive_{start_date.isoformat()}_{end_date.isoformat()}.{extension}"
+    return StreamingResponse(
+        archive_service.stream(rows, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+def _apply_bulk_items(
+    db: Session,
+    items: List[BulkAttendanceItem],
+    attendance_ids: set,
+    keyed_items: List[BulkAttendanceItem],
+    class_id: Optional[int],
+    user_id: int
+) -> Tuple[List[dict], List[Tuple[dict, Attendance]]]:
+    """
+    Apply bulk items to the session (without flushing). Returns one result per
+    item and the (result, record) pairs that were updated or created.
+    """
+    # One query loads every targeted record together with its class's teacher
+    conditions = []
+    if attendance_ids:
+        conditions.append(Attendance.attendance_id.in_(attendance_ids))
+    if keyed_items:
+        conditions.append(and_(
+            Attendance.class_id == class_id,
+            Attendance.student_id.in_({item.student_id for item in keyed_items}),
+            Attendance.attendance_date.in_({item.attendance_date for item in keyed_items})
+        ))
+    records_by_id = {}
+    records_by_key = {}
+    if conditions:
+        rows = db.query(Attendance, Class.teacher_id).join(
+            Class, Class.class_id == Attendance.class_id
+        ).filter(or_(*conditions)).all()
+        for attendance, teacher_id in rows:
+            records_by_id[attendance.attendance_id] = (attendance, teacher_id)
+            records_by_key[(attendance.class_id, attendance.student_id, attendance.attendance_date)] = (attendance, teacher_id)
+    
+    # Creating records needs the class's teacher and which of the students are enrolled
+    class_teacher_id = None
+    enrolled_ids = set()
+    if keyed_items:
+        rows = db.query(Class.teacher_id, Enrollment.student_id).outerjoin(
+            Enrollment, and_(
+                Enrollment.class_id == Class.class_id,
+                Enrollment.student_id.in_({item.student_id for item in keyed_items})
+            )
+        ).filter(Class.class_id == class_id).all()
+        if rows:
+            class_teacher_id = rows[0].teacher_id
+            enrolled_ids = {row.student_id for row in rows if row.student_id is not None}
+    
+    results = []
+    touched = []
+    for index, item in enumerate(items):
+        result = {"index": index, "attendance_id": item.attendance_id, "result": "invalid", "detail": None}
+        results.append(result)
+        
+        new_status = None
+        if item.status is not None:
+            try:
+                new_status = AttendanceStatus(item.status)
+            except ValueError:
+                result["detail"] = "Status must be 'present' or 'absent'"
+                continue
+        
+        if item.attendance_id is not None:
+            entry = records_by_id.get(item.attendance_id)
+        elif item.student_id is not None and item.attendance_date is not None:
+            entry = records_by_key.get((class_id, item.student_id, item.attendance_date))
+        else:
+            result["detail"] = "Provide attendance_id, or student_id and attendance_date"
+            continue
+        
+        if entry is not None:
+            attendance, teacher_id = entry
+            if teacher_id != user_id:
+                result["result"] = "forbidden"
+                result["detail"] = "You don't have permission to modify this attendance"
+                continue
+            if new_status is not None:
+                attendance.status = new_status
+            if item.notes is not None:
+                attendance.notes = item.notes
+            attendance.teacher_modified = True
+            touched.append((result, attendance))
+            result["result"] = "updated"
+            continue
+        
+        if item.attendance_id is not None:
+            result["result"] = "not_found"
+            result["detail"] = "Attendance record not found"
+        elif class_teacher_id is None:
+            result["result"] = "not_found"
+            result["detail"] = "Class not found"
+        elif class_teacher_id != user_id:
+            result["result"] = "forbidden"
+            result["detail"] = "You don't have permission to modify attendance for this class"
+        elif item.student_id not in enrolled_ids:
+            result["detail"] = "Student is not enrolled in this class"
+        elif new_status is None:
+            result["detail"] = "status is required to create a record"
+        else:
+            attendance = Attendance(
+                student_id=item.student_id,
+                class_id=class_id,
+                attendance_date=item.attendance_date,
+                status=new_status,
+                marked_by=MarkedBy.teacher,
+                notes=item.notes,
+                teacher_modified=True
+            )
+            db.add(attendance)
+            # Later items for the same student and date update this new record
+            records_by_key[(class_id, item.student_id, item.attendance_date)] = (attendance, class_teacher_id)
+            touched.append((result, attendance))
+            result["result"] = "created"
+    
+    return results, touched
+
+
+@router.put("/bulk")
+def bulk_update_attendance(
+    bulk_update: BulkAttendanceUpdate,
+    current_user: Principal = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """
+    Update or create many attendance records in one transaction (Teachers only).
+    Items are identified by attendance_id, or by (student_id, attendance_date) within
+    class_id, in which case a missing record is created. Every change is marked
+    teacher_modified. Returns one result per item in request order; invalid items
+    are reported and skipped without failing the rest of the batch.
+    """
+    items = bulk_update.items
+    if not items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No items provided"
+        )
+    if len(items) > settings.ATTENDANCE_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot update more than {settings.ATTENDANCE_BULK_MAX_ITEMS} records at once"
+        )
+    
+    attendance_ids = {item.attendance_id for item in items if item.attendance_id is not None}
+    keyed_items = [
+        item for item in items
+        if item.attendance_id is None and item.student_id is not None and item.attendance_date is not None
+    ]
+    class_id = bulk_update.class_id
+    if keyed_items and class_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="class_id is required for items identified by student_id and attendance_date"
+        )
+    
+    # ORM flush batches the writes and keeps rollups and data versions in step.
+    # A concurrent scan or update may insert one of the new (student, class, date)
+    # records first; re-read once so those items become updates.
+    for attempt in range(2):
+        results, touched = _apply_bulk_items(db, items, attendance_ids, keyed_items, class_id, current_user.user_id)
+        try:
+            db.flush()
+            break
+        except IntegrityError:
+            db.rollback()
+            if attempt:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Attendance records were modified concurrently. Please retry."
+                )
+    for result, attendance in touched:
+        result["attendance_id"] = attendance.attendance_id
+    db.commit()
+    
+    counts = {outcome: sum(1 for r in results if r["result"] == outcome) for outcome in ("updated", "created")}
+    return {
+        "message": f"Updated {counts['updated']} and created {counts['created']} attendance records",
+        "updated_count": counts["updated"],
+        "created_count": counts["created"],
+        "failed_count": len(results) - counts["updated"] - counts["created"],
+        "results": results
+    }
+
+
 @router.put("/{attendance_id}")
 def update_attendance(
     attendance_id: int,
     attendance_update: AttendanceUpdate,
-    current_user: User = Depends(get_current_teacher),
+    current_user: Principal = Depends(get_current_teacher),
     db: Session = Depends(get_db)
 ):
     """Update attendance record (Teachers only)."""
@@ -228,7 +609,7 @@ def update_attendance(
 @router.post("/cleanup-old-records")
 def cleanup_old_attendance_records(
     months: Optional[int] = 6,
-    current_user: User = Depends(get_current_teacher),
+    current_user: Principal = Depends(get_current_teacher),
     db: Session = Depends(get_db)
 ):
     """
@@ -2,11 +2,14 @@ from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File,
 from sqlalchemy.orm import Session, joinedload
 from typing import Optional
 import os
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.security import verify_password, create_access_token, get_password_hash
-from app.schemas.user import UserLogin, Token, UserResponse, UserCreate, UserUpdate
+from app.schemas.user import UserLogin, Token, RefreshRequest, UserResponse, UserCreate, UserUpdate
 from app.models.user import User
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_current_user, invalidate_principal
+from app.services.list_cache import list_cache
+from app.services.tokens import refresh_token_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,11 +17,18 @@ logger = logging.getLogger(__name__)
 # Import OCR service only when needed (lazy import to avoid startup issues)
 try:
     from app.services.ocr_service import ocr_service
+    from app.services.ocr_pool import ocr_pool, OCRPoolSaturated, OCRUnavailable
     OCR_SERVICE_AVAILABLE = True
 except ImportError as e:
     logger.warning(f"OCR service not available: {e}")
-    ocr_service = None
+    ocr_service = ocr_pool = None
     OCR_SERVICE_AVAILABLE = False
+    
+    class OCRPoolSaturated(Exception):
+        pass
+
+    class OCRUnavailable(Exception):
+        pass
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -42,7 +52,35 @@ def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
         )
     
     access_token = create_access_token(data={"sub": user.username, "role": user.role})
-    return {"access_token": access_token, "token_type": "bearer"}
+    refresh_token = refresh_token_service.issue(db, user)
+    db.commit()
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+
+@router.post("/refresh", response_model=Token)
+def refresh_access_token(refresh_request: RefreshRequest, db: Session = Depends(get_db)):
+    """
+    Exchange a refresh token for a new access token and refresh token.
+    The old refresh token is revoked; presenting it again revokes the whole session.
+    """
+    rotated = refresh_token_service.rotate(db, refresh_request.refresh_token)
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    user, refresh_token = rotated
+    access_token = create_access_token(data={"sub": user.username, "role": user.role})
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+
+@router.post("/logout")
+def logout(refresh_request: RefreshRequest, db: Session = Depends(get_db)):
+    """Revoke a refresh token and every token rotated from the same login."""
+    refresh_token_service.revoke(db, refresh_request.refresh_token)
+    return {"message": "Logged out successfully"}
 
 
 @router.post("/register", response_model=UserResponse)
@@ -80,6 +118,7 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
+    list_cache.on_student_changed()
     
     return new_user
 
@@ -128,12 +167,25 @@ async def register_with_id_card(
                 detail="OCR service is not available. Please contact administrator."
             )
         
+        # OCR front and back concurrently in the worker pool, off the event loop
         logger.info(f"Processing ID card for user: {username}")
-        extracted_data = ocr_service.process_id_card(front_image_bytes)
+        try:
+            extracted_data, back_data = await ocr_pool.process_id_cards(front_image_bytes, back_image_bytes)
+        except OCRPoolSaturated:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="ID card processing is busy. Please try again shortly.",
+                headers={"Retry-After": str(settings.OCR_RETRY_AFTER_SECONDS)}
+            )
+        except OCRUnavailable:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="OCR model failed to load. Please try again later.",
+                headers={"Retry-After": str(settings.OCR_RETRY_AFTER_SECONDS)}
+            )
         
-        # If back card is provided, process it and merge data
-        if back_image_bytes and OCR_SERVICE_AVAILABLE and ocr_service:
-            back_data = ocr_service.process_id_card(back_image_bytes)
+        # If back card is provided, merge its data
+        if back_data:
             # Merge data (front takes priority for conflicts)
             if not extracted_data.get('full_name') and back_data.get('full_name'):
                 extracted_data['full_name'] = back_data['full_name']
@@ -316,6 +368,7 @@ async def register_with_id_card(
         db.add(new_user)
         db.commit()
         db.refresh(new_user)
+        list_cache.on_student_changed()
         
         logger.info(f"Successfully registered user: {username} as {role}")
         
@@ -382,6 +435,8 @@ def update_current_user_profile(
     
     db.commit()
     db.refresh(current_user)
+    list_cache.on_student_changed(current_user.user_id)
+    invalidate_principal(current_user.username)
     
     return current_user
 
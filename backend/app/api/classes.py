@@ -1,21 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select, case
+from typing import List, Optional
 from datetime import date, timedelta
-from app.core.database import get_db
-from app.core.dependencies import get_current_teacher, get_current_user
+from app.core.database import get_db, get_read_db, get_async_db
+from app.core.dependencies import Principal, get_current_teacher, get_current_principal
+from app.core.cache import response_cache
+from app.core.etag import apply_etag
 from app.schemas.class_model import ClassCreate, ClassResponse, ClassUpdate, EnrollmentCreate, BulkEnrollmentCreate
 from app.models.class_model import Class, Enrollment
 from app.models.user import User, StudentPhoto
-from app.models.attendance import Attendance
+from app.services.rollup import rollup_service
+from app.services.versions import version_service, SCOPE_CLASS, SCOPE_TEACHER
+from app.services.list_cache import list_cache, ALL_CLASSES_KEY
+from app.services.photo_store import photo_store
 
 router = APIRouter(prefix="/classes", tags=["Classes"])
 
 
+def _serialize_classes(classes: List[Class]) -> List[dict]:
+    """Plain JSON-ready dicts, so cached lists work with any cache backend."""
+    return [ClassResponse.model_validate(c).model_dump(mode="json") for c in classes]
+
+
 @router.post("/", response_model=ClassResponse)
 def create_class(
     class_data: ClassCreate,
-    current_user: User = Depends(get_current_teacher),
+    current_user: Principal = Depends(get_current_teacher),
     db: Session = Depends(get_db)
 ):
     """Create a new class."""
@@ -38,34 +50,48 @@ def create_class(
     db.add(new_class)
     db.commit()
     db.refresh(new_class)
+    list_cache.on_class_changed(current_user.user_id)
     
     return new_class
 
 
+async def _load_classes(db: AsyncSession, query) -> List[dict]:
+    return _serialize_classes((await db.execute(query)).scalars().all())
+
+
 @router.get("/", response_model=List[ClassResponse])
-def get_all_classes(
-    current_user: User = Depends(get_current_teacher),
-    db: Session = Depends(get_db)
+async def get_all_classes(
+    current_user: Principal = Depends(get_current_teacher),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all classes."""
-    classes = db.query(Class).all()
-    return classes
+    return await response_cache.get_or_load_async(
+        ALL_CLASSES_KEY,
+        lambda: _load_classes(db, select(Class))
+    )
 
 
 @router.get("/my-classes", response_model=List[ClassResponse])
-def get_my_classes(
-    current_user: User = Depends(get_current_teacher),
-    db: Session = Depends(get_db)
+async def get_my_classes(
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_teacher),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get classes taught by current teacher."""
-    classes = db.query(Class).filter(Class.teacher_id == current_user.user_id).all()
-    return classes
+    etag = await version_service.etag_async(db, {SCOPE_TEACHER: [current_user.user_id]}, current_user.user_id)
+    apply_etag(request, response, etag)
+    
+    return await response_cache.get_or_load_async(
+        list_cache.teacher_classes_key(current_user.user_id, etag),
+        lambda: _load_classes(db, select(Class).where(Class.teacher_id == current_user.user_id))
+    )
 
 
 @router.get("/my-enrolled-classes", response_model=List[ClassResponse])
-def get_my_enrolled_classes(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_my_enrolled_classes(
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get classes the current student is enrolled in."""
     if current_user.role != "student":
@@ -74,22 +100,24 @@ def get_my_enrolled_classes(
             detail="This endpoint is for students only"
         )
     
-    # Get all enrollments for this student
-    enrollments = db.query(Enrollment).filter(Enrollment.student_id == current_user.user_id).all()
-    class_ids = [e.class_id for e in enrollments]
-    
-    if not class_ids:
-        return []
-    
-    # Get the classes
-    classes = db.query(Class).filter(Class.class_id.in_(class_ids)).all()
-    return classes
+    # Classes joined to this student's enrollments in one query
+    return await response_cache.get_or_load_async(
+        list_cache.student_classes_key(current_user.user_id),
+        lambda: _load_classes(
+            db,
+            select(Class).join(
+                Enrollment, Enrollment.class_id == Class.class_id
+            ).where(
+                Enrollment.student_id == current_user.user_id
+            )
+        )
+    )
 
 
 @router.post("/enroll")
 def enroll_student(
     enrollment: EnrollmentCreate,
-    current_user: User = Depends(get_current_teacher),
+    current_user: Principal = Depends(get_current_teacher),
     db: Session = Depends(get_db)
 ):
     """Enroll a student in a class."""
@@ -134,6 +162,7 @@ def enroll_student(
     
     db.add(new_enrollment)
     db.commit()
+    list_cache.on_enrollment_changed([enrollment.student_id])
     
     return {"message": "Student enrolled successfully"}
 
@@ -141,7 +170,7 @@ def enroll_student(
 @router.post("/enroll-bulk")
 def enroll_students_bulk(
     enrollment: BulkEnrollmentCreate,
-    current_user: User = Depends(get_current_teacher),
+    current_user: Principal = Depends(get_current_teacher),
     db: Session = Depends(get_db)
 ):
     """Enroll multiple students in a class at once."""
@@ -203,6 +232,7 @@ def enroll_students_bulk(
     
     db.add_all(new_enrollments)
     db.commit()
+    list_cache.on_enrollment_changed(new_student_ids)
     
     return {
         "message": f"Successfully enrolled {len(new_enrollments)} student(s)",
@@ -214,11 +244,20 @@ def enroll_students_bulk(
 
 @router.get("/{class_id}/students")
 def get_class_students(
+    request: Request,
+    response: Response,
     class_id: int,
-    current_user: User = Depends(get_current_teacher),
-    db: Session = Depends(get_db)
+    sort: str = Query("roll_number", pattern="^(roll_number|name|attendance)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    current_user: Principal = Depends(get_current_teacher),
+    db: Session = Depends(get_read_db)
 ):
-    """Get all enrolled students for a class with their attendance statistics."""
+    """
+    Get enrolled students for a class with their attendance statistics.
+    Sorted by roll number, name or attendance percentage; optionally paged with skip/limit.
+    """
     # Verify class exists and belongs to teacher
     class_obj = db.query(Class).filter(Class.class_id == class_id).first()
     if not class_obj:
@@ -233,58 +272,88 @@ def get_class_students(
             detail="You don't have permission to view students for this class"
         )
     
-    # Get enrolled students
-    enrollments = db.query(Enrollment).filter(Enrollment.class_id == class_id).all()
-    student_ids = [e.student_id for e in enrollments]
+    etag = version_service.etag(db, {SCOPE_CLASS: [class_id]}, class_id, sort, order, skip, limit)
+    apply_etag(request, response, etag)
     
-    if not student_ids:
-        return []
+    # Calculate cutoff date (6 months ago) - same as cleanup service
+    cutoff_date = date.today() - timedelta(days=int(6 * 30.44))
     
-    # Get students with their photos
-    students = db.query(User).filter(
-        User.user_id.in_(student_ids),
+    # Per-student attendance totals for this class, aggregated from the monthly rollups
+    counts = rollup_service.window_counts_subquery(cutoff_date, class_id=class_id)
+    stats = select(
+        counts.c.student_id,
+        func.sum(counts.c.present_count).label("present_count"),
+        func.sum(counts.c.absent_count).label("absent_count")
+    ).group_by(counts.c.student_id).subquery("stats")
+    
+    # Primary photo path (or first photo if none is primary), without loading photo rows
+    photo_path = select(StudentPhoto.photo_path).where(
+        StudentPhoto.user_id == User.user_id
+    ).order_by(
+        StudentPhoto.is_primary.desc(), StudentPhoto.photo_id
+    ).limit(1).correlate(User).scalar_subquery()
+    
+    present_count = func.coalesce(stats.c.present_count, 0)
+    absent_count = func.coalesce(stats.c.absent_count, 0)
+    total_classes = present_count + absent_count
+    attendance_ratio = case((total_classes > 0, present_count * 1.0 / total_classes), else_=0)
+    
+    query = db.query(
+        User.user_id,
+        User.username,
+        User.full_name,
+        User.student_id,
+        User.email,
+        photo_path.label("photo_path"),
+        present_count.label("present_count"),
+        absent_count.label("absent_count")
+    ).join(
+        Enrollment, Enrollment.student_id == User.user_id
+    ).outerjoin(
+        stats, stats.c.student_id == User.user_id
+    ).filter(
+        Enrollment.class_id == class_id,
         User.role == "student"
-    ).options(joinedload(User.photos)).all()
+    )
     
-    # Calculate cutoff date (6 months ago) - same as cleanup service
-    cutoff_date = date.today() - timedelta(days=int(6 * 30.44))
+    # Sort in SQL; by default by student_id (roll number) if available, otherwise by name
+    roll_number = func.coalesce(User.student_id, "")
+    if sort == "name":
+        order_by = [User.full_name, roll_number]
+    elif sort == "attendance":
+        order_by = [attendance_ratio, roll_number, User.full_name]
+    else:
+        order_by = [roll_number, User.full_name]
+    if order == "desc":
+        order_by = [column.desc() for column in order_by]
+    query = query.order_by(*order_by, User.user_id)
+    
+    if skip:
+        query = query.offset(skip)
+    if limit is not None:
+        query = query.limit(limit)
     
     result = []
-    for student in students:
-        # Get primary photo
-        primary_photo = None
-        if student.photos:
-            primary_photo = next((p for p in student.photos if p.is_primary), None)
-            if not primary_photo:
-                primary_photo = student.photos[0] if student.photos else None
-        
-        # Calculate attendance statistics for this student in this class (last 6 months)
-        attendance_records = db.query(Attendance).filter(
-            Attendance.student_id == student.user_id,
-            Attendance.class_id == class_id,
-            Attendance.attendance_date >= cutoff_date
-        ).all()
-        
-        total_classes = len(attendance_records)
-        present_count = sum(1 for r in attendance_records if r.status == "present")
-        attendance_percentage = (present_count / total_classes * 100) if total_classes > 0 else 0
+    for row in query:
+        present = int(row.present_count)
+        absent = int(row.absent_count)
+        total = present + absent
+        attendance_percentage = (present / total * 100) if total > 0 else 0
         
         result.append({
-            "user_id": student.user_id,
-            "username": student.username,
-            "full_name": student.full_name,
-            "student_id": student.student_id,
-            "email": student.email,
-            "photo_path": primary_photo.photo_path if primary_photo else None,
+            "user_id": row.user_id,
+            "username": row.username,
+            "full_name": row.full_name,
+            "student_id": row.student_id,
+            "email": row.email,
+            "photo_path": row.photo_path,
+            "thumbnail_url": photo_store.thumbnail_url(row.photo_path),
             "attendance_percentage": round(attendance_percentage, 2),
-            "total_classes": total_classes,
-            "present_count": present_count,
-            "absent_count": total_classes - present_count
+            "total_classes": total,
+            "present_count": present,
+            "absent_count": absent
         })
     
-    # Sort by student_id (roll number) if available, otherwise by name
-    result.sort(key=lambda x: (x["student_id"] or "", x["full_name"]))
-    
     return result
 
 
@@ -292,7 +361,7 @@ def get_class_students(
 def update_class(
     class_id: int,
     class_update: ClassUpdate,
-    current_user: User = Depends(get_current_teacher),
+    current_user: Principal = Depends(get_current_teacher),
     db: Session = Depends(get_db)
 ):
     """Update a class."""
@@ -334,6 +403,7 @@ def update_class(
     
     db.commit()
     db.refresh(class_obj)
+    list_cache.on_class_changed(current_user.user_id)
     
     return class_obj
 
@@ -341,7 +411,7 @@ def update_class(
 @router.delete("/{class_id}")
 def delete_class(
     class_id: int,
-    current_user: User = Depends(get_current_teacher),
+    current_user: Principal = Depends(get_current_teacher),
     db: Session = Depends(get_db)
 ):
     """Delete a class."""
@@ -361,6 +431,7 @@ def delete_class(
     
     db.delete(class_obj)
     db.commit()
+    list_cache.on_class_changed(current_user.user_id)
     
     return {"message": "Class deleted successfully"}
 
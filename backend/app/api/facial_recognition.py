@@ -7,8 +7,9 @@ from datetime import date, datetime
 import os
 import face_recognition
 from app.core.database import get_db
-from app.core.dependencies import get_current_teacher
-from app.models.user import User, StudentPhoto
+from app.core.dependencies import Principal, get_current_teacher
+from app.core.metrics import timed, FACES_PER_SCAN
+from app.models.user import User
 from app.models.attendance import Attendance, AttendanceStatus
 from app.models.class_model import Class, Enrollment
 from app.services.facial_recognition import facial_recognition_service
@@ -19,7 +20,7 @@ router = APIRouter(prefix="/facial-recognition", tags=["Facial Recognition"])
 @router.post("/scan-class/{class_id}")
 def scan_class_attendance(
     class_id: int,
-    current_user: User = Depends(get_current_teacher),
+    current_user: Principal = Depends(get_current_teacher),
     db: Session = Depends(get_db)
 ):
     """Scan CCTV feed and mark attendance for a class."""
@@ -51,20 +52,14 @@ def scan_class_attendance(
     
     # Load face encodings for enrolled students
     student_ids = [e.student_id for e in enrollments]
-    student_photos = db.query(StudentPhoto).filter(
-        StudentPhoto.user_id.in_(student_ids),
-        StudentPhoto.is_primary == True
-    ).all()
+    with timed("gallery_load"):
+        gallery = facial_recognition_service.load_gallery(db, student_ids)
     
-    if not student_photos:
+    if not gallery:
         return {"message": "No student photos found", "recognized": []}
     
     # Build face recognition dictionary
-    encodings_dict = {}
-    for photo in student_photos:
-        user = db.query(User).filter(User.user_id == photo.user_id).first()
-        if user and photo.face_encoding:
-            encodings_dict[user.username] = photo.face_encoding
+    encodings_dict = {username: encoding for username, encoding in gallery.items() if encoding}
     
     if not encodings_dict:
         return {"message": "No face encodings available", "recognized": []}
@@ -73,7 +68,8 @@ def scan_class_attendance(
     facial_recognition_service.load_known_faces_from_db(encodings_dict)
     
     # Get frame from CCTV
-    frame = facial_recognition_service.get_frame_from_cctv(class_obj.cctv_feed_url)
+    with timed("frame_capture"):
+        frame = facial_recognition_service.get_frame_from_cctv(class_obj.cctv_feed_url)
     
     if frame is None:
         raise HTTPException(
@@ -88,36 +84,43 @@ def scan_class_attendance(
     recognized_students = []
     
     # Mark attendance for recognized students
-    for name, face_location, confidence in recognized_faces:
-        if name != "Unknown" and confidence > 0.5:
-            # Find student by username
-            student = db.query(User).filter(User.username == name).first()
-            
-            if student and student.user_id in student_ids:
-                # Check if attendance already marked for today
-                existing = db.query(Attendance).filter(
-                    Attendance.student_id == student.user_id,
-                    Attendance.class_id == class_id,
-                    Attendance.attendance_date == today
-                ).first()
+    with timed("db_write"):
+        # Load enrolled students and today's records once, not per recognized face
+        students_by_username = {
+            student.username: student
+            for student in db.query(User).filter(User.user_id.in_(student_ids)).all()
+        }
+        marked_ids = {
+            row.student_id for row in db.query(Attendance.student_id).filter(
+                Attendance.class_id == class_id,
+                Attendance.attendance_date == today
+            )
+        }
+        
+        for name, face_location, confidence in recognized_faces:
+            if name != "Unknown" and confidence > 0.5:
+                student = students_by_username.get(name)
                 
-                if not existing:
-                    # Create new attendance record
-                    new_attendance = Attendance(
-                        student_id=student.user_id,
-                        class_id=class_id,
-                        attendance_date=today,
-                        status=AttendanceStatus.present,
-                        marked_by="system"
-                    )
-                    db.add(new_attendance)
-                    recognized_students.append({
-                        "name": student.full_name,
-                        "username": student.username,
-                        "confidence": round(confidence, 2)
-                    })
-    
-    db.commit()
+                if student:
+                    # Check if attendance already marked for today
+                    if student.user_id not in marked_ids:
+                        marked_ids.add(student.user_id)
+                        # Create new attendance record
+                        new_attendance = Attendance(
+                            student_id=student.user_id,
+                            class_id=class_id,
+                            attendance_date=today,
+                            status=AttendanceStatus.present,
+                            marked_by="system"
+                        )
+                        db.add(new_attendance)
+                        recognized_students.append({
+                            "name": student.full_name,
+                            "username": student.username,
+                            "confidence": round(confidence, 2)
+                        })
+        
+        db.commit()
     
     return {
         "message": f"Attendance scanned. {len(recognized_students)} students recognized.",
@@ -131,7 +134,7 @@ async def upload_class_photo_scan(
     class_id: int,
     photo: UploadFile = File(...),
     attendance_date: Optional[str] = Form(None),
-    current_user: User = Depends(get_current_teacher),
+    current_user: Principal = Depends(get_current_teacher),
     db: Session = Depends(get_db)
 ):
     """Upload a class photo and automatically mark attendance for recognized students.
@@ -162,25 +165,20 @@ async def upload_class_photo_scan(
     
     # Load face encodings for enrolled students
     student_ids = [e.student_id for e in enrollments]
-    student_photos = db.query(StudentPhoto).filter(
-        StudentPhoto.user_id.in_(student_ids),
-        StudentPhoto.is_primary == True
-    ).all()
+    with timed("gallery_load"):
+        gallery = facial_recognition_service.load_gallery(db, student_ids)
     
-    if not student_photos:
+    if not gallery:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No student photos found for enrolled students"
         )
     
     # Build face recognition dictionary with decoded numpy arrays
-    encodings_dict = {}
-    for student_photo in student_photos:
-        user = db.query(User).filter(User.user_id == student_photo.user_id).first()
-        if user and student_photo.face_encoding:
-            # Convert binary encoding to numpy array
-            encoding = np.frombuffer(student_photo.face_encoding, dtype=np.float64)
-            encodings_dict[user.username] = encoding
+    encodings_dict = {
+        username: np.frombuffer(encoding, dtype=np.float64)
+        for username, encoding in gallery.items() if encoding
+    }
     
     if not encodings_dict:
         raise HTTPException(
@@ -200,16 +198,20 @@ async def upload_class_photo_scan(
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     temp_file_path = os.path.join(upload_dir, f"class_{class_id}_{timestamp}{file_extension}")
     
-    with open(temp_file_path, "wb") as buffer:
-        content = await photo.read()
-        buffer.write(content)
+    with timed("image_io"):
+        with open(temp_file_path, "wb") as buffer:
+            content = await photo.read()
+            buffer.write(content)
     
     try:
         # Load the image
-        image = face_recognition.load_image_file(temp_file_path)
+        with timed("image_io"):
+            image = face_recognition.load_image_file(temp_file_path)
         
         # Find face locations
-        face_locations = face_recognition.face_locations(image, model="hog")
+        with timed("face_detect"):
+            face_locations = face_recognition.face_locations(image, model="hog")
+        FACES_PER_SCAN.observe(len(face_locations))
         
         if not face_locations:
             raise HTTPException(
@@ -218,33 +220,35 @@ async def upload_class_photo_scan(
             )
         
         # Encode faces in the image
-        face_encodings = face_recognition.face_encodings(image, face_locations)
+        with timed("face_encode"):
+            face_encodings = face_recognition.face_encodings(image, face_locations)
         
         # Recognize faces
         recognized_faces = []
-        for (face_encoding, face_location) in zip(face_encodings, face_locations):
-            # Compare with known faces
-            matches = face_recognition.compare_faces(
-                list(encodings_dict.values()),
-                face_encoding,
-                tolerance=0.6
-            )
-            
-            name = "Unknown"
-            confidence = 0.0
-            
-            # Find the best match
-            face_distances = face_recognition.face_distance(
-                list(encodings_dict.values()),
-                face_encoding
-            )
-            best_match_index = np.argmin(face_distances)
-            
-            if matches[best_match_index]:
-                name = list(encodings_dict.keys())[best_match_index]
-                confidence = 1 - face_distances[best_match_index]
-            
-            recognized_faces.append((name, face_location, confidence))
+        with timed("match"):
+            for (face_encoding, face_location) in zip(face_encodings, face_locations):
+                # Compare with known faces
+                matches = face_recognition.compare_faces(
+                    list(encodings_dict.values()),
+                    face_encoding,
+                    tolerance=0.6
+                )
+                
+                name = "Unknown"
+                confidence = 0.0
+                
+                # Find the best match
+                face_distances = face_recognition.face_distance(
+                    list(encodings_dict.values()),
+                    face_encoding
+                )
+                best_match_index = np.argmin(face_distances)
+                
+                if matches[best_match_index]:
+                    name = list(encodings_dict.keys())[best_match_index]
+                    confidence = 1 - face_distances[best_match_index]
+                
+                recognized_faces.append((name, face_location, confidence))
         
         # Process recognized students and mark attendance
         # Parse attendance_date if provided, otherwise use today
@@ -268,78 +272,78 @@ async def upload_class_photo_scan(
         recognized_students = []
         absent_students = []
         
-        # Get all enrolled students
-        all_enrolled_students = db.query(User).filter(User.user_id.in_(student_ids)).all()
-        
-        recognized_usernames = []
-        
-        for name, face_location, confidence in recognized_faces:
-            if name != "Unknown" and confidence > 0.5:
-                recognized_usernames.append(name)
-                # Find student by username
-                student = db.query(User).filter(User.username == name).first()
-                
-                if student and student.user_id in student_ids:
+        with timed("db_write"):
+            # Get all enrolled students and their records for the target date in one query each
+            all_enrolled_students = db.query(User).filter(User.user_id.in_(student_ids)).all()
+            students_by_username = {student.username: student for student in all_enrolled_students}
+            existing_by_student = {
+                record.student_id: record for record in db.query(Attendance).filter(
+                    Attendance.class_id == class_id,
+                    Attendance.attendance_date == target_date
+                )
+            }
+            
+            recognized_usernames = []
+            
+            for name, face_location, confidence in recognized_faces:
+                if name != "Unknown" and confidence > 0.5:
+                    recognized_usernames.append(name)
+                    student = students_by_username.get(name)
+                    
+                    if student:
+                        # Check if attendance already marked for the target date
+                        existing = existing_by_student.get(student.user_id)
+                        
+                        if not existing:
+                            # Create new attendance record
+                            new_attendance = Attendance(
+                                student_id=student.user_id,
+                                class_id=class_id,
+                                attendance_date=target_date,
+                                status=AttendanceStatus.present,
+                                marked_by="system"
+                            )
+                            db.add(new_attendance)
+                            existing_by_student[student.user_id] = new_attendance
+                        else:
+                            # Update existing record if it exists
+                            existing.status = AttendanceStatus.present
+                            existing.marked_by = "system"
+                        
+                        recognized_students.append({
+                            "name": student.full_name,
+                            "username": student.username,
+                            "student_id": student.student_id,
+                            "confidence": round(confidence, 2)
+                        })
+            
+            # Mark absent for students not recognized
+            for student in all_enrolled_students:
+                if student.username not in recognized_usernames:
                     # Check if attendance already marked for the target date
-                    existing = db.query(Attendance).filter(
-                        Attendance.student_id == student.user_id,
-                        Attendance.class_id == class_id,
-                        Attendance.attendance_date == target_date
-                    ).first()
+                    existing = existing_by_student.get(student.user_id)
                     
                     if not existing:
-                        # Create new attendance record
+                        # Create absent attendance record
                         new_attendance = Attendance(
                             student_id=student.user_id,
                             class_id=class_id,
                             attendance_date=target_date,
-                            status=AttendanceStatus.present,
+                            status=AttendanceStatus.absent,
                             marked_by="system"
                         )
                         db.add(new_attendance)
                     else:
                         # Update existing record if it exists
-                        existing.status = AttendanceStatus.present
+                        existing.status = AttendanceStatus.absent
                         existing.marked_by = "system"
-                    
-                    recognized_students.append({
-                        "name": student.full_name,
-                        "username": student.username,
-                        "student_id": student.student_id,
-                        "confidence": round(confidence, 2)
-                    })
-        
-        # Mark absent for students not recognized
-        for student in all_enrolled_students:
-            if student.username not in recognized_usernames:
-                # Check if attendance already marked for the target date
-                existing = db.query(Attendance).filter(
-                    Attendance.student_id == student.user_id,
-                    Attendance.class_id == class_id,
-                    Attendance.attendance_date == target_date
-                ).first()
-                
-                if not existing:
-                    # Create absent attendance record
-                    new_attendance = Attendance(
-                        student_id=student.user_id,
-                        class_id=class_id,
-                        attendance_date=target_date,
-                        status=AttendanceStatus.absent,
-                        marked_by="system"
-                    )
-                    db.add(new_attendance)
-                else:
-                    # Update existing record if it exists
-                    existing.status = AttendanceStatus.absent
-                    existing.marked_by = "system"
-                    absent_students.append({
-                        "name": student.full_name,
-                        "username": student.username,
-                        "student_id": student.student_id
-                    })
-        
-        db.commit()
+                        absent_students.append({
+                            "name": student.full_name,
+                            "username": student.username,
+                            "student_id": student.student_id
+                        })
+            
+            db.commit()
         
         # Clean up temp file
         try:
@@ -369,17 +373,12 @@ async def upload_class_photo_scan(
 
 @router.post("/load-students")
 def load_all_student_faces(
-    current_user: User = Depends(get_current_teacher),
+    current_user: Principal = Depends(get_current_teacher),
     db: Session = Depends(get_db)
 ):
     """Load all student face encodings into memory."""
-    student_photos = db.query(StudentPhoto).filter(StudentPhoto.is_primary == True).all()
-    
-    encodings_dict = {}
-    for photo in student_photos:
-        user = db.query(User).filter(User.user_id == photo.user_id).first()
-        if user and photo.face_encoding:
-            encodings_dict[user.username] = photo.face_encoding
+    gallery = facial_recognition_service.load_gallery(db)
+    encodings_dict = {username: encoding for username, encoding in gallery.items() if encoding}
     
     facial_recognition_service.load_known_faces_from_db(encodings_dict)
     
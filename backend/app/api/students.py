@@ -1,13 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
 from sqlalchemy.orm import Session, joinedload
 from typing import List
-import os
 import numpy as np
+from app.core.cache import response_cache
 from app.core.database import get_db
-from app.core.dependencies import get_current_user, get_current_teacher
+from app.core.dependencies import Principal, get_current_principal, get_current_teacher, invalidate_principal
 from app.schemas.user import UserCreate, UserResponse, UserUpdate
 from app.models.user import User, StudentPhoto
 from app.services.facial_recognition import facial_recognition_service
+from app.services.list_cache import list_cache, ALL_STUDENTS_KEY
+from app.services.photo_store import photo_store
 
 router = APIRouter(prefix="/students", tags=["Students"])
 
@@ -19,7 +21,7 @@ def create_student(
     full_name: str = Form(...),
     password: str = Form(...),
     student_id: str = Form(...),
-    current_user: User = Depends(get_current_teacher),
+    current_user: Principal = Depends(get_current_teacher),
     db: Session = Depends(get_db)
 ):
     """Register a new student."""
@@ -51,6 +53,7 @@ def create_student(
     db.add(new_student)
     db.commit()
     db.refresh(new_student)
+    list_cache.on_student_changed()
     
     return new_student
 
@@ -59,7 +62,7 @@ def create_student(
 def upload_student_photo(
     student_id: int,
     photo: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Upload a photo for facial recognition."""
@@ -78,23 +81,16 @@ def upload_student_photo(
             detail="Student not found"
         )
     
-    # Create upload directory if it doesn't exist
-    upload_dir = "uploads/photos"
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Save photo
-    file_extension = os.path.splitext(photo.filename)[1]
-    file_path = os.path.join(upload_dir, f"student_{student_id}_{len(student.photos)}{file_extension}")
-    
-    with open(file_path, "wb") as buffer:
-        content = photo.file.read()
-        buffer.write(content)
+    # Store by content hash, so names never collide and re-uploads share one file
+    content = photo.file.read()
+    file_path, created = photo_store.save(content, photo.filename)
     
     # Encode face
     face_encoding = facial_recognition_service.encode_face(file_path)
     
     if face_encoding is None:
-        os.remove(file_path)  # Remove file if encoding failed
+        if created:
+            photo_store.discard(file_path)  # Remove file if encoding failed
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No face detected in the image. Please upload a clear photo with a visible face."
@@ -128,29 +124,35 @@ def upload_student_photo(
     
     db.commit()
     db.refresh(photo_record)
+    list_cache.on_student_changed(student_id)
+    photo_store.enqueue_thumbnails(file_path)
     
     return {
         "message": "Photo uploaded successfully",
         "photo_id": photo_record.photo_id,
-        "file_path": file_path
+        "file_path": file_path,
+        "thumbnail_urls": photo_store.thumbnail_urls(file_path)
     }
 
 
 @router.get("/", response_model=List[UserResponse])
 def get_all_students(
-    current_user: User = Depends(get_current_teacher),
+    current_user: Principal = Depends(get_current_teacher),
     db: Session = Depends(get_db)
 ):
     """Get all students."""
-    students = db.query(User).filter(User.role == "student").options(joinedload(User.photos)).all()
-    return students
+    def load_students():
+        students = db.query(User).filter(User.role == "student").options(joinedload(User.photos)).all()
+        return [UserResponse.model_validate(s).model_dump(mode="json") for s in students]
+    
+    return response_cache.get_or_load(ALL_STUDENTS_KEY, load_students)
 
 
 @router.put("/{student_id}/profile", response_model=UserResponse)
 def update_student_profile(
     student_id: int,
     user_update: UserUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Update student profile (branch and year of joining). Teachers can update any student, students can only update themselves."""
@@ -191,6 +193,8 @@ def update_student_profile(
     
     db.commit()
     db.refresh(student)
+    list_cache.on_student_changed(student_id)
+    invalidate_principal(student.username)
     
     return student
 
@@ -198,7 +202,7 @@ def update_student_profile(
 @router.delete("/{student_id}")
 def delete_student(
     student_id: int,
-    current_user: User = Depends(get_current_teacher),
+    current_user: Principal = Depends(get_current_teacher),
     db: Session = Depends(get_db)
 ):
     """Delete a student (Teachers only)."""
@@ -210,8 +214,11 @@ def delete_student(
             detail="Student not found"
         )
     
+    username = student.username
     db.delete(student)
     db.commit()
+    list_cache.on_student_changed(student_id)
+    invalidate_principal(username)
     
     return {"message": "Student deleted successfully"}
 
@@ -0,0 +1,120 @@
+"""
+Small cache layer with pluggable backends.
+The default backend is an in-process LRU with per-entry TTL. It is per worker,
+so with several workers a write is only seen immediately by the worker that
+invalidated; the TTL bounds staleness elsewhere until a shared backend
+(implementing CacheBackend) is configured with configure_cache().
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+
+
+class CacheBackend:
+    """Interface for cache backends. Values are never None (None means a miss)."""
+
+    def get(self, key: str) -> Any:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    def delete(self, *keys: str):
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix: str):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class InMemoryCache(CacheBackend):
+    """Thread-safe LRU cache with an optional TTL per entry."""
+
+    def __init__(self, max_entries: int, default_ttl: Optional[float] = None):
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._max_entries = max_entries
+        self._default_ttl = default_ttl
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value: Any, ttl: Optional[float] = None):
+        ttl = self._default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def delete_prefix(self, prefix: str):
+        with self._lock:
+            for key in [k for k in self._entries if isinstance(k, str) and k.startswith(prefix)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class ResponseCache:
+    """Caches JSON-serializable endpoint results by key, recording hit/miss metrics."""
+
+    def __init__(self, backend: CacheBackend, name: str = "response"):
+        self.backend = backend
+        self.name = name
+
+    def get_or_load(self, key: str, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Return the cached value for key, or call loader and cache its result."""
+        value = self.backend.get(key)
+        record_cache_lookup(self.name, value is not None)
+        if value is None:
+            value = loader()
+            self.backend.set(key, value, ttl)
+        return value
+
+    async def get_or_load_async(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[float] = None) -> Any:
+        """get_or_load for async loaders."""
+        value = self.backend.get(key)
+        record_cache_lookup(self.name, value is not None)
+        if value is None:
+            value = await loader()
+            self.backend.set(key, value, ttl)
+        return value
+
+    def invalidate(self, *keys: str):
+        self.backend.delete(*keys)
+
+    def invalidate_prefix(self, prefix: str):
+        self.backend.delete_prefix(prefix)
+
+
+# Global instance
+response_cache = ResponseCache(
+    InMemoryCache(settings.RESPONSE_CACHE_MAX_ENTRIES, settings.RESPONSE_CACHE_TTL_SECONDS)
+)
+
+
+def configure_cache(backend: CacheBackend):
+    """Swap the response cache backend (e.g. for a shared one in multi-worker deployments)."""
+    response_cache.backend = backend
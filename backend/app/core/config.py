@@ -12,11 +12,19 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: Optional[str] = None  # Defaults to DATABASE_URL with the asyncio driver (aiomysql/aiosqlite)
+    DATABASE_REPLICA_URL: Optional[str] = None  # Read replica for query-only endpoints (unset: everything uses the primary)
+    READ_YOUR_WRITES_SECONDS: int = 5  # After a write, the same client reads from the primary for this long
+    SLOW_QUERY_SECONDS: float = 0.5  # Statements slower than this are logged with their route
+    N_PLUS_ONE_THRESHOLD: int = 5  # Repeats of one statement shape in a request that count as an N+1
     
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60  # How long an authenticated user's id/role is reused without a DB lookup
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
     
     # CORS - can be comma-separated string or list
     ALLOWED_ORIGINS: str | List[str] = "http://localhost:3000"
@@ -31,11 +39,51 @@ class Settings(BaseSettings):
     # File Upload
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
     UPLOAD_DIR: str = "uploads"
+    PHOTO_THUMBNAIL_SIZES: List[int] = [64, 256]  # Square bounding boxes (px) generated for each student photo
+    PHOTO_CACHE_MAX_AGE_SECONDS: int = 365 * 24 * 3600  # Content-addressed photos never change
+    
+    # Upload storage garbage collection
+    STORAGE_GC_MODE: str = "quarantine"  # quarantine (move orphans aside) or delete
+    STORAGE_GC_GRACE_HOURS: int = 24  # Files younger than this are never collected
+    STORAGE_GC_MAX_FILES_PER_RUN: int = 20000  # Files examined per scheduled run; the next run resumes after the last
+    STORAGE_GC_BATCH_SIZE: int = 500  # Photo paths looked up per query
+    STORAGE_GC_INTERVAL_MINUTES: int = 60
+    STORAGE_QUARANTINE_DIR: str = "quarantine"  # Outside UPLOAD_DIR, so quarantined files are not served
+    STORAGE_QUARANTINE_DAYS: int = 14  # Quarantined files are deleted after this many days
+    
+    # ID-card OCR
+    OCR_WARMUP_ON_STARTUP: bool = True  # Load the EasyOCR model(s) in the background at startup
+    OCR_WORKERS: int = 2  # OCR worker processes, each with its own reader (0: one thread in the API process)
+    OCR_MAX_PENDING: int = 8  # Images running or queued before registrations get 503
+    OCR_RETRY_AFTER_SECONDS: int = 10
     
     # Facial Recognition
     FACES_DIR: str = "faces"
     RECOGNITION_TOLERANCE: float = 0.6
     
+    # Attendance listing
+    ATTENDANCE_DEFAULT_WINDOW_DAYS: int = 90  # Window applied when no date range is given
+    ATTENDANCE_PAGE_SIZE: int = 100
+    ATTENDANCE_MAX_PAGE_SIZE: int = 500
+    CALENDAR_MAX_MONTHS: int = 12  # Maximum months per calendar request
+    ATTENDANCE_BULK_MAX_ITEMS: int = 1000  # Maximum items per bulk edit request
+    
+    # Retention
+    ATTENDANCE_PARTITION_MONTHS_AHEAD: int = 3  # Future monthly partitions kept ready (MySQL)
+    CLEANUP_DELETE_CHUNK_SIZE: int = 5000  # Rows per transaction when deleting row by row
+    ARCHIVE_ENABLED: bool = True  # Archive expiring attendance to ARCHIVE_DIR before deleting it
+    ARCHIVE_DIR: str = "archives"
+    ARCHIVE_FORMAT: str = "csv.gz"  # csv.gz or parquet
+    
+    # Response cache for list endpoints
+    RESPONSE_CACHE_TTL_SECONDS: int = 300
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1024
+    
+    # Attendance analytics
+    ANALYTICS_MAX_DAYS: int = 366  # Maximum window per analytics request
+    ANALYTICS_CACHE_SIZE: int = 64  # Loaded windows kept in memory per worker
+    ATTENDANCE_THRESHOLD: float = 75.0  # Minimum required attendance percentage
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -1,19 +1,104 @@
+import time
+from typing import Optional
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.core.cache import InMemoryCache
 from app.core.config import settings
+from app.core.metrics import DB_POOL_WAIT, DB_READ_SESSIONS
+from app.core.query_stats import instrument_engine
+from app.core.security import decode_access_token
 
-# Create database engine
-engine = create_engine(
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - start)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Async pool counterpart of InstrumentedQueuePool."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - start)
+
+
+ASYNC_DRIVERS = {"mysql": "aiomysql", "sqlite": "aiosqlite"}
+
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL with its driver swapped for the asyncio one (e.g. mysql+pymysql -> mysql+aiomysql)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend: {backend}")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def _create_engines(url: str, async_url: str):
+    """Sync and async engines for one database, with the same pool settings."""
+    sync_engine = create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_pre_ping=True,
+        pool_recycle=300,
+        pool_size=10,
+        max_overflow=20
+    )
+    # Async engine for read-heavy endpoints: requests wait on the database without
+    # holding a threadpool thread. Same database, separate pool.
+    asyncio_engine = create_async_engine(
+        async_url,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_pre_ping=True,
+        pool_recycle=300,
+        pool_size=10,
+        max_overflow=20
+    )
+    # Per-request statement counts, slow-query log and N+1 detection
+    instrument_engine(sync_engine)
+    instrument_engine(asyncio_engine.sync_engine)
+    return sync_engine, asyncio_engine
+
+
+# Create database engines (primary)
+engine, async_engine = _create_engines(
     settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    pool_size=10,
-    max_overflow=20
+    settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
 )
 
-# Create session factory
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Optional read replica for query-only endpoints
+replica_engine = async_replica_engine = None
+ReplicaSessionLocal, AsyncReplicaSessionLocal = SessionLocal, AsyncSessionLocal
+if settings.DATABASE_REPLICA_URL:
+    replica_engine, async_replica_engine = _create_engines(
+        settings.DATABASE_REPLICA_URL, async_database_url(settings.DATABASE_REPLICA_URL)
+    )
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    AsyncReplicaSessionLocal = async_sessionmaker(
+        async_replica_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+# Clients that wrote recently, so their reads see their own writes despite replica lag.
+# Per worker, like the response cache: with several workers, route each client to one.
+_recent_writers = InMemoryCache(max_entries=100000, default_ttl=settings.READ_YOUR_WRITES_SECONDS)
 
 # Base class for models
 Base = declarative_base()
@@ -27,3 +112,51 @@ def get_db():
     finally:
         db.close()
 
+
+# Dependency to get an async DB session (for async def endpoints)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _client_key(request: Request) -> Optional[str]:
+    """The access token's subject, so the pin survives a token refresh (the header changes, the user does not)."""
+    authorization = request.headers.get("authorization")
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    payload = decode_access_token(authorization[7:].strip())
+    return payload.get("sub") if payload else None
+
+
+def pin_to_primary(request: Request):
+    """Send this client's reads to the primary for READ_YOUR_WRITES_SECONDS (call after a write)."""
+    key = _client_key(request)
+    if key is not None and settings.DATABASE_REPLICA_URL:
+        _recent_writers.set(key, True)
+
+
+def _use_replica(request: Request) -> bool:
+    if not settings.DATABASE_REPLICA_URL:
+        DB_READ_SESSIONS.inc(target="primary")
+        return False
+    key = _client_key(request)
+    pinned = key is not None and _recent_writers.get(key) is not None
+    DB_READ_SESSIONS.inc(target="primary" if pinned else "replica")
+    return not pinned
+
+
+# Dependency to get a read-only DB session (replica unless the client just wrote)
+def get_read_db(request: Request):
+    db = ReplicaSessionLocal() if _use_replica(request) else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Async counterpart of get_read_db
+async def get_async_read_db(request: Request):
+    factory = AsyncReplicaSessionLocal if _use_replica(request) else AsyncSessionLocal
+    async with factory() as db:
+        yield db
+
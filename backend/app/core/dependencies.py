@@ -1,18 +1,54 @@
+from typing import NamedTuple, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session, joinedload
-from app.core.database import get_db
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.cache import InMemoryCache, ResponseCache
+from app.core.config import settings
+from app.core.database import get_db, AsyncSessionLocal
 from app.core.security import decode_access_token
 from app.models.user import User
 
 security = HTTPBearer()
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get the current authenticated user."""
+class Principal(NamedTuple):
+    """The authenticated user's identity, without loading the full user row."""
+    user_id: int
+    username: str
+    role: str
+    is_active: bool
+
+
+# Principals by token subject (username), shared by all requests in this worker
+principal_cache = ResponseCache(
+    InMemoryCache(settings.PRINCIPAL_CACHE_MAX_ENTRIES, settings.PRINCIPAL_CACHE_TTL_SECONDS),
+    name="principal"
+)
+
+
+def invalidate_principal(*usernames: str):
+    """Drop cached principals after a user is updated, deactivated or deleted."""
+    principal_cache.invalidate(*usernames)
+
+
+async def _load_principal(username: str) -> Optional[Principal]:
+    # Own short-lived session: the connection goes back to the pool before the endpoint runs,
+    # instead of being held (alongside the endpoint's own session) until the response is sent
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(
+            select(User.user_id, User.username, User.role, User.is_active).where(User.username == username)
+        )).first()
+    return Principal(*row) if row else None
+
+
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> Principal:
+    """
+    Get the current authenticated user's id and role (cached per token subject).
+    Async, so resolving it never occupies a threadpool thread.
+    """
     token = credentials.credentials
     payload = decode_access_token(token)
     
@@ -31,8 +67,31 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = db.query(User).filter(User.username == username).options(joinedload(User.photos)).first()
+    principal = await principal_cache.get_or_load_async(username, lambda: _load_principal(username))
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is inactive"
+        )
+    
+    return principal
+
+
+def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get the current authenticated user as a full User (for endpoints that need more than id and role)."""
+    user = db.query(User).filter(User.user_id == principal.user_id).first()
     if user is None:
+        invalidate_principal(principal.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
@@ -42,14 +101,13 @@ def get_current_user(
     return user
 
 
-def get_current_teacher(
-    current_user: User = Depends(get_current_user)
-) -> User:
-    """Get current user and verify they are a teacher."""
+async def get_current_teacher(
+    current_user: Principal = Depends(get_current_principal)
+) -> Principal:
+    """Get current principal and verify they are a teacher."""
     if current_user.role != "teacher":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions. Teacher access required."
         )
     return current_user
-
@@ -0,0 +1,22 @@
+from fastapi import HTTPException, Request, Response, status
+
+
+def apply_etag(request: Request, response: Response, etag: str):
+    """
+    Set the ETag on the response, or raise 304 Not Modified if the client
+    already holds this version. Call before running the heavy query.
+    """
+    headers = {
+        "ETag": etag,
+        # Responses depend on the caller; browsers must revalidate every time
+        "Cache-Control": "private, no-cache",
+        "Vary": "Authorization",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in candidates or "*" in candidates:
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
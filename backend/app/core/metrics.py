@@ -0,0 +1,278 @@
+"""
+Lightweight in-process metrics.
+Collects counters and histograms and renders them in Prometheus text format,
+and records per-request stage timings for the Server-Timing header.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Default latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(labelnames: Tuple[str, ...], labelvalues: Tuple[str, ...], extra: str = "") -> str:
+    """Format a label set as {name="value",...}."""
+    parts = []
+    for name, value in zip(labelnames, labelvalues):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{escaped}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class for labelled metrics."""
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    """Histogram with fixed cumulative buckets."""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = [0] * (len(self.buckets) + 2)
+                self._values[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._values.items()]
+        lines = []
+        for key, series in items:
+            for bound, count in zip(self.buckets, series):
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {_format_value(count)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(series[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Registry of all metrics exposed at /metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.histogram(
+    "autoattend_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"]
+)
+STAGE_LATENCY = registry.histogram(
+    "autoattend_stage_duration_seconds",
+    "Duration of recognition pipeline stages",
+    ["stage"]
+)
+DB_POOL_WAIT = registry.histogram(
+    "autoattend_db_pool_checkout_wait_seconds",
+    "Time spent waiting to check a connection out of the database pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0)
+)
+FACES_PER_SCAN = registry.histogram(
+    "autoattend_faces_per_scan",
+    "Number of faces detected per recognition scan",
+    buckets=(0, 1, 2, 5, 10, 20, 40, 80, 160)
+)
+CACHE_REQUESTS = registry.counter(
+    "autoattend_cache_requests_total",
+    "Cache lookups by cache name and result (hit or miss)",
+    ["cache", "result"]
+)
+
+DB_READ_SESSIONS = registry.counter(
+    "autoattend_db_read_sessions_total",
+    "Read-only sessions by target database (replica, or primary when pinned or no replica is configured)",
+    ["target"]
+)
+
+DB_QUERIES_PER_REQUEST = registry.histogram(
+    "autoattend_db_queries_per_request",
+    "SQL statements executed per request by route",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+)
+DB_QUERY_TIME_PER_REQUEST = registry.histogram(
+    "autoattend_db_query_seconds_per_request",
+    "Time spent executing SQL per request by route",
+    ["route"]
+)
+DB_SLOW_QUERIES = registry.counter(
+    "autoattend_db_slow_queries_total",
+    "SQL statements slower than SLOW_QUERY_SECONDS by route (background for jobs)",
+    ["route"]
+)
+DB_REPEATED_QUERIES = registry.counter(
+    "autoattend_db_repeated_queries_total",
+    "Requests that repeated one statement shape at least N_PLUS_ONE_THRESHOLD times (likely N+1), by route",
+    ["route"]
+)
+
+OCR_JOBS = registry.counter(
+    "autoattend_ocr_jobs_total",
+    "ID-card OCR jobs by result (ok, error, unavailable when the reader failed to load, rejected when the pool was saturated)",
+    ["result"]
+)
+
+STORAGE_GC_FILES = registry.counter(
+    "autoattend_storage_gc_files_total",
+    "Upload files handled by the storage garbage collector, by kind and action (scanned, removed, quarantined)",
+    ["kind", "action"]
+)
+STORAGE_GC_BYTES = registry.counter(
+    "autoattend_storage_gc_reclaimed_bytes_total",
+    "Bytes reclaimed from the upload tree by kind (quarantined files count when moved)",
+    ["kind"]
+)
+
+# Stage timings collected for the current request (None outside a request)
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+
+def start_request_timings() -> List[Tuple[str, float]]:
+    """Start collecting stage timings for the current request."""
+    timings: List[Tuple[str, float]] = []
+    _request_timings.set(timings)
+    return timings
+
+
+@contextmanager
+def timed(stage: str):
+    """Time a pipeline stage, recording it in the stage histogram and the request's Server-Timing."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_LATENCY.observe(duration, stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, duration))
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    """Record a cache hit or miss."""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def format_server_timing(timings: List[Tuple[str, float]]) -> str:
+    """Format stage timings as a Server-Timing header value (durations in ms)."""
+    totals: Dict[str, float] = {}
+    for stage, duration in timings:
+        totals[stage] = totals.get(stage, 0.0) + duration
+    return ", ".join(f"{stage};dur={duration * 1000:.1f}" for stage, duration in totals.items())
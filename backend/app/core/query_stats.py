@@ -0,0 +1,97 @@
+"""
+Per-request SQL instrumentation.
+Engine event hooks count the statements each request executes and the time
+spent in them, log slow statements with their route, and flag statement shapes
+repeated within one request (the signature of an N+1 query in a loop).
+"""
+import logging
+import re
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+from app.core.metrics import DB_SLOW_QUERIES
+
+logger = logging.getLogger(__name__)
+
+# Expanded IN lists and multi-row VALUES vary in length; collapse them so they share a shape
+_PARAMETER_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a parameterized statement so repeats with different values or list lengths match."""
+    return _WHITESPACE.sub(" ", _PARAMETER_LIST.sub("(?)", statement)).strip()
+
+
+class QueryStats:
+    """Statements executed while handling one request."""
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Dict[str, int] = {}
+
+    @property
+    def route(self) -> str:
+        """Route template of the request (set once routing has matched)."""
+        route = (self.scope or {}).get("route")
+        return getattr(route, "path", "unmatched")
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        shape = statement_shape(statement)
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+
+    def repeated(self, threshold: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Statement shapes executed at least threshold times (likely N+1 queries)."""
+        threshold = threshold or settings.N_PLUS_ONE_THRESHOLD
+        return [(shape, count) for shape, count in self.shapes.items() if count >= threshold]
+
+
+# Statements for the current request (None outside a request)
+_request_queries: ContextVar[Optional[QueryStats]] = ContextVar("request_queries", default=None)
+
+
+def start_query_stats(scope: Optional[dict] = None) -> QueryStats:
+    """Start counting statements for the current request."""
+    stats = QueryStats(scope)
+    _request_queries.set(stats)
+    return stats
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _request_queries.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start"].pop()
+    stats = _request_queries.get()
+    route = stats.route if stats is not None else "background"
+    if stats is not None:
+        stats.record(statement, duration)
+    if duration >= settings.SLOW_QUERY_SECONDS:
+        DB_SLOW_QUERIES.inc(route=route)
+        logger.warning(f"Slow query ({duration * 1000:.0f}ms) on {route}: {statement_shape(statement)[:500]}")
+
+
+def _handle_error(exception_context):
+    # The statement failed, so after_cursor_execute will not pop its start time
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine: Engine):
+    """Count and time every statement executed on engine (pass async_engine.sync_engine for async engines)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
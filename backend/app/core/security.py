@@ -7,6 +7,8 @@ from app.core.config import settings
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+REFRESH_TOKEN_TYPE = "refresh"
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
@@ -32,12 +34,31 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 def decode_access_token(token: str) -> Optional[dict]:
-    """Decode a JWT access token."""
+    """Decode a JWT access token (refresh tokens are rejected)."""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        if payload.get("type") == REFRESH_TOKEN_TYPE:
+            return None
         return payload
     except jwt.ExpiredSignatureError:
         return None
     except jwt.JWTError:
         return None
 
+
+def create_refresh_token(subject: str, jti: str, family_id: str, expire: datetime) -> str:
+    """Create a JWT refresh token."""
+    to_encode = {"sub": subject, "jti": jti, "fam": family_id, "type": REFRESH_TOKEN_TYPE, "exp": expire}
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def decode_refresh_token(token: str) -> Optional[dict]:
+    """Decode a JWT refresh token (access tokens are rejected)."""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        if payload.get("type") != REFRESH_TOKEN_TYPE or not payload.get("jti") or not payload.get("fam"):
+            return None
+        return payload
+    except jwt.JWTError:
+        return None
+
@@ -0,0 +1,56 @@
+import os
+from typing import Optional
+from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from app.core.config import settings
+from app.services.photo_store import photo_store, CONTENT_PATH_PATTERN
+
+
+def _content_match(path: str):
+    return CONTENT_PATH_PATTERN.match(path.replace(os.sep, "/"))
+
+
+class UploadFiles(StaticFiles):
+    """
+    Static files for the uploads directory.
+    Content-addressed photos and thumbnails get their digest as ETag and an
+    immutable Cache-Control; a thumbnail the background worker has not written
+    yet is generated on first request. Other files are served as before.
+    """
+
+    async def get_response(self, path: str, scope) -> Response:
+        try:
+            return await super().get_response(path, scope)
+        except HTTPException as e:
+            match = _content_match(path)
+            if e.status_code != 404 or not match or match.group("size") is None:
+                raise
+            generated = await run_in_threadpool(
+                photo_store.ensure_thumbnail, match.group("digest"), int(match.group("size"))
+            )
+            if generated is None:
+                raise
+            return await super().get_response(path, scope)
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, method=scope["method"])
+        etag = self._content_etag(full_path)
+        if etag is not None:
+            response.headers["etag"] = etag
+            response.headers["cache-control"] = f"public, max-age={settings.PHOTO_CACHE_MAX_AGE_SECONDS}, immutable"
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    def _content_etag(self, full_path) -> Optional[str]:
+        relative = os.path.relpath(full_path, os.path.realpath(self.directory))
+        match = _content_match(relative)
+        if not match:
+            return None
+        size = match.group("size")
+        return f'"{match.group("digest")}-{size}"' if size else f'"{match.group("digest")}"'
+
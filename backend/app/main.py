@@ -1,14 +1,26 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from app.core.config import settings
-from app.core.database import SessionLocal
-from app.api import auth, attendance, students, classes, facial_recognition
+from app.core.database import SessionLocal, async_engine, async_replica_engine, pin_to_primary
+from app.core.metrics import (
+    registry, REQUEST_LATENCY, DB_QUERIES_PER_REQUEST, DB_QUERY_TIME_PER_REQUEST, DB_REPEATED_QUERIES,
+    start_request_timings, format_server_timing
+)
+from app.core.query_stats import start_query_stats
+from app.core.uploads import UploadFiles
+from app.api import auth, attendance, analytics, students, classes, facial_recognition
 from app.services.cleanup import cleanup_service
+from app.services.partitions import partition_manager
+from app.services.photo_store import UPLOADS_URL_PREFIX
+from app.services.storage_gc import storage_gc
+from app.services.tokens import refresh_token_service
 import os
+import time
 import logging
 
 # Configure logging
@@ -32,6 +44,44 @@ def run_cleanup_job():
         db.close()
 
 
+def run_partition_maintenance_job():
+    """Background job to pre-create upcoming monthly attendance partitions."""
+    db = SessionLocal()
+    try:
+        created = partition_manager.ensure_future_partitions(db)
+        if created:
+            logger.info(f"Created attendance partitions: {created}")
+    except Exception as e:
+        logger.error(f"Error in partition maintenance job: {str(e)}")
+    finally:
+        db.close()
+
+
+def run_refresh_token_prune_job():
+    """Background job to delete expired refresh tokens."""
+    db = SessionLocal()
+    try:
+        deleted = refresh_token_service.prune_expired(db)
+        logger.info(f"Pruned {deleted} expired refresh tokens")
+    except Exception as e:
+        logger.error(f"Error in refresh token prune job: {str(e)}")
+    finally:
+        db.close()
+
+
+def run_storage_gc_job():
+    """Background job to remove or quarantine orphaned upload files, a slice of the tree per run."""
+    db = SessionLocal()
+    try:
+        result = storage_gc.collect(db)
+        if result["orphaned_files"]:
+            logger.info(f"Storage GC completed: {result}")
+    except Exception as e:
+        logger.error(f"Error in storage GC job: {str(e)}")
+    finally:
+        db.close()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifespan events (startup/shutdown)."""
@@ -43,12 +93,42 @@ async def lifespan(app: FastAPI):
         name='Daily Attendance Cleanup (6 months retention)',
         replace_existing=True
     )
+    scheduler.add_job(
+        run_partition_maintenance_job,
+        trigger=CronTrigger(hour=1, minute=30),  # Run daily at 1:30 AM, before cleanup
+        id='daily_partition_maintenance',
+        name='Daily Attendance Partition Maintenance',
+        replace_existing=True
+    )
+    scheduler.add_job(
+        run_refresh_token_prune_job,
+        trigger=CronTrigger(hour=2, minute=30),  # Run daily at 2:30 AM
+        id='daily_refresh_token_prune',
+        name='Daily Expired Refresh Token Prune',
+        replace_existing=True
+    )
+    scheduler.add_job(
+        run_storage_gc_job,
+        trigger=IntervalTrigger(minutes=settings.STORAGE_GC_INTERVAL_MINUTES),
+        id='storage_gc',
+        name='Upload Storage Garbage Collection',
+        replace_existing=True
+    )
     scheduler.start()
     logger.info("Background scheduler started. Daily cleanup scheduled at 2:00 AM")
+    # Load the OCR model in the background so the first ID-card registration doesn't wait for it
+    if settings.OCR_WARMUP_ON_STARTUP and auth.OCR_SERVICE_AVAILABLE:
+        auth.ocr_pool.start()
+        logger.info("OCR model warm-up started")
     yield
     # Shutdown: Stop scheduler
     scheduler.shutdown()
     logger.info("Background scheduler stopped")
+    if auth.OCR_SERVICE_AVAILABLE:
+        auth.ocr_pool.shutdown()
+    await async_engine.dispose()
+    if async_replica_engine is not None:
+        await async_replica_engine.dispose()
 
 # Create FastAPI app with lifespan events
 app = FastAPI(
@@ -65,20 +145,71 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Retry-After", "X-DB-Query-Count", "X-DB-Query-Time", "X-DB-Repeated-Queries"],
 )
 
+
+@app.middleware("http")
+async def pin_writers_to_primary(request: Request, call_next):
+    """After a successful write, serve the client's reads from the primary for a while (read-your-writes)."""
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        pin_to_primary(request)
+    return response
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record per-route latency and SQL statement counts, and expose stage timings via Server-Timing."""
+    timings = start_request_timings()
+    queries = start_query_stats(request.scope)
+    start = time.perf_counter()
+    response = await call_next(request)
+    duration = time.perf_counter() - start
+    
+    # Label by route template (not raw path) to keep cardinality bounded
+    route = request.scope.get("route")
+    route_path = getattr(route, "path", "unmatched")
+    REQUEST_LATENCY.observe(
+        duration,
+        method=request.method,
+        route=route_path,
+        status=response.status_code
+    )
+    DB_QUERIES_PER_REQUEST.observe(queries.count, route=route_path)
+    DB_QUERY_TIME_PER_REQUEST.observe(queries.duration, route=route_path)
+    
+    # The same statement shape many times in one request is usually a query inside a loop
+    repeated = queries.repeated()
+    if repeated:
+        DB_REPEATED_QUERIES.inc(route=route_path)
+        for shape, count in repeated:
+            logger.warning(f"Possible N+1 on {request.method} {route_path}: {count}x {shape[:300]}")
+    
+    if settings.DEBUG:
+        response.headers["X-DB-Query-Count"] = str(queries.count)
+        response.headers["X-DB-Query-Time"] = f"{queries.duration * 1000:.1f}ms"
+        response.headers["X-DB-Repeated-Queries"] = str(sum(count for _, count in repeated))
+    
+    if timings:
+        timings.append(("total", duration))
+        response.headers["Server-Timing"] = format_server_timing(timings)
+        response.headers["Timing-Allow-Origin"] = ", ".join(settings.ALLOWED_ORIGINS)
+    return response
+
 # Include routers
 app.include_router(auth.router)
+app.include_router(analytics.router)
 app.include_router(attendance.router)
 app.include_router(students.router)
 app.include_router(classes.router)
 app.include_router(facial_recognition.router)
 
-# Mount static files for uploaded photos
-uploads_dir = "uploads"
+# Mount static files for uploaded photos (content-addressed photos are cached as immutable)
+uploads_dir = settings.UPLOAD_DIR
 if not os.path.exists(uploads_dir):
     os.makedirs(uploads_dir)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+app.mount(UPLOADS_URL_PREFIX, UploadFiles(directory=uploads_dir), name="uploads")
 
 
 @app.get("/")
@@ -93,8 +224,15 @@ def root():
 
 @app.get("/health")
 def health_check():
-    """Health check endpoint."""
-    return {"status": "healthy"}
+    """Health check endpoint. ocr is not_started, loading, ready, failed or unavailable."""
+    ocr_status = auth.ocr_pool.status() if auth.OCR_SERVICE_AVAILABLE else "unavailable"
+    return {"status": "healthy", "ocr": ocr_status, "ocr_ready": ocr_status == "ready"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Prometheus metrics endpoint."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,13 @@
+"""Create the core tables (users, photos, classes, enrollments, attendance) if missing."""
+from sqlalchemy.engine import Connection
+from app.core.database import Base
+from app.models.user import User, StudentPhoto
+from app.models.class_model import Class, Enrollment
+from app.models.attendance import Attendance
+
+description = "Create core tables"
+
+
+def upgrade(connection: Connection):
+    tables = [model.__table__ for model in (User, StudentPhoto, Class, Enrollment, Attendance)]
+    Base.metadata.create_all(bind=connection, tables=tables, checkfirst=True)
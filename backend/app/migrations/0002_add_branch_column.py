@@ -0,0 +1,13 @@
+"""Add the branch column to users (formerly add_branch_column.py)."""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from app.migrations import has_column
+
+description = "Add users.branch"
+
+
+def upgrade(connection: Connection):
+    if has_column(connection, "users", "branch"):
+        return
+    position = " AFTER student_id" if connection.dialect.name == "mysql" else ""
+    connection.execute(text(f"ALTER TABLE users ADD COLUMN branch VARCHAR(100) NULL{position}"))
@@ -0,0 +1,13 @@
+"""Add the year_of_joining column to users (formerly add_year_of_joining_column.py)."""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from app.migrations import has_column
+
+description = "Add users.year_of_joining"
+
+
+def upgrade(connection: Connection):
+    if has_column(connection, "users", "year_of_joining"):
+        return
+    position = " AFTER branch" if connection.dialect.name == "mysql" else ""
+    connection.execute(text(f"ALTER TABLE users ADD COLUMN year_of_joining INT NULL{position}"))
@@ -0,0 +1,18 @@
+"""Create attendance_rollups and backfill it (formerly add_attendance_rollup_table.py)."""
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from app.models.attendance import AttendanceRollup
+from app.services.rollup import rollup_service
+
+description = "Create and backfill attendance_rollups"
+
+
+def upgrade(connection: Connection):
+    AttendanceRollup.__table__.create(bind=connection, checkfirst=True)
+    # The session joins the migration's transaction
+    db = Session(bind=connection)
+    try:
+        rollup_service.rebuild(db)
+        db.flush()
+    finally:
+        db.close()
@@ -0,0 +1,9 @@
+"""Create data_versions (formerly add_data_versions_table.py). Missing rows read as version 0."""
+from sqlalchemy.engine import Connection
+from app.models.data_version import DataVersion
+
+description = "Create data_versions"
+
+
+def upgrade(connection: Connection):
+    DataVersion.__table__.create(bind=connection, checkfirst=True)
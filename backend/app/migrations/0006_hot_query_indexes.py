@@ -0,0 +1,19 @@
+"""Composite indexes for per-class and per-student date-range reads and primary photo lookups."""
+from sqlalchemy.engine import Connection
+from app.migrations import has_index
+from app.models.attendance import Attendance
+from app.models.user import StudentPhoto
+
+description = "Add covering indexes for attendance and student photo reads"
+
+INDEXES = {
+    Attendance.__table__: ["idx_attendance_class_date", "idx_attendance_student_date"],
+    StudentPhoto.__table__: ["idx_photo_user_primary"],
+}
+
+
+def upgrade(connection: Connection):
+    for table, names in INDEXES.items():
+        for index in table.indexes:
+            if index.name in names and not has_index(connection, table.name, index.name):
+                index.create(bind=connection)
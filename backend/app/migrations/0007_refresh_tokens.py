@@ -0,0 +1,9 @@
+"""Create refresh_tokens for refresh-token rotation and revocation."""
+from sqlalchemy.engine import Connection
+from app.models.refresh_token import RefreshToken
+
+description = "Create refresh_tokens"
+
+
+def upgrade(connection: Connection):
+    RefreshToken.__table__.create(bind=connection, checkfirst=True)
@@ -0,0 +1,103 @@
+"""
+Ordered schema migrations.
+Each module in this package named NNNN_<name>.py defines a `description` string
+and an `upgrade(connection)` function. Migrations run in version order, each in
+its own transaction, and are recorded in the schema_migrations table so every
+one runs exactly once per database. Upgrades check the current schema before
+changing it, so databases created by older scripts or database.sql migrate cleanly.
+"""
+import importlib
+import logging
+import os
+import re
+from datetime import datetime
+from typing import List, NamedTuple, Set
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_PATTERN = re.compile(r"^(\d{4})_(\w+)\.py$")
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", String(50), primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    version: str
+    module: object
+
+    @property
+    def description(self) -> str:
+        return self.module.description
+
+
+def discover() -> List[Migration]:
+    """All migrations in this package, in version order."""
+    migrations = []
+    for filename in sorted(os.listdir(os.path.dirname(__file__))):
+        match = MIGRATION_PATTERN.match(filename)
+        if match:
+            module = importlib.import_module(f"{__name__}.{filename[:-3]}")
+            migrations.append(Migration(f"{match.group(1)}_{match.group(2)}", module))
+    return migrations
+
+
+def applied_versions(connection: Connection) -> Set[str]:
+    schema_migrations.create(bind=connection, checkfirst=True)
+    return set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending(engine: Engine) -> List[Migration]:
+    with engine.begin() as connection:
+        applied = applied_versions(connection)
+    return [migration for migration in discover() if migration.version not in applied]
+
+
+def _record(connection: Connection, migration: Migration):
+    connection.execute(schema_migrations.insert().values(
+        version=migration.version,
+        description=migration.description,
+        applied_at=datetime.utcnow()
+    ))
+
+
+def upgrade(engine: Engine) -> List[str]:
+    """Apply pending migrations in order. Returns the applied versions."""
+    applied = []
+    for migration in pending(engine):
+        logger.info(f"Applying migration {migration.version}: {migration.description}")
+        with engine.begin() as connection:
+            migration.module.upgrade(connection)
+            _record(connection, migration)
+        applied.append(migration.version)
+    return applied
+
+
+def stamp(engine: Engine) -> List[str]:
+    """Mark all migrations as applied without running them (for freshly created schemas)."""
+    stamped = []
+    for migration in pending(engine):
+        with engine.begin() as connection:
+            _record(connection, migration)
+        stamped.append(migration.version)
+    return stamped
+
+
+# Helpers for migration modules
+
+def has_table(connection: Connection, table: str) -> bool:
+    return inspect(connection).has_table(table)
+
+
+def has_column(connection: Connection, table: str, column: str) -> bool:
+    return any(c["name"] == column for c in inspect(connection).get_columns(table))
+
+
+def has_index(connection: Connection, table: str, index: str) -> bool:
+    return any(i["name"] == index for i in inspect(connection).get_indexes(table))
@@ -1,6 +1,8 @@
 from app.models.user import User, StudentPhoto
 from app.models.class_model import Class, Enrollment
-from app.models.attendance import Attendance
+from app.models.attendance import Attendance, AttendanceRollup
+from app.models.data_version import DataVersion
+from app.models.refresh_token import RefreshToken
 
-__all__ = ["User", "StudentPhoto", "Class", "Enrollment", "Attendance"]
+__all__ = ["User", "StudentPhoto", "Class", "Enrollment", "Attendance", "AttendanceRollup", "DataVersion", "RefreshToken"]
 
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Enum, Date, Boolean, UniqueConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Enum, Date, Boolean, UniqueConstraint, Index
+from sqlalchemy.orm import relationship, column_property
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.mysql import DATETIME
 from app.core.database import Base
@@ -22,8 +22,9 @@ class Attendance(Base):
     attendance_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     student_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, index=True)
     class_id = Column(Integer, ForeignKey("classes.class_id", ondelete="CASCADE"), nullable=False, index=True)
-    attendance_date = Column(Date, nullable=False, index=True)
-    status = Column(Enum(AttendanceStatus), nullable=False)
+    # active_history keeps the previous value available when these change, for rollup maintenance
+    attendance_date = column_property(Column(Date, nullable=False, index=True), active_history=True)
+    status = column_property(Column(Enum(AttendanceStatus), nullable=False), active_history=True)
     marked_by = Column(Enum(MarkedBy), default=MarkedBy.system)
     marked_at = Column(DATETIME, server_default=func.current_timestamp())
     notes = Column(Text)
@@ -33,6 +34,25 @@ class Attendance(Base):
     student = relationship("User", back_populates="attendances")
     class_obj = relationship("Class", back_populates="attendances")
 
-    # Unique constraint
-    __table_args__ = (UniqueConstraint('student_id', 'class_id', 'attendance_date', name='unique_attendance'),)
+    # Unique constraint, and covering indexes for per-class and per-student date-range reads
+    __table_args__ = (
+        UniqueConstraint('student_id', 'class_id', 'attendance_date', name='unique_attendance'),
+        Index('idx_attendance_class_date', 'class_id', 'attendance_date', 'student_id', 'status'),
+        Index('idx_attendance_student_date', 'student_id', 'attendance_date', 'class_id', 'status'),
+    )
 
+
+
+class AttendanceRollup(Base):
+    """Per-(student, class, month) present/absent counts, maintained alongside attendance writes."""
+    __tablename__ = "attendance_rollups"
+
+    rollup_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    student_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    class_id = Column(Integer, ForeignKey("classes.class_id", ondelete="CASCADE"), nullable=False, index=True)
+    month = Column(Date, nullable=False)  # First day of the month
+    present_count = Column(Integer, nullable=False, default=0)
+    absent_count = Column(Integer, nullable=False, default=0)
+
+    # Unique constraint (also serves student-scoped lookups)
+    __table_args__ = (UniqueConstraint('student_id', 'class_id', 'month', name='unique_rollup'),)
@@ -19,7 +19,8 @@ class Class(Base):
     # Relationships
     teacher = relationship("User", back_populates="taught_classes")
     enrollments = relationship("Enrollment", back_populates="class_obj", cascade="all, delete-orphan")
-    attendances = relationship("Attendance", back_populates="class_obj")
+    # Deleted through the ORM: partitioned attendance tables cannot have foreign keys
+    attendances = relationship("Attendance", back_populates="class_obj", cascade="all, delete-orphan")
 
 
 class Enrollment(Base):
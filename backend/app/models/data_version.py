@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String, BigInteger
+from app.core.database import Base
+
+
+class DataVersion(Base):
+    """Monotonically increasing data version per scope (e.g. a class), bumped on every write."""
+    __tablename__ = "data_versions"
+
+    scope = Column(String(20), primary_key=True)
+    scope_id = Column(Integer, primary_key=True, autoincrement=False)
+    version = Column(BigInteger, nullable=False, default=1)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from app.core.database import Base
+
+
+class RefreshToken(Base):
+    """
+    An issued refresh token, identified by its JWT id. Tokens from one login share
+    a family; rotating marks the old token revoked, and presenting a revoked token
+    again revokes the whole family. Expired rows are pruned daily.
+    """
+    __tablename__ = "refresh_tokens"
+
+    jti = Column(String(32), primary_key=True)
+    family_id = Column(String(32), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked = Column(Boolean, nullable=False, default=False)
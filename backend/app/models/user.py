@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, Enum, LargeBinary, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Boolean, Text, Enum, LargeBinary, ForeignKey, Index
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.mysql import DATETIME
 from app.core.database import Base
@@ -49,10 +49,15 @@ class StudentPhoto(Base):
     photo_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, index=True)
     photo_path = Column(String(255), nullable=False)
-    face_encoding = Column(LargeBinary, nullable=True)  # Store face encoding as binary
+    # Store face encoding as binary. Deferred: only the recognition gallery reads it,
+    # and it would otherwise be loaded with every photo (~1 KB each).
+    face_encoding = deferred(Column(LargeBinary, nullable=True))
     is_primary = Column(Boolean, default=False)
     uploaded_at = Column(DATETIME, server_default=func.current_timestamp())
 
     # Relationships
     student = relationship("User", back_populates="photos")
 
+    # Primary photo lookup per user
+    __table_args__ = (Index('idx_photo_user_primary', 'user_id', 'is_primary'),)
+
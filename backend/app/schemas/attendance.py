@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 from datetime import date, datetime
 
 
@@ -17,6 +17,20 @@ class AttendanceUpdate(BaseModel):
     notes: Optional[str] = None
 
 
+class BulkAttendanceItem(BaseModel):
+    # Identify a record by attendance_id, or by (student_id, attendance_date) within class_id
+    attendance_id: Optional[int] = None
+    student_id: Optional[int] = None
+    attendance_date: Optional[date] = None
+    status: Optional[str] = None
+    notes: Optional[str] = None
+
+
+class BulkAttendanceUpdate(BaseModel):
+    class_id: Optional[int] = None  # Required for items identified by (student_id, attendance_date)
+    items: List[BulkAttendanceItem]
+
+
 class AttendanceResponse(BaseModel):
     attendance_id: int
     student_id: int
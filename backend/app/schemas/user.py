@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, computed_field
+from typing import Dict, Optional
 from datetime import datetime
+from app.services.photo_store import photo_store
 
 
 class UserCreate(BaseModel):
@@ -22,6 +23,11 @@ class UserLogin(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 
 class StudentPhotoResponse(BaseModel):
@@ -30,6 +36,17 @@ class StudentPhotoResponse(BaseModel):
     is_primary: bool
     uploaded_at: datetime
 
+    @computed_field
+    @property
+    def thumbnail_url(self) -> Optional[str]:
+        """Avatar-size thumbnail (None for photos stored before content addressing)."""
+        return photo_store.thumbnail_url(self.photo_path)
+
+    @computed_field
+    @property
+    def thumbnail_urls(self) -> Optional[Dict[str, str]]:
+        return photo_store.thumbnail_urls(self.photo_path)
+
     class Config:
         from_attributes = True
 
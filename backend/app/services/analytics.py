@@ -0,0 +1,258 @@
+"""
+Columnar attendance analytics for teacher dashboards.
+Loads a class's (or branch's) attendance window into compact NumPy arrays with a
+single query and computes pivots, rolling percentages and threshold filters
+vectorized. Loaded windows are cached per class data version and global epoch.
+"""
+import logging
+from datetime import date, timedelta
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.cache import InMemoryCache
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+from app.models.user import User
+from app.models.attendance import Attendance, AttendanceStatus
+from app.services.versions import version_service, SCOPE_CLASS, SCOPE_GLOBAL, GLOBAL_ID
+
+logger = logging.getLogger(__name__)
+
+
+class AttendanceMatrix:
+    """
+    Attendance window as dense (student index x day index) arrays.
+
+    present[s, d] is the number of classes student s attended on day d, and
+    marked[s, d] the number of classes with any record (0 where nothing was
+    marked). For a single class both are 0/1.
+    """
+
+    def __init__(
+        self,
+        start_date: date,
+        end_date: date,
+        student_ids: np.ndarray,
+        student_names: List[str],
+        roll_numbers: List[Optional[str]],
+        present: np.ndarray,
+        marked: np.ndarray
+    ):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.student_ids = student_ids
+        self.student_names = student_names
+        self.roll_numbers = roll_numbers
+        self.present = present
+        self.marked = marked
+
+    @property
+    def num_days(self) -> int:
+        return self.present.shape[1]
+
+    def day(self, index: int) -> date:
+        return self.start_date + timedelta(days=int(index))
+
+
+def _percentages(present: np.ndarray, marked: np.ndarray) -> np.ndarray:
+    """Element-wise present/marked * 100, NaN where nothing was marked."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(marked > 0, present * 100.0 / marked, np.nan)
+
+
+def _to_json(values: np.ndarray) -> list:
+    """Round percentages and turn NaN into None."""
+    rounded = np.round(values, 2)
+    return [None if np.isnan(v) else float(v) for v in rounded]
+
+
+class AttendanceAnalyticsService:
+    """Service for vectorized attendance analytics."""
+
+    def __init__(self, cache_size: int = settings.ANALYTICS_CACHE_SIZE):
+        # Matrices hold NumPy arrays, so they stay in-process; keys carry class
+        # versions, so entries never go stale and need no TTL
+        self._cache = InMemoryCache(cache_size)
+
+    # Loading
+
+    @staticmethod
+    def load_matrix(
+        db: Session,
+        class_ids: Sequence[int],
+        start_date: date,
+        end_date: date,
+        branch: Optional[str] = None
+    ) -> AttendanceMatrix:
+        """Load attendance for the given classes and window with one query."""
+        query = select(
+            Attendance.student_id,
+            Attendance.attendance_date,
+            Attendance.status,
+            User.full_name,
+            User.student_id.label("roll_number")
+        ).join(
+            User, User.user_id == Attendance.student_id
+        ).where(
+            Attendance.class_id.in_(class_ids),
+            Attendance.attendance_date >= start_date,
+            Attendance.attendance_date <= end_date
+        )
+        if branch:
+            query = query.where(User.branch == branch.upper())
+
+        rows = db.execute(query).all()
+        num_days = (end_date - start_date).days + 1
+
+        if not rows:
+            empty = np.zeros((0, num_days), dtype=np.int8)
+            return AttendanceMatrix(start_date, end_date, np.zeros(0, dtype=np.int64), [], [], empty, empty.copy())
+
+        student_col, date_col, status_col, name_col, roll_col = zip(*rows)
+        student_ids, student_index = np.unique(np.asarray(student_col, dtype=np.int64), return_inverse=True)
+        day_index = (
+            np.asarray(date_col, dtype="datetime64[D]") - np.datetime64(start_date, "D")
+        ).astype(np.int64)
+        is_present = np.fromiter(
+            (status == AttendanceStatus.present for status in status_col),
+            dtype=np.int8,
+            count=len(rows)
+        )
+
+        present = np.zeros((len(student_ids), num_days), dtype=np.int8)
+        marked = np.zeros((len(student_ids), num_days), dtype=np.int8)
+        np.add.at(present, (student_index, day_index), is_present)
+        np.add.at(marked, (student_index, day_index), 1)
+
+        # First occurrence of each student gives their name and roll number
+        first = np.zeros(len(student_ids), dtype=np.int64)
+        first[student_index[::-1]] = np.arange(len(rows))[::-1]
+        names = [name_col[i] for i in first]
+        rolls = [roll_col[i] for i in first]
+
+        return AttendanceMatrix(start_date, end_date, student_ids, names, rolls, present, marked)
+
+    def get_matrix(
+        self,
+        db: Session,
+        class_ids: Sequence[int],
+        start_date: date,
+        end_date: date,
+        branch: Optional[str] = None
+    ) -> AttendanceMatrix:
+        """Load a window, reusing a cached copy while none of the classes (nor the global epoch) have changed."""
+        class_ids = sorted(set(class_ids))
+        # The global epoch covers bulk deletes (retention cleanup, partition drops) that bypass the ORM
+        current = version_service.get_many(db, {SCOPE_CLASS: class_ids, SCOPE_GLOBAL: [GLOBAL_ID]})
+        class_versions = current[SCOPE_CLASS]
+        key = (
+            current[SCOPE_GLOBAL][GLOBAL_ID],
+            tuple((class_id, class_versions[class_id]) for class_id in class_ids),
+            start_date,
+            end_date,
+            branch.upper() if branch else None
+        )
+
+        matrix = self._cache.get(key)
+        record_cache_lookup("analytics", matrix is not None)
+        if matrix is None:
+            matrix = self.load_matrix(db, class_ids, start_date, end_date, branch)
+            self._cache.set(key, matrix)
+        return matrix
+
+    # Computations
+
+    @staticmethod
+    def student_totals(matrix: AttendanceMatrix) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Per-student present count, marked count and percentage over the window."""
+        present = matrix.present.sum(axis=1, dtype=np.int64)
+        marked = matrix.marked.sum(axis=1, dtype=np.int64)
+        return present, marked, _percentages(present, marked)
+
+    @staticmethod
+    def weekly_heatmap(matrix: AttendanceMatrix) -> dict:
+        """Per-student attendance percentage for each (Monday-based) week of the window."""
+        offset = matrix.start_date.weekday()
+        week_of_day = (np.arange(matrix.num_days) + offset) // 7
+        week_starts = np.flatnonzero(np.r_[True, np.diff(week_of_day) != 0])
+
+        if len(matrix.student_ids):
+            present = np.add.reduceat(matrix.present.astype(np.int32), week_starts, axis=1)
+            marked = np.add.reduceat(matrix.marked.astype(np.int32), week_starts, axis=1)
+            percentages = _percentages(present, marked)
+        else:
+            percentages = np.zeros((0, len(week_starts)))
+
+        weeks = [
+            (matrix.day(start) - timedelta(days=matrix.day(start).weekday())).isoformat()
+            for start in week_starts
+        ]
+        return {
+            "weeks": weeks,
+            "students": [
+                {
+                    "user_id": int(student_id),
+                    "full_name": matrix.student_names[i],
+                    "student_id": matrix.roll_numbers[i],
+                    "weekly_percentages": _to_json(percentages[i])
+                }
+                for i, student_id in enumerate(matrix.student_ids)
+            ]
+        }
+
+    @staticmethod
+    def weekday_trends(matrix: AttendanceMatrix) -> List[dict]:
+        """Class-wide attendance percentage by weekday (Monday first)."""
+        weekday_of_day = (np.arange(matrix.num_days) + matrix.start_date.weekday()) % 7
+        present_by_day = matrix.present.sum(axis=0, dtype=np.int64)
+        marked_by_day = matrix.marked.sum(axis=0, dtype=np.int64)
+        present = np.bincount(weekday_of_day, weights=present_by_day, minlength=7)
+        marked = np.bincount(weekday_of_day, weights=marked_by_day, minlength=7)
+        percentages = _to_json(_percentages(present, marked))
+
+        names = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+        return [
+            {
+                "weekday": names[i],
+                "present_count": int(present[i]),
+                "total_count": int(marked[i]),
+                "attendance_percentage": percentages[i]
+            }
+            for i in range(7)
+        ]
+
+    @staticmethod
+    def rolling_percentage(matrix: AttendanceMatrix, window_days: int) -> List[dict]:
+        """Class-wide attendance percentage over a trailing window ending on each day."""
+        present = np.concatenate(([0], np.cumsum(matrix.present.sum(axis=0, dtype=np.int64))))
+        marked = np.concatenate(([0], np.cumsum(matrix.marked.sum(axis=0, dtype=np.int64))))
+        ends = np.arange(1, matrix.num_days + 1)
+        starts = np.maximum(ends - window_days, 0)
+        percentages = _to_json(_percentages(present[ends] - present[starts], marked[ends] - marked[starts]))
+        return [
+            {"date": matrix.day(i).isoformat(), "attendance_percentage": percentages[i]}
+            for i in range(matrix.num_days)
+        ]
+
+    @staticmethod
+    def below_threshold(matrix: AttendanceMatrix, threshold: float) -> List[dict]:
+        """Students whose attendance over the window is below threshold, lowest first."""
+        present, marked, percentages = AttendanceAnalyticsService.student_totals(matrix)
+        below = np.flatnonzero((marked > 0) & (percentages < threshold))
+        below = below[np.argsort(percentages[below], kind="stable")]
+        return [
+            {
+                "user_id": int(matrix.student_ids[i]),
+                "full_name": matrix.student_names[i],
+                "student_id": matrix.roll_numbers[i],
+                "present_count": int(present[i]),
+                "total_classes": int(marked[i]),
+                "attendance_percentage": round(float(percentages[i]), 2)
+            }
+            for i in below
+        ]
+
+
+# Global instance
+analytics_service = AttendanceAnalyticsService()
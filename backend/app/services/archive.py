@@ -0,0 +1,227 @@
+"""
+Cold-storage archiving of expired attendance.
+Before retention deletes rows, the cleanup job streams them to compressed files
+under ARCHIVE_DIR, one directory per month:
+
+    <ARCHIVE_DIR>/attendance/month=YYYY-MM/attendance_<first>_<last>_<stamp>.csv.gz
+
+Files use the export columns and encoders, and are written to a temporary name
+and renamed only when complete. The read path scans the archive directories
+overlapping a date range, so historical reports work after the rows are gone.
+"""
+import csv
+import gzip
+import os
+import logging
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.attendance import Attendance
+from app.services.export import export_service, EXPORT_FORMATS, EXPORT_COLUMNS, PARQUET_AVAILABLE, pq
+from app.services.rollup import month_start, next_month_start
+
+logger = logging.getLogger(__name__)
+
+INT_COLUMNS = {"attendance_id", "student_user_id", "year_of_joining", "class_id"}
+
+
+def _month_dir(month: date) -> str:
+    return os.path.join(settings.ARCHIVE_DIR, "attendance", f"month={month.year:04d}-{month.month:02d}")
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _parse_csv_row(row: dict) -> dict:
+    """Restore column types for a row read back from an archived CSV."""
+    record = {}
+    for column in EXPORT_COLUMNS:
+        value = row.get(column)
+        if value == "":
+            value = None
+        elif value is not None:
+            if column in INT_COLUMNS:
+                value = int(value)
+            elif column == "attendance_date":
+                value = date.fromisoformat(value)
+            elif column == "marked_at":
+                value = datetime.fromisoformat(value)
+            elif column == "teacher_modified":
+                value = value == "True"
+        record[column] = value
+    return record
+
+
+class _CountingRows:
+    """Iterator wrapper that remembers the date range and count of rows passed through."""
+
+    def __init__(self, rows: Iterable[dict]):
+        self._rows = iter(rows)
+        self.count = 0
+        self.first_date = None
+        self.last_date = None
+
+    def __iter__(self):
+        for row in self._rows:
+            self.count += 1
+            if self.first_date is None:
+                self.first_date = row["attendance_date"]
+            self.last_date = row["attendance_date"]
+            yield row
+
+
+class AttendanceArchiveService:
+    """Service for writing and reading attendance archives."""
+
+    @staticmethod
+    def _archived_ids(month: date) -> set:
+        """attendance_ids already present in the month's archive files."""
+        return {
+            row["attendance_id"]
+            for path in AttendanceArchiveService.list_files(month, next_month_start(month) - timedelta(days=1))
+            for row in AttendanceArchiveService._read_file(path)
+        }
+
+    @staticmethod
+    def archive_month(db: Session, month: date, cutoff_date: date, archive_format: str) -> Optional[str]:
+        """
+        Archive attendance in month that falls before cutoff_date to one file.
+        Returns the file path, or None if there were no rows.
+        """
+        end_date = min(next_month_start(month), cutoff_date) - timedelta(days=1)
+        # Outer joins: rows whose student or class is gone are deleted by retention too
+        query = export_service.build_query(db, start_date=month, end_date=end_date, include_orphans=True)
+        # Skip rows an earlier run already archived (e.g. one whose delete then failed)
+        archived_ids = AttendanceArchiveService._archived_ids(month)
+        rows = _CountingRows(
+            row for row in export_service.iter_rows(query, settings.CLEANUP_DELETE_CHUNK_SIZE)
+            if row["attendance_id"] not in archived_ids
+        )
+        if archive_format == "parquet":
+            chunks = export_service.iter_parquet(rows, settings.CLEANUP_DELETE_CHUNK_SIZE)
+        else:
+            chunks = export_service.iter_gzip(export_service.iter_csv(rows, settings.CLEANUP_DELETE_CHUNK_SIZE))
+
+        directory = _month_dir(month)
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        temp_path = os.path.join(directory, f".attendance_{stamp}.tmp")
+        try:
+            with open(temp_path, "wb") as out:
+                for chunk in chunks:
+                    out.write(chunk)
+                out.flush()
+                os.fsync(out.fileno())
+        except Exception:
+            _remove_quietly(temp_path)
+            raise
+
+        if rows.count == 0:
+            _remove_quietly(temp_path)
+            return None
+
+        extension = EXPORT_FORMATS[archive_format][1]
+        path = os.path.join(
+            directory,
+            f"attendance_{rows.first_date.isoformat()}_{rows.last_date.isoformat()}_{stamp}.{extension}"
+        )
+        os.replace(temp_path, path)
+        logger.info(f"Archived {rows.count} attendance records to {path}")
+        return path
+
+    @staticmethod
+    def archive_before(db: Session, cutoff_date: date, archive_format: Optional[str] = None) -> List[str]:
+        """
+        Archive all attendance before cutoff_date, one file per month.
+        Raises if any file cannot be written, so callers never delete unarchived rows.
+        """
+        archive_format = archive_format or settings.ARCHIVE_FORMAT
+        if archive_format not in ("csv.gz", "parquet"):
+            raise ValueError(f"Unsupported archive format: {archive_format}")
+        if archive_format == "parquet" and not PARQUET_AVAILABLE:
+            raise RuntimeError("Parquet archives require pyarrow to be installed")
+
+        oldest = db.query(func.min(Attendance.attendance_date)).filter(
+            Attendance.attendance_date < cutoff_date
+        ).scalar()
+        if oldest is None:
+            return []
+
+        paths = []
+        month = month_start(oldest)
+        while month < cutoff_date:
+            path = AttendanceArchiveService.archive_month(db, month, cutoff_date, archive_format)
+            if path:
+                paths.append(path)
+            month = next_month_start(month)
+        return paths
+
+    @staticmethod
+    def list_files(start_date: date, end_date: date) -> List[str]:
+        """Archive files for the months overlapping [start_date, end_date], oldest first."""
+        files = []
+        month = month_start(start_date)
+        while month <= end_date:
+            directory = _month_dir(month)
+            if os.path.isdir(directory):
+                files.extend(
+                    os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                    if name.startswith("attendance_")
+                )
+            month = next_month_start(month)
+        return files
+
+    @staticmethod
+    def _read_file(path: str) -> Iterator[dict]:
+        if path.endswith(".parquet"):
+            if not PARQUET_AVAILABLE:
+                raise RuntimeError("Reading Parquet archives requires pyarrow to be installed")
+            parquet_file = pq.ParquetFile(path)
+            for index in range(parquet_file.num_row_groups):
+                yield from parquet_file.read_row_group(index).to_pylist()
+        else:
+            with gzip.open(path, "rt", encoding="utf-8", newline="") as handle:
+                for row in csv.DictReader(handle):
+                    yield _parse_csv_row(row)
+
+    @staticmethod
+    def iter_rows(
+        start_date: date,
+        end_date: date,
+        class_ids: Optional[Iterable[int]] = None,
+        student_id: Optional[int] = None
+    ) -> Iterator[dict]:
+        """
+        Stream archived rows (with EXPORT_COLUMNS keys) in [start_date, end_date],
+        optionally restricted to some classes and one student. Read-only.
+        """
+        class_ids = set(class_ids) if class_ids is not None else None
+        for path in AttendanceArchiveService.list_files(start_date, end_date):
+            for row in AttendanceArchiveService._read_file(path):
+                if not start_date <= row["attendance_date"] <= end_date:
+                    continue
+                if class_ids is not None and row["class_id"] not in class_ids:
+                    continue
+                if student_id is not None and row["student_user_id"] != student_id:
+                    continue
+                yield row
+
+    @staticmethod
+    def stream(rows: Iterable[dict], export_format: str = "csv") -> Iterator[bytes]:
+        """Encode archived rows in one of EXPORT_FORMATS, like a live export."""
+        if export_format == "parquet":
+            return export_service.iter_parquet(rows)
+        chunks = export_service.iter_csv(rows)
+        if export_format == "csv.gz":
+            return export_service.iter_gzip(chunks)
+        return chunks
+
+
+# Global instance
+archive_service = AttendanceArchiveService()
@@ -1,6 +1,10 @@
 from datetime import date, timedelta
 from sqlalchemy.orm import Session
-from app.models.attendance import Attendance
+from app.core.config import settings
+from app.services.archive import archive_service
+from app.services.partitions import partition_manager
+from app.services.rollup import rollup_service, month_start
+from app.services.versions import version_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,6 +18,14 @@ class CleanupService:
         """
         Delete attendance records older than specified months.
         
+        Expiring rows are first archived to ARCHIVE_DIR (if ARCHIVE_ENABLED); if
+        archiving fails nothing is deleted.
+        
+        On a partitioned table whole expired monthly partitions are dropped and
+        only the cutoff's own month is deleted row by row; otherwise rows are
+        deleted in small committed chunks. Rollups and data versions are resynced
+        afterwards.
+        
         Args:
             db: Database session
             months: Number of months to keep (default: 6)
@@ -26,13 +38,21 @@ class CleanupService:
             # Using average of 30.44 days per month for better accuracy
             cutoff_date = date.today() - timedelta(days=int(months * 30.44))
             
-            # Count records to be deleted (for logging)
-            count_query = db.query(Attendance).filter(
-                Attendance.attendance_date < cutoff_date
-            )
-            records_to_delete = count_query.count()
+            # Archive before deleting anything; raises (and aborts cleanup) on failure
+            archived_files = archive_service.archive_before(db, cutoff_date) if settings.ARCHIVE_ENABLED else []
+            
+            # Drop whole expired months (no-op unless the table is partitioned)
+            dropped_partitions, dropped_rows = partition_manager.drop_partitions_before(db, cutoff_date)
+            if dropped_partitions:
+                # Their months' rollups go with them, before the row-by-row deletes start
+                rollup_service.resync_before(db, month_start(cutoff_date))
+                version_service.bump_global(db)
+                db.commit()
+            
+            # Delete whatever remains before the cutoff in small transactions (rollups kept in step per chunk)
+            deleted = dropped_rows + partition_manager.delete_before_chunked(db, cutoff_date)
             
-            if records_to_delete == 0:
+            if deleted == 0 and not dropped_partitions:
                 logger.info(f"No attendance records older than {months} months found. Cutoff date: {cutoff_date}")
                 return {
                     "status": "success",
@@ -41,8 +61,9 @@ class CleanupService:
                     "deleted_count": 0
                 }
             
-            # Delete old records
-            deleted = count_query.delete(synchronize_session=False)
+            # Final resync drops emptied rollup rows and recomputes the cutoff's month exactly
+            rollup_service.resync_before(db, cutoff_date)
+            version_service.bump_global(db)
             db.commit()
             
             logger.info(f"Successfully deleted {deleted} attendance records older than {months} months (cutoff: {cutoff_date})")
@@ -51,7 +72,10 @@ class CleanupService:
                 "status": "success",
                 "message": f"Deleted {deleted} attendance records older than {months} months",
                 "cutoff_date": cutoff_date.isoformat(),
-                "deleted_count": deleted
+                # Estimated from table statistics when partitions were dropped
+                "deleted_count": deleted,
+                "dropped_partitions": dropped_partitions,
+                "archived_files": archived_files
             }
             
         except Exception as e:
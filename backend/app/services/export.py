@@ -0,0 +1,276 @@
+"""
+Streaming export of attendance reports.
+Rows are read from a server-side cursor in chunks and written incrementally
+as CSV (optionally gzip-compressed) or Parquet, so memory use stays flat
+regardless of the exported date range.
+"""
+import csv
+import io
+import zlib
+import logging
+from datetime import date
+from typing import Iterable, Iterator, List, Optional
+from sqlalchemy.orm import Session, Query
+from app.models.user import User
+from app.models.attendance import Attendance
+from app.models.class_model import Class
+
+logger = logging.getLogger(__name__)
+
+# Parquet output is optional (requires pyarrow)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    pa = None
+    pq = None
+    PARQUET_AVAILABLE = False
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "csv.gz": ("application/gzip", "csv.gz"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+EXPORT_COLUMNS = [
+    "attendance_id",
+    "attendance_date",
+    "status",
+    "marked_by",
+    "marked_at",
+    "teacher_modified",
+    "notes",
+    "student_user_id",
+    "student_roll_number",
+    "student_name",
+    "branch",
+    "year_of_joining",
+    "class_id",
+    "class_code",
+    "class_name",
+]
+
+# Number of rows fetched from the cursor and written per chunk
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def _enum_value(value):
+    return value.value if hasattr(value, "value") else value
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that buffers written bytes until drained."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class AttendanceExportService:
+    """Service for streaming attendance exports."""
+
+    @staticmethod
+    def build_query(
+        db: Session,
+        teacher_id: Optional[int] = None,
+        class_id: Optional[int] = None,
+        student_id: Optional[int] = None,
+        branch: Optional[str] = None,
+        year_of_joining: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        include_orphans: bool = False
+    ) -> Query:
+        """
+        Build the export projection query.
+
+        Args:
+            db: Database session
+            teacher_id: Restrict to classes taught by this teacher (None = all classes)
+            class_id: Filter by class
+            student_id: Filter by student (users.user_id)
+            branch: Filter by student branch
+            year_of_joining: Filter by student year of joining
+            start_date: Inclusive start of the date window
+            end_date: Inclusive end of the date window
+            include_orphans: Also return rows whose student or class no longer exists
+                (their name columns are NULL); used by archiving
+
+        Returns:
+            Query yielding one row per attendance record, labelled with EXPORT_COLUMNS
+        """
+        query = db.query(
+            Attendance.attendance_id,
+            Attendance.attendance_date,
+            Attendance.status,
+            Attendance.marked_by,
+            Attendance.marked_at,
+            Attendance.teacher_modified,
+            Attendance.notes,
+            Attendance.student_id.label("student_user_id"),
+            User.student_id.label("student_roll_number"),
+            User.full_name.label("student_name"),
+            User.branch,
+            User.year_of_joining,
+            Attendance.class_id,
+            Class.class_code,
+            Class.class_name
+        )
+        if include_orphans:
+            query = query.outerjoin(
+                User, User.user_id == Attendance.student_id
+            ).outerjoin(
+                Class, Class.class_id == Attendance.class_id
+            )
+        else:
+            query = query.join(
+                User, User.user_id == Attendance.student_id
+            ).join(
+                Class, Class.class_id == Attendance.class_id
+            )
+
+        if teacher_id is not None:
+            query = query.filter(Class.teacher_id == teacher_id)
+        if class_id is not None:
+            query = query.filter(Attendance.class_id == class_id)
+        if student_id is not None:
+            query = query.filter(Attendance.student_id == student_id)
+        if branch:
+            query = query.filter(User.branch == branch.upper())
+        if year_of_joining is not None:
+            query = query.filter(User.year_of_joining == year_of_joining)
+        if start_date:
+            query = query.filter(Attendance.attendance_date >= start_date)
+        if end_date:
+            query = query.filter(Attendance.attendance_date <= end_date)
+
+        return query.order_by(Attendance.attendance_date, Attendance.attendance_id)
+
+    @staticmethod
+    def iter_rows(query: Query, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[dict]:
+        """Stream rows from a server-side cursor as plain dicts."""
+        for row in query.yield_per(chunk_size):
+            record = row._asdict()
+            record["status"] = _enum_value(record["status"])
+            record["marked_by"] = _enum_value(record["marked_by"])
+            yield record
+
+    @staticmethod
+    def iter_csv(rows: Iterable[dict], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Encode rows as CSV, yielding one encoded chunk per chunk_size rows."""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        pending = 0
+        for row in rows:
+            writer.writerow(row)
+            pending += 1
+            if pending >= chunk_size:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+        remaining = buffer.getvalue()
+        if remaining:
+            yield remaining.encode("utf-8")
+
+    @staticmethod
+    def iter_gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Gzip-compress a stream of byte chunks."""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    @staticmethod
+    def iter_parquet(rows: Iterable[dict], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Encode rows as Parquet, writing one row group per chunk_size rows."""
+        if not PARQUET_AVAILABLE:
+            raise RuntimeError("Parquet export requires pyarrow to be installed")
+
+        schema = pa.schema([
+            ("attendance_id", pa.int64()),
+            ("attendance_date", pa.date32()),
+            ("status", pa.string()),
+            ("marked_by", pa.string()),
+            ("marked_at", pa.timestamp("s")),
+            ("teacher_modified", pa.bool_()),
+            ("notes", pa.string()),
+            ("student_user_id", pa.int64()),
+            ("student_roll_number", pa.string()),
+            ("student_name", pa.string()),
+            ("branch", pa.string()),
+            ("year_of_joining", pa.int32()),
+            ("class_id", pa.int64()),
+            ("class_code", pa.string()),
+            ("class_name", pa.string()),
+        ])
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema, compression="snappy")
+        try:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= chunk_size:
+                    writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                    batch = []
+                    yield sink.drain()
+            if batch:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+        finally:
+            writer.close()
+        yield sink.drain()
+
+    @staticmethod
+    def stream(
+        query: Query,
+        export_format: str = "csv",
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """
+        Stream an export in the given format.
+
+        Args:
+            query: Query built by build_query
+            export_format: One of EXPORT_FORMATS ("csv", "csv.gz", "parquet")
+            chunk_size: Rows per fetched and written chunk
+
+        Returns:
+            Iterator of encoded byte chunks
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+
+        rows = AttendanceExportService.iter_rows(query, chunk_size)
+        if export_format == "parquet":
+            return AttendanceExportService.iter_parquet(rows, chunk_size)
+
+        chunks = AttendanceExportService.iter_csv(rows, chunk_size)
+        if export_format == "csv.gz":
+            return AttendanceExportService.iter_gzip(chunks)
+        return chunks
+
+
+# Global instance
+export_service = AttendanceExportService()
@@ -2,8 +2,11 @@ import os
 import numpy as np
 import face_recognition
 import cv2
-from typing import List, Tuple, Optional
+from typing import Dict, Iterable, List, Tuple, Optional
+from sqlalchemy.orm import Session
 from app.core.config import settings
+from app.core.metrics import timed, FACES_PER_SCAN
+from app.models.user import User, StudentPhoto
 
 
 class FacialRecognitionService:
@@ -39,38 +42,42 @@ class FacialRecognitionService:
         rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         
         # Find face locations
-        face_locations = face_recognition.face_locations(rgb_frame, model="hog")
+        with timed("face_detect"):
+            face_locations = face_recognition.face_locations(rgb_frame, model="hog")
+        FACES_PER_SCAN.observe(len(face_locations))
         
         if not face_locations:
             return []
         
         # Encode faces in the frame
-        face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
+        with timed("face_encode"):
+            face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
         
         recognized_faces = []
-        for (face_encoding, face_location) in zip(face_encodings, face_locations):
-            # Compare with known faces
-            matches = face_recognition.compare_faces(
-                list(self.known_encodings.values()),
-                face_encoding,
-                tolerance=self.tolerance
-            )
-            
-            name = "Unknown"
-            confidence = 0.0
-            
-            # Find the best match
-            face_distances = face_recognition.face_distance(
-                list(self.known_encodings.values()),
-                face_encoding
-            )
-            best_match_index = np.argmin(face_distances)
-            
-            if matches[best_match_index]:
-                name = list(self.known_encodings.keys())[best_match_index]
-                confidence = 1 - face_distances[best_match_index]  # Convert distance to confidence
-            
-            recognized_faces.append((name, face_location, confidence))
+        with timed("match"):
+            for (face_encoding, face_location) in zip(face_encodings, face_locations):
+                # Compare with known faces
+                matches = face_recognition.compare_faces(
+                    list(self.known_encodings.values()),
+                    face_encoding,
+                    tolerance=self.tolerance
+                )
+                
+                name = "Unknown"
+                confidence = 0.0
+                
+                # Find the best match
+                face_distances = face_recognition.face_distance(
+                    list(self.known_encodings.values()),
+                    face_encoding
+                )
+                best_match_index = np.argmin(face_distances)
+                
+                if matches[best_match_index]:
+                    name = list(self.known_encodings.keys())[best_match_index]
+                    confidence = 1 - face_distances[best_match_index]  # Convert distance to confidence
+                
+                recognized_faces.append((name, face_location, confidence))
         
         return recognized_faces
     
@@ -86,6 +93,19 @@ class FacialRecognitionService:
         if name in self.known_names:
             del self.known_names[name]
     
+    @staticmethod
+    def load_gallery(db: Session, student_ids: Optional[Iterable[int]] = None) -> Dict[str, Optional[bytes]]:
+        """
+        Primary-photo face encodings by username (None where encoding failed), in one query.
+        This is the only loader for StudentPhoto.face_encoding, which is deferred elsewhere.
+        """
+        query = db.query(User.username, StudentPhoto.face_encoding).join(
+            User, User.user_id == StudentPhoto.user_id
+        ).filter(StudentPhoto.is_primary == True)
+        if student_ids is not None:
+            query = query.filter(StudentPhoto.user_id.in_(list(student_ids)))
+        return {username: encoding for username, encoding in query.all()}
+    
     def load_known_faces_from_db(self, encodings_dict: dict):
         """Load known faces from database."""
         self.known_encodings = {}
@@ -0,0 +1,51 @@
+"""
+Cached class and student lists.
+Keys are scoped by user (all classes, a teacher's classes, a student's enrolled
+classes, all students). Write endpoints call the invalidation hooks after commit.
+Lists served with an ETag also key on it: the ETag comes from shared version
+rows, and the cache is per worker, so a worker that missed the write must not
+serve its old body under the new ETag.
+"""
+from typing import Iterable, Optional
+from app.core.cache import response_cache
+
+ALL_CLASSES_KEY = "classes:all"
+TEACHER_CLASSES_PREFIX = "classes:teacher:"
+STUDENT_CLASSES_PREFIX = "classes:student:"
+ALL_STUDENTS_KEY = "students:all"
+
+
+class ListCacheService:
+    """Keys and invalidation hooks for cached list endpoints."""
+
+    @staticmethod
+    def teacher_classes_key(teacher_id: int, etag: str = "") -> str:
+        return f"{TEACHER_CLASSES_PREFIX}{teacher_id}:{etag}"
+
+    @staticmethod
+    def student_classes_key(student_id: int) -> str:
+        return f"{STUDENT_CLASSES_PREFIX}{student_id}"
+
+    @staticmethod
+    def on_class_changed(teacher_id: int):
+        """A class was created, updated or deleted."""
+        response_cache.invalidate(ALL_CLASSES_KEY)
+        response_cache.invalidate_prefix(ListCacheService.teacher_classes_key(teacher_id))
+        # Class details also appear in every enrolled student's list
+        response_cache.invalidate_prefix(STUDENT_CLASSES_PREFIX)
+
+    @staticmethod
+    def on_enrollment_changed(student_ids: Iterable[int]):
+        """Students were enrolled in (or removed from) a class."""
+        response_cache.invalidate(*[ListCacheService.student_classes_key(sid) for sid in student_ids])
+
+    @staticmethod
+    def on_student_changed(student_id: Optional[int] = None):
+        """A student was created, updated or deleted, or their photos changed."""
+        response_cache.invalidate(ALL_STUDENTS_KEY)
+        if student_id is not None:
+            response_cache.invalidate(ListCacheService.student_classes_key(student_id))
+
+
+# Global instance
+list_cache = ListCacheService()
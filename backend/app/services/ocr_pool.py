@@ -0,0 +1,190 @@
+"""
+Worker pool for ID-card OCR.
+EasyOCR readtext takes seconds of CPU per image, so it never runs on the event
+loop. With OCR_WORKERS > 0 images are processed in a process pool whose
+workers each load their own reader when they start (and are warmed up at app
+startup); with OCR_WORKERS = 0 they run on one thread in this process using the
+shared reader.
+
+At most OCR_MAX_PENDING images may be running or queued at once. Beyond that
+process_id_cards raises OCRPoolSaturated, which the API turns into 503 + Retry-After.
+When the reader failed to load it raises OCRUnavailable (also 503) instead of
+retrying the load inside every job.
+"""
+import asyncio
+import multiprocessing
+import threading
+import logging
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.core.metrics import OCR_JOBS
+from app.services import ocr_service as ocr_module
+
+logger = logging.getLogger(__name__)
+
+OCR_UNAVAILABLE_MESSAGE = "OCR is not available. Please install EasyOCR and ensure models are downloaded."
+
+# Set in a pool worker whose reader failed to load in _init_worker
+_worker_reader_failed = False
+
+
+class OCRPoolSaturated(Exception):
+    """Raised when accepting the images would exceed OCR_MAX_PENDING."""
+
+
+class OCRUnavailable(Exception):
+    """Raised when the OCR reader failed to load (in this process or in a pool worker)."""
+
+
+def _init_worker(loaded, failed):
+    """Process pool initializer: load the reader before taking any job, and count the outcome."""
+    global _worker_reader_failed
+    _worker_reader_failed = ocr_module.start_reader_warmup().result() is None
+    counter = failed if _worker_reader_failed else loaded
+    with counter.get_lock():
+        counter.value += 1
+
+
+def _noop():
+    pass
+
+
+def _process_id_card(image_bytes: bytes) -> Dict:
+    if _worker_reader_failed:
+        # Fail fast rather than retry the (tens of seconds) model load in every job
+        raise OCRUnavailable(OCR_UNAVAILABLE_MESSAGE)
+    return ocr_module.ocr_service.process_id_card(image_bytes)
+
+
+class OCRWorkerPool:
+    """Bounded executor for ID-card OCR."""
+
+    def __init__(self):
+        self._executor: Optional[Executor] = None
+        self._warmup: List[Future] = []
+        # Workers (of the current process pool) whose reader loaded / failed to load
+        self._loaded = self._failed = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def uses_processes(self) -> bool:
+        return settings.OCR_WORKERS > 0
+
+    def _create_executor(self) -> Executor:
+        if self.uses_processes:
+            # spawn: forking a process that already holds torch threads can deadlock
+            context = multiprocessing.get_context("spawn")
+            self._loaded, self._failed = context.Value("i", 0), context.Value("i", 0)
+            return ProcessPoolExecutor(
+                max_workers=settings.OCR_WORKERS,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self._loaded, self._failed)
+            )
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="ocr")
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            return self._executor
+
+    def start(self):
+        """Create the pool and load a reader in every worker (or the shared reader) in the background."""
+        executor = self._get_executor()
+        if self.uses_processes:
+            # One job per worker makes the pool spawn (and initialise) all of them now
+            self._warmup = [executor.submit(_noop) for _ in range(settings.OCR_WORKERS)]
+        else:
+            self._warmup = [ocr_module.start_reader_warmup()]
+
+    def status(self) -> str:
+        """not_started, loading, ready or failed."""
+        if not self.uses_processes:
+            return ocr_module.reader_status()
+        if not self._warmup or self._loaded is None:
+            return "not_started"
+        # Counted by each worker's initializer: one fast worker may run several warm-up jobs
+        if self._failed.value:
+            return "failed"
+        return "ready" if self._loaded.value >= settings.OCR_WORKERS else "loading"
+
+    def _reserve(self, count: int):
+        with self._lock:
+            if self._pending + count > settings.OCR_MAX_PENDING:
+                OCR_JOBS.inc(count, result="rejected")
+                raise OCRPoolSaturated(f"{self._pending} OCR jobs pending")
+            self._pending += count
+
+    def _release(self, count: int):
+        with self._lock:
+            self._pending -= count
+
+    async def _run(self, image_bytes: bytes) -> Dict:
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            if self.uses_processes and self.status() == "failed":
+                # Replace the pool so its new workers retry the load, without holding up this job
+                self._replace(executor, "OCR reader failed to load in a worker; restarting the pool")
+                raise OCRUnavailable(OCR_UNAVAILABLE_MESSAGE)
+            if not self.uses_processes and await ocr_module.wait_for_reader() is None:
+                raise OCRUnavailable(OCR_UNAVAILABLE_MESSAGE)
+            result = await loop.run_in_executor(executor, _process_id_card, image_bytes)
+        except OCRUnavailable:
+            OCR_JOBS.inc(result="unavailable")
+            raise
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); replace the pool for later jobs
+            OCR_JOBS.inc(result="error")
+            self._replace(executor)
+            raise
+        except Exception:
+            OCR_JOBS.inc(result="error")
+            raise
+        OCR_JOBS.inc(result="ok")
+        return result
+
+    def _replace(self, broken: Executor, reason: str = "OCR worker pool broken; restarting it"):
+        """Swap out a broken pool (once, however many jobs saw it fail) and warm up the new one."""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = None
+        logger.error(reason)
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.start()
+
+    async def process_id_cards(self, *images: Optional[bytes]) -> List[Optional[Dict]]:
+        """
+        OCR the given ID-card images concurrently (None entries are skipped).
+        Raises OCRPoolSaturated without queueing anything when the pool is full,
+        and OCRUnavailable when the reader failed to load.
+        """
+        present = [image for image in images if image is not None]
+        self._reserve(len(present))
+        try:
+            # Wait for every job (even after one fails) so slots are only freed once the pool is done with them
+            outcomes = await asyncio.gather(*(self._run(image) for image in present), return_exceptions=True)
+        finally:
+            self._release(len(present))
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+        results = iter(outcomes)
+        return [next(results) if image is not None else None for image in images]
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._warmup = []
+        self._loaded = self._failed = None
+
+
+# Global instance
+ocr_pool = OCRWorkerPool()
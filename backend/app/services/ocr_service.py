@@ -3,8 +3,12 @@ OCR Service for extracting information from ID cards.
 Uses EasyOCR for text extraction and pattern matching for data parsing.
 """
 import easyocr
+import asyncio
 import re
+import threading
+import time
 import logging
+from concurrent.futures import Future
 from typing import Dict, Optional, Tuple
 from PIL import Image
 import io
@@ -17,25 +21,62 @@ if not hasattr(Image, 'ANTIALIAS'):
 
 logger = logging.getLogger(__name__)
 
-# Initialize EasyOCR reader lazily (on first use)
-# This will download models on first run
+# EasyOCR reader, loaded once in a background thread (at startup if OCR_WARMUP_ON_STARTUP,
+# otherwise on first use). This will download models on first run.
 reader = None
 OCR_AVAILABLE = False
+_reader_future: Optional[Future] = None
+_reader_lock = threading.Lock()
 
-def _initialize_reader():
-    """Initialize EasyOCR reader on first use."""
+
+def _load_reader(future: Future):
+    """Create the EasyOCR reader and resolve future with it (None if loading failed)."""
     global reader, OCR_AVAILABLE
-    if reader is None and not OCR_AVAILABLE:
-        try:
-            logger.info("Initializing EasyOCR reader (first time - may take a moment)...")
-            reader = easyocr.Reader(['en'], gpu=False)
-            OCR_AVAILABLE = True
-            logger.info("EasyOCR reader initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize EasyOCR: {e}")
-            OCR_AVAILABLE = False
-            reader = None
-    return reader
+    try:
+        logger.info("Initializing EasyOCR reader (may take a moment)...")
+        start = time.perf_counter()
+        reader = easyocr.Reader(['en'], gpu=False)
+        OCR_AVAILABLE = True
+        logger.info(f"EasyOCR reader initialized successfully in {time.perf_counter() - start:.1f}s")
+    except Exception as e:
+        logger.error(f"Failed to initialize EasyOCR: {e}")
+        OCR_AVAILABLE = False
+        reader = None
+    future.set_result(reader)
+
+
+def start_reader_warmup() -> Future:
+    """
+    Start loading the reader in a background thread, unless a load is already
+    running or done. Every caller gets the same future; a failed load is
+    retried by the next caller.
+    """
+    global _reader_future
+    with _reader_lock:
+        if _reader_future is None or (_reader_future.done() and _reader_future.result() is None):
+            _reader_future = Future()
+            threading.Thread(target=_load_reader, args=(_reader_future,), name="ocr-warmup", daemon=True).start()
+        return _reader_future
+
+
+def reader_status() -> str:
+    """not_started, loading, ready or failed."""
+    future = _reader_future
+    if future is None:
+        return "not_started"
+    if not future.done():
+        return "loading"
+    return "ready" if future.result() is not None else "failed"
+
+
+def _initialize_reader():
+    """The EasyOCR reader, waiting for the (single) load in progress if needed."""
+    return start_reader_warmup().result()
+
+
+async def wait_for_reader():
+    """Await the EasyOCR reader without blocking the event loop (None if it failed to load)."""
+    return await asyncio.wrap_future(start_reader_warmup())
 
 
 class OCRService:
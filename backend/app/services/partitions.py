@@ -0,0 +1,191 @@
+"""
+Monthly range partitioning of the attendance table (MySQL).
+Partitions are named pYYYYMM and hold one month each, with a catch-all pmax.
+Retention drops whole expired partitions instead of deleting rows; backends
+without partitioning (e.g. SQLite) fall back to deleting in small chunks.
+"""
+import logging
+from datetime import date
+from typing import List, Optional, Tuple
+from sqlalchemy import select, delete, func, text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.attendance import Attendance
+from app.services.rollup import rollup_service, month_start, next_month_start
+from app.services.versions import version_service
+
+logger = logging.getLogger(__name__)
+
+TABLE = Attendance.__tablename__
+MAXVALUE_PARTITION = "pmax"
+
+
+def partition_name(month: date) -> str:
+    return f"p{month.year:04d}{month.month:02d}"
+
+
+def _partition_month(name: str) -> Optional[date]:
+    """Month held by a pYYYYMM partition (None for pmax or foreign names)."""
+    try:
+        return date(int(name[1:5]), int(name[5:7]), 1)
+    except (ValueError, IndexError):
+        return None
+
+
+def _partition_clause(month: date) -> str:
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN ('{next_month_start(month).isoformat()}')"
+
+
+class PartitionManager:
+    """Service for creating, listing and dropping attendance partitions."""
+
+    @staticmethod
+    def supports_partitioning(db: Session) -> bool:
+        return db.get_bind().dialect.name == "mysql"
+
+    @staticmethod
+    def list_partitions(db: Session) -> List[Tuple[str, int]]:
+        """(partition name, estimated rows) in order; empty if the table is not partitioned."""
+        if not PartitionManager.supports_partitioning(db):
+            return []
+        rows = db.execute(text(
+            "SELECT PARTITION_NAME, TABLE_ROWS FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION"
+        ), {"table": TABLE}).all()
+        return [(row[0], int(row[1] or 0)) for row in rows]
+
+    @staticmethod
+    def is_partitioned(db: Session) -> bool:
+        return bool(PartitionManager.list_partitions(db))
+
+    @staticmethod
+    def partition_table(db: Session, months_ahead: Optional[int] = None) -> int:
+        """
+        Convert attendance into monthly partitions covering existing data through
+        months_ahead future months. MySQL requires every unique key to include the
+        partitioning column and does not allow foreign keys on partitioned tables,
+        so the primary key becomes (attendance_id, attendance_date) and the foreign
+        keys are dropped (deletes cascade through the ORM relationships instead).
+        Returns the number of month partitions created.
+        """
+        months_ahead = settings.ATTENDANCE_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+
+        foreign_keys = db.execute(text(
+            "SELECT CONSTRAINT_NAME FROM information_schema.TABLE_CONSTRAINTS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND CONSTRAINT_TYPE = 'FOREIGN KEY'"
+        ), {"table": TABLE}).scalars().all()
+        for name in foreign_keys:
+            db.execute(text(f"ALTER TABLE {TABLE} DROP FOREIGN KEY `{name}`"))
+
+        db.execute(text(
+            f"ALTER TABLE {TABLE} DROP PRIMARY KEY, ADD PRIMARY KEY (attendance_id, attendance_date)"
+        ))
+
+        oldest = db.execute(select(func.min(Attendance.attendance_date))).scalar()
+        month = month_start(oldest or date.today())
+        last = month_start(date.today())
+        for _ in range(months_ahead):
+            last = next_month_start(last)
+
+        clauses = []
+        while month <= last:
+            clauses.append(_partition_clause(month))
+            month = next_month_start(month)
+        clauses.append(f"PARTITION {MAXVALUE_PARTITION} VALUES LESS THAN (MAXVALUE)")
+
+        db.execute(text(
+            f"ALTER TABLE {TABLE} PARTITION BY RANGE COLUMNS(attendance_date) ({', '.join(clauses)})"
+        ))
+        logger.info(f"Partitioned {TABLE} into {len(clauses) - 1} monthly partitions")
+        return len(clauses) - 1
+
+    @staticmethod
+    def ensure_future_partitions(db: Session, months_ahead: Optional[int] = None) -> List[str]:
+        """
+        Split pmax so that partitions exist for the current month and months_ahead
+        months after it. No-op if the table is not partitioned. Returns created names.
+        """
+        months_ahead = settings.ATTENDANCE_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+        names = [name for name, _ in PartitionManager.list_partitions(db)]
+        if not names:
+            return []
+
+        months = [m for m in (_partition_month(name) for name in names) if m is not None]
+        month = next_month_start(max(months)) if months else month_start(date.today())
+        target = month_start(date.today())
+        for _ in range(months_ahead):
+            target = next_month_start(target)
+
+        clauses = []
+        created = []
+        while month <= target:
+            clauses.append(_partition_clause(month))
+            created.append(partition_name(month))
+            month = next_month_start(month)
+        if not clauses:
+            return []
+
+        clauses.append(f"PARTITION {MAXVALUE_PARTITION} VALUES LESS THAN (MAXVALUE)")
+        db.execute(text(
+            f"ALTER TABLE {TABLE} REORGANIZE PARTITION {MAXVALUE_PARTITION} INTO ({', '.join(clauses)})"
+        ))
+        logger.info(f"Created attendance partitions: {', '.join(created)}")
+        return created
+
+    @staticmethod
+    def drop_partitions_before(db: Session, cutoff_date: date) -> Tuple[List[str], int]:
+        """
+        Drop partitions holding only months before cutoff_date. Returns the dropped
+        names and their estimated row count (from table statistics).
+        """
+        cutoff_month = month_start(cutoff_date)
+        expired = [
+            (name, rows) for name, rows in PartitionManager.list_partitions(db)
+            if _partition_month(name) is not None and _partition_month(name) < cutoff_month
+        ]
+        if not expired:
+            return [], 0
+
+        names = [name for name, _ in expired]
+        db.execute(text(f"ALTER TABLE {TABLE} DROP PARTITION {', '.join(names)}"))
+        logger.info(f"Dropped attendance partitions: {', '.join(names)}")
+        return names, sum(rows for _, rows in expired)
+
+    @staticmethod
+    def delete_before_chunked(db: Session, cutoff_date: date, chunk_size: Optional[int] = None) -> int:
+        """
+        Delete attendance before cutoff_date in chunks, committing after each one
+        so no single transaction holds locks on the whole range. Each chunk's rollup
+        decrements and a global version bump commit with its delete, so a failure
+        part-way never leaves rollups or ETags stale. Returns rows deleted.
+        """
+        chunk_size = chunk_size or settings.CLEANUP_DELETE_CHUNK_SIZE
+        deleted = 0
+        while True:
+            rows = db.execute(
+                select(
+                    Attendance.attendance_id,
+                    Attendance.student_id,
+                    Attendance.class_id,
+                    Attendance.attendance_date,
+                    Attendance.status
+                ).where(
+                    Attendance.attendance_date < cutoff_date
+                ).limit(chunk_size)
+            ).all()
+            if not rows:
+                return deleted
+            result = db.execute(
+                delete(Attendance).where(Attendance.attendance_id.in_([row.attendance_id for row in rows])),
+                execution_options={"synchronize_session": False}
+            )
+            # Bulk deletes bypass the ORM listeners
+            rollup_service.subtract_rows(db, rows)
+            version_service.bump_global(db)
+            db.commit()
+            deleted += result.rowcount
+
+
+# Global instance
+partition_manager = PartitionManager()
@@ -0,0 +1,197 @@
+"""
+Content-addressed storage for student photos.
+Files are named by the SHA-256 of their bytes and sharded by the first two
+byte pairs of the digest, so uploads never collide and identical photos are
+stored once:
+
+    <UPLOAD_DIR>/photos/ab/cd/abcd...ef.jpg
+    <UPLOAD_DIR>/thumbs/<size>/ab/cd/abcd...ef.jpg
+
+Thumbnails at PHOTO_THUMBNAIL_SIZES are generated once per photo by a
+background worker thread; a missing thumbnail is generated on first request.
+Because a path's content can never change, both are served with immutable
+Cache-Control headers.
+"""
+import hashlib
+import os
+import queue
+import re
+import threading
+import logging
+from typing import Dict, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PHOTOS_DIR = "photos"
+THUMBS_DIR = "thumbs"
+THUMBNAIL_FORMAT = "JPEG"
+THUMBNAIL_EXTENSION = ".jpg"
+# Where main.py mounts UPLOAD_DIR
+UPLOADS_URL_PREFIX = "/uploads"
+
+# Matches a content-addressed path relative to UPLOAD_DIR: photos/ab/cd/<digest>.ext or thumbs/<size>/ab/cd/<digest>.jpg
+CONTENT_PATH_PATTERN = re.compile(
+    r"^(?:photos|thumbs/(?P<size>\d+))/[0-9a-f]{2}/[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})\.[A-Za-z0-9]+$"
+)
+
+
+def _shard(digest: str) -> str:
+    return os.path.join(digest[:2], digest[2:4])
+
+
+def _normalize_extension(filename: Optional[str]) -> str:
+    extension = os.path.splitext(filename or "")[1].lower()
+    return extension if re.fullmatch(r"\.[a-z0-9]{1,5}", extension) else ".jpg"
+
+
+class PhotoStore:
+    """Stores photos by content hash and generates their thumbnails in the background."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    # Paths
+
+    @staticmethod
+    def photo_path(digest: str, extension: str) -> str:
+        """Stored path (relative to the backend, as kept in StudentPhoto.photo_path)."""
+        return os.path.join(settings.UPLOAD_DIR, PHOTOS_DIR, _shard(digest), f"{digest}{extension}")
+
+    @staticmethod
+    def thumbnail_path(digest: str, size: int) -> str:
+        return os.path.join(settings.UPLOAD_DIR, THUMBS_DIR, str(size), _shard(digest), f"{digest}{THUMBNAIL_EXTENSION}")
+
+    @staticmethod
+    def digest_of(photo_path: Optional[str]) -> Optional[str]:
+        """Content digest of a stored photo path, or None for legacy (non content-addressed) files."""
+        if not photo_path:
+            return None
+        relative = os.path.relpath(photo_path, settings.UPLOAD_DIR).replace(os.sep, "/")
+        match = CONTENT_PATH_PATTERN.match(relative)
+        if not match or match.group("size") is not None:
+            return None
+        return match.group("digest")
+
+    @staticmethod
+    def thumbnail_urls(photo_path: Optional[str]) -> Optional[Dict[str, str]]:
+        """URL of each thumbnail size for a stored photo, or None for legacy files without thumbnails."""
+        digest = PhotoStore.digest_of(photo_path)
+        if digest is None:
+            return None
+        # Built from the mount prefix, not the on-disk path (UPLOAD_DIR may be relative or absolute)
+        return {
+            str(size): f"{UPLOADS_URL_PREFIX}/{THUMBS_DIR}/{size}/{digest[:2]}/{digest[2:4]}/{digest}{THUMBNAIL_EXTENSION}"
+            for size in settings.PHOTO_THUMBNAIL_SIZES
+        }
+
+    @staticmethod
+    def thumbnail_url(photo_path: Optional[str]) -> Optional[str]:
+        """URL of the smallest thumbnail (avatar size) for a stored photo."""
+        urls = PhotoStore.thumbnail_urls(photo_path)
+        return urls[str(min(settings.PHOTO_THUMBNAIL_SIZES))] if urls else None
+
+    # Writes
+
+    def save(self, content: bytes, filename: Optional[str] = None) -> tuple:
+        """
+        Store photo bytes under their content hash.
+        Returns (path, created); created is False when identical bytes were already stored.
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        path = self.photo_path(digest, _normalize_extension(filename))
+        if os.path.exists(path):
+            # Refresh the mtime so the storage GC's grace period covers the new reference
+            os.utime(path)
+            return path, False
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as buffer:
+            buffer.write(content)
+        os.replace(temp_path, path)
+        return path, True
+
+    def discard(self, path: str):
+        """Remove a stored photo and its thumbnails (only when no record references it)."""
+        digest = self.digest_of(path)
+        candidates = [path]
+        if digest is not None:
+            candidates += [self.thumbnail_path(digest, size) for size in settings.PHOTO_THUMBNAIL_SIZES]
+        for candidate in candidates:
+            try:
+                os.remove(candidate)
+            except FileNotFoundError:
+                pass
+
+    # Thumbnails
+
+    def generate_thumbnails(self, path: str) -> int:
+        """Write any missing thumbnails for a stored photo. Returns the number written."""
+        from PIL import Image, ImageOps
+
+        digest = self.digest_of(path)
+        if digest is None:
+            return 0
+        missing = [
+            size for size in settings.PHOTO_THUMBNAIL_SIZES
+            if not os.path.exists(self.thumbnail_path(digest, size))
+        ]
+        if not missing:
+            return 0
+
+        with Image.open(path) as source:
+            # Respect camera orientation, and drop alpha for JPEG output
+            image = ImageOps.exif_transpose(source).convert("RGB")
+        for size in sorted(missing, reverse=True):
+            thumbnail = image.copy()
+            thumbnail.thumbnail((size, size), Image.LANCZOS)
+            target = self.thumbnail_path(digest, size)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            temp_path = f"{target}.{threading.get_ident()}.tmp"
+            thumbnail.save(temp_path, THUMBNAIL_FORMAT, quality=85, optimize=True)
+            os.replace(temp_path, target)
+        return len(missing)
+
+    def ensure_thumbnail(self, digest: str, size: int) -> Optional[str]:
+        """Thumbnail path for a stored digest, generating it now if the worker has not yet."""
+        if size not in settings.PHOTO_THUMBNAIL_SIZES:
+            return None
+        target = self.thumbnail_path(digest, size)
+        if os.path.exists(target):
+            return target
+        photos_dir = os.path.join(settings.UPLOAD_DIR, PHOTOS_DIR, _shard(digest))
+        if not os.path.isdir(photos_dir):
+            return None
+        for name in os.listdir(photos_dir):
+            if name.startswith(digest) and not name.endswith(".tmp"):
+                self.generate_thumbnails(os.path.join(photos_dir, name))
+                return target if os.path.exists(target) else None
+        return None
+
+    def enqueue_thumbnails(self, path: str):
+        """Queue thumbnail generation for a stored photo on the background worker."""
+        self._start_worker()
+        self._queue.put(path)
+
+    def _start_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="photo-thumbnails", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            path = self._queue.get()
+            try:
+                self.generate_thumbnails(path)
+            except Exception as e:
+                logger.error(f"Error generating thumbnails for {path}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+
+# Global instance
+photo_store = PhotoStore()
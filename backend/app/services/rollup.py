@@ -0,0 +1,317 @@
+"""
+Attendance rollup maintenance.
+Keeps per-(student, class, month) present/absent counts in attendance_rollups
+up to date in the same transaction as every ORM attendance write, and answers
+windowed count queries from the rollups instead of scanning raw attendance.
+"""
+import logging
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event, inspect, select, insert, update, delete, bindparam, case, func, union_all
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Subquery
+from app.models.attendance import Attendance, AttendanceRollup, AttendanceStatus
+
+logger = logging.getLogger(__name__)
+
+rollups = AttendanceRollup.__table__
+
+# (student_id, class_id, month) -> [present_delta, absent_delta]
+RollupKey = Tuple[int, int, date]
+RollupDeltas = Dict[RollupKey, List[int]]
+
+
+def month_start(day: date) -> date:
+    """First day of the month containing day."""
+    return day.replace(day=1)
+
+
+def next_month_start(day: date) -> date:
+    """First day of the month after the one containing day."""
+    if day.month == 12:
+        return date(day.year + 1, 1, 1)
+    return date(day.year, day.month + 1, 1)
+
+
+def _status_index(value) -> Optional[int]:
+    """Index into a delta pair: 0 for present, 1 for absent."""
+    if value is None:
+        return None
+    return 0 if AttendanceStatus(value) == AttendanceStatus.present else 1
+
+
+def _add(deltas: RollupDeltas, student_id, class_id, attendance_date, status, sign: int):
+    index = _status_index(status)
+    if student_id is None or class_id is None or attendance_date is None or index is None:
+        return
+    key = (student_id, class_id, month_start(attendance_date))
+    deltas.setdefault(key, [0, 0])[index] += sign
+
+
+def _upsert_add(connection, rows: List[dict]):
+    """Insert rollup rows, adding to the counts of any row a concurrent transaction inserted first."""
+    dialect = connection.dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(rollups)
+        stmt = stmt.on_duplicate_key_update(
+            present_count=rollups.c.present_count + stmt.inserted.present_count,
+            absent_count=rollups.c.absent_count + stmt.inserted.absent_count
+        )
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        stmt = sqlite_insert(rollups)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[rollups.c.student_id, rollups.c.class_id, rollups.c.month],
+            set_={
+                "present_count": rollups.c.present_count + stmt.excluded.present_count,
+                "absent_count": rollups.c.absent_count + stmt.excluded.absent_count
+            }
+        )
+    else:
+        stmt = insert(rollups)
+    connection.execute(stmt, rows)
+
+
+class AttendanceRollupService:
+    """Service for maintaining and querying attendance rollups."""
+
+    @staticmethod
+    def collect_deltas(session: Session) -> RollupDeltas:
+        """Compute rollup deltas for the pending attendance changes in a session."""
+        deltas: RollupDeltas = {}
+
+        for obj in session.new:
+            if isinstance(obj, Attendance):
+                _add(deltas, obj.student_id, obj.class_id, obj.attendance_date, obj.status, 1)
+
+        for obj in session.deleted:
+            if isinstance(obj, Attendance):
+                _add(deltas, obj.student_id, obj.class_id, obj.attendance_date, obj.status, -1)
+
+        for obj in session.dirty:
+            if not isinstance(obj, Attendance) or not session.is_modified(obj):
+                continue
+            state = inspect(obj)
+            old, new = {}, {}
+            for attr in ("student_id", "class_id", "attendance_date", "status"):
+                history = state.attrs[attr].history
+                if history.has_changes():
+                    old[attr] = history.deleted[0] if history.deleted else None
+                    new[attr] = history.added[0] if history.added else None
+                else:
+                    old[attr] = new[attr] = getattr(obj, attr)
+            if old == new:
+                continue
+            _add(deltas, old["student_id"], old["class_id"], old["attendance_date"], old["status"], -1)
+            _add(deltas, new["student_id"], new["class_id"], new["attendance_date"], new["status"], 1)
+
+        # Drop keys whose changes cancelled out
+        return {key: delta for key, delta in deltas.items() if delta != [0, 0]}
+
+    @staticmethod
+    def apply_deltas(session: Session, deltas: RollupDeltas):
+        """
+        Apply rollup deltas with a fixed number of statements:
+        one lookup of existing rows, one batched UPDATE and one batched upsert.
+        """
+        if not deltas:
+            return
+
+        connection = session.connection()
+        student_ids = {key[0] for key in deltas}
+        class_ids = {key[1] for key in deltas}
+        months = {key[2] for key in deltas}
+        existing = {
+            (row.student_id, row.class_id, row.month)
+            for row in connection.execute(
+                select(rollups.c.student_id, rollups.c.class_id, rollups.c.month).where(
+                    rollups.c.student_id.in_(student_ids),
+                    rollups.c.class_id.in_(class_ids),
+                    rollups.c.month.in_(months)
+                )
+            )
+        }
+
+        updates = []
+        inserts = []
+        for (student_id, class_id, month), (present, absent) in deltas.items():
+            if (student_id, class_id, month) in existing:
+                updates.append({
+                    "b_student_id": student_id,
+                    "b_class_id": class_id,
+                    "b_month": month,
+                    "b_present": present,
+                    "b_absent": absent,
+                })
+            elif present > 0 or absent > 0:
+                # Counts can only go negative if rollups were never backfilled; clamp at zero
+                inserts.append({
+                    "student_id": student_id,
+                    "class_id": class_id,
+                    "month": month,
+                    "present_count": max(present, 0),
+                    "absent_count": max(absent, 0),
+                })
+            # Otherwise only removals for a missing row, e.g. a student or class delete whose
+            # rollups the database already cascaded away: re-inserting would point at the deleted row
+
+        if updates:
+            connection.execute(
+                update(rollups).where(
+                    rollups.c.student_id == bindparam("b_student_id"),
+                    rollups.c.class_id == bindparam("b_class_id"),
+                    rollups.c.month == bindparam("b_month")
+                ).values(
+                    present_count=rollups.c.present_count + bindparam("b_present"),
+                    absent_count=rollups.c.absent_count + bindparam("b_absent")
+                ),
+                updates
+            )
+        if inserts:
+            _upsert_add(connection, inserts)
+
+    @staticmethod
+    def subtract_rows(session: Session, rows):
+        """Decrement rollups for bulk-deleted attendance rows (student_id, class_id, attendance_date, status)."""
+        deltas: RollupDeltas = {}
+        for row in rows:
+            _add(deltas, row.student_id, row.class_id, row.attendance_date, row.status, -1)
+        AttendanceRollupService.apply_deltas(session, deltas)
+
+    @staticmethod
+    def window_counts_subquery(
+        start_date: date,
+        student_id: Optional[int] = None,
+        class_id: Optional[int] = None
+    ) -> Subquery:
+        """
+        Subquery of (student_id, class_id, present_count, absent_count) rows covering
+        attendance on or after start_date.
+
+        Whole months come from the rollups; the partial first month (if start_date is
+        not the first of a month) is counted from raw attendance, bounded to that month.
+        Sum the rows grouped as needed.
+        """
+        first_full_month = start_date if start_date.day == 1 else next_month_start(start_date)
+
+        from_rollups = select(
+            rollups.c.student_id,
+            rollups.c.class_id,
+            rollups.c.present_count.label("present_count"),
+            rollups.c.absent_count.label("absent_count")
+        ).where(rollups.c.month >= first_full_month)
+        if student_id is not None:
+            from_rollups = from_rollups.where(rollups.c.student_id == student_id)
+        if class_id is not None:
+            from_rollups = from_rollups.where(rollups.c.class_id == class_id)
+
+        if first_full_month == start_date:
+            return from_rollups.subquery("window_counts")
+
+        from_raw = select(
+            Attendance.student_id,
+            Attendance.class_id,
+            func.sum(case((Attendance.status == AttendanceStatus.present, 1), else_=0)).label("present_count"),
+            func.sum(case((Attendance.status == AttendanceStatus.absent, 1), else_=0)).label("absent_count")
+        ).where(
+            Attendance.attendance_date >= start_date,
+            Attendance.attendance_date < first_full_month
+        )
+        if student_id is not None:
+            from_raw = from_raw.where(Attendance.student_id == student_id)
+        if class_id is not None:
+            from_raw = from_raw.where(Attendance.class_id == class_id)
+        from_raw = from_raw.group_by(Attendance.student_id, Attendance.class_id)
+
+        return union_all(from_rollups, from_raw).subquery("window_counts")
+
+    @staticmethod
+    def _insert_aggregates(db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None):
+        """Insert rollup rows aggregated from raw attendance in [start_date, end_date)."""
+        year = func.extract("year", Attendance.attendance_date)
+        month = func.extract("month", Attendance.attendance_date)
+        query = select(
+            Attendance.student_id,
+            Attendance.class_id,
+            year.label("year"),
+            month.label("month"),
+            func.sum(case((Attendance.status == AttendanceStatus.present, 1), else_=0)).label("present_count"),
+            func.sum(case((Attendance.status == AttendanceStatus.absent, 1), else_=0)).label("absent_count")
+        )
+        if start_date is not None:
+            query = query.where(Attendance.attendance_date >= start_date)
+        if end_date is not None:
+            query = query.where(Attendance.attendance_date < end_date)
+        query = query.group_by(Attendance.student_id, Attendance.class_id, year, month)
+
+        batch = []
+        inserted = 0
+        for row in db.execute(query):
+            batch.append({
+                "student_id": row.student_id,
+                "class_id": row.class_id,
+                "month": date(int(row.year), int(row.month), 1),
+                "present_count": int(row.present_count or 0),
+                "absent_count": int(row.absent_count or 0),
+            })
+            if len(batch) >= 1000:
+                db.execute(insert(rollups), batch)
+                inserted += len(batch)
+                batch = []
+        if batch:
+            db.execute(insert(rollups), batch)
+            inserted += len(batch)
+        return inserted
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """Rebuild all rollups from raw attendance. Caller commits."""
+        db.execute(delete(rollups))
+        inserted = AttendanceRollupService._insert_aggregates(db)
+        logger.info(f"Rebuilt {inserted} attendance rollup rows")
+        return inserted
+
+    @staticmethod
+    def resync_before(db: Session, cutoff_date: date):
+        """
+        Bring rollups in line after raw attendance before cutoff_date was bulk-deleted.
+        Drops rollups for months entirely before the cutoff and recomputes the cutoff's
+        own month. Caller commits (in the same transaction as the delete).
+        """
+        cutoff_month = month_start(cutoff_date)
+        db.execute(delete(rollups).where(rollups.c.month < cutoff_month))
+        if cutoff_date != cutoff_month:
+            db.execute(delete(rollups).where(rollups.c.month == cutoff_month))
+            AttendanceRollupService._insert_aggregates(db, cutoff_month, next_month_start(cutoff_month))
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_rollup_deltas(session, flush_context, instances):
+    """Capture attendance changes while previous values are still available."""
+    with session.no_autoflush:
+        deltas = AttendanceRollupService.collect_deltas(session)
+    if deltas:
+        pending = session.info.setdefault("rollup_deltas", {})
+        for key, (present, absent) in deltas.items():
+            delta = pending.setdefault(key, [0, 0])
+            delta[0] += present
+            delta[1] += absent
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_rollup_deltas(session, flush_context):
+    """Apply captured deltas in the same transaction as the attendance writes."""
+    deltas = session.info.pop("rollup_deltas", None)
+    if deltas:
+        AttendanceRollupService.apply_deltas(session, deltas)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rollup_deltas(session, previous_transaction):
+    """Discard deltas captured for a flush that was rolled back."""
+    session.info.pop("rollup_deltas", None)
+
+
+# Global instance
+rollup_service = AttendanceRollupService()
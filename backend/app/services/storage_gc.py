@@ -0,0 +1,240 @@
+"""
+Garbage collection of orphaned files under UPLOAD_DIR.
+A scheduled job walks the upload tree in sorted order, a bounded number of
+files per run, resuming after the last path it saw (and wrapping around at the
+end). Candidates are diffed against the database in batches:
+
+    photos/...              orphan when no StudentPhoto.photo_path references it
+    thumbs/<size>/...       orphan when its source photo is gone
+    class_photos/...        always temporary (recognition scans); any leftover is orphaned
+    *.tmp                   interrupted writes
+
+Only files older than STORAGE_GC_GRACE_HOURS are considered, so uploads whose
+database row is not committed yet are never touched. Orphans are moved to
+STORAGE_QUARANTINE_DIR (mode "quarantine", purged after
+STORAGE_QUARANTINE_DAYS) or deleted outright (mode "delete").
+"""
+import os
+import shutil
+import time
+import logging
+from datetime import date, datetime, timedelta
+from typing import Iterator, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import STORAGE_GC_FILES, STORAGE_GC_BYTES
+from app.models.user import StudentPhoto
+from app.services.photo_store import PhotoStore, PHOTOS_DIR, THUMBS_DIR, CONTENT_PATH_PATTERN
+
+logger = logging.getLogger(__name__)
+
+CLASS_PHOTOS_DIR = "class_photos"
+GC_MODES = ("quarantine", "delete")
+
+
+def _kind(relative: str) -> Optional[str]:
+    """Which rule applies to a path relative to UPLOAD_DIR (None: never collected)."""
+    if relative.endswith(".tmp"):
+        return "tmp"
+    top = relative.split("/", 1)[0]
+    if top == PHOTOS_DIR:
+        return "photo"
+    if top == THUMBS_DIR:
+        return "thumbnail"
+    if top == CLASS_PHOTOS_DIR:
+        return "class_photo"
+    return None
+
+
+class StorageGarbageCollector:
+    """Incrementally reconciles the upload tree against StudentPhoto rows."""
+
+    def __init__(self):
+        # Last relative path examined; the next run resumes after it
+        self._cursor = ""
+
+    def _walk_from(self, cursor: str) -> Iterator[str]:
+        """Relative paths under UPLOAD_DIR in sorted order, strictly after cursor."""
+        root = settings.UPLOAD_DIR
+
+        def walk(directory: str, prefix: str) -> Iterator[str]:
+            try:
+                # Directories sort with their trailing slash, so the walk follows path order
+                entries = sorted(
+                    os.scandir(directory),
+                    key=lambda entry: entry.name + "/" if entry.is_dir(follow_symlinks=False) else entry.name
+                )
+            except FileNotFoundError:
+                return
+            for entry in entries:
+                relative = f"{prefix}{entry.name}"
+                if entry.is_dir(follow_symlinks=False):
+                    # Skip whole directories that sort before the cursor
+                    if relative + "/" < cursor and not cursor.startswith(relative + "/"):
+                        continue
+                    yield from walk(entry.path, relative + "/")
+                elif entry.is_file(follow_symlinks=False) and relative > cursor:
+                    yield relative
+
+        return walk(root, "")
+
+    def _next_files(self, limit: int) -> List[str]:
+        """Up to limit files after the cursor, advancing it (back to the start at the end of the tree)."""
+        files = []
+        for relative in self._walk_from(self._cursor):
+            files.append(relative)
+            if len(files) >= limit:
+                break
+        self._cursor = files[-1] if len(files) >= limit else ""
+        return files
+
+    @staticmethod
+    def _referenced_photos(db: Session, relatives: List[str]) -> set:
+        """Which of these photos/ paths a StudentPhoto row references (stored paths include UPLOAD_DIR)."""
+        stored = {os.path.join(settings.UPLOAD_DIR, *relative.split("/")): relative for relative in relatives}
+        referenced = set()
+        keys = list(stored)
+        for start in range(0, len(keys), settings.STORAGE_GC_BATCH_SIZE):
+            batch = keys[start:start + settings.STORAGE_GC_BATCH_SIZE]
+            # Match both separators, for rows written on another OS
+            candidates = batch + [path.replace(os.sep, "/") for path in batch]
+            rows = db.query(StudentPhoto.photo_path).filter(StudentPhoto.photo_path.in_(candidates)).all()
+            for (photo_path,) in rows:
+                referenced.add(stored.get(photo_path) or stored.get(photo_path.replace("/", os.sep)))
+        return referenced
+
+    @staticmethod
+    def _source_photo_exists(relative: str) -> bool:
+        """Whether the original of a thumbnail is still stored."""
+        match = CONTENT_PATH_PATTERN.match(relative)
+        if not match:
+            return False
+        digest = match.group("digest")
+        photos_dir = os.path.dirname(PhotoStore.photo_path(digest, ""))
+        try:
+            return any(name.startswith(digest) and not name.endswith(".tmp") for name in os.listdir(photos_dir))
+        except FileNotFoundError:
+            return False
+
+    def _find_orphans(self, db: Session, files: List[str], cutoff: float) -> List[Tuple[str, str, int]]:
+        """(relative path, kind, size) for each orphan among files older than cutoff (a timestamp)."""
+        candidates = []
+        for relative in files:
+            kind = _kind(relative)
+            if kind is None:
+                continue
+            try:
+                stat_result = os.stat(os.path.join(settings.UPLOAD_DIR, relative))
+            except FileNotFoundError:
+                continue
+            STORAGE_GC_FILES.inc(kind=kind, action="scanned")
+            if stat_result.st_mtime < cutoff:
+                candidates.append((relative, kind, stat_result.st_size))
+
+        referenced = self._referenced_photos(db, [relative for relative, kind, _ in candidates if kind == "photo"])
+        orphans = []
+        for relative, kind, size in candidates:
+            if kind == "photo" and relative in referenced:
+                continue
+            if kind == "thumbnail" and self._source_photo_exists(relative):
+                continue
+            orphans.append((relative, kind, size))
+        return orphans
+
+    @staticmethod
+    def _still_expired(relative: str, cutoff: float) -> bool:
+        try:
+            return os.stat(os.path.join(settings.UPLOAD_DIR, relative)).st_mtime < cutoff
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def _quarantine(relative: str):
+        target = os.path.join(settings.STORAGE_QUARANTINE_DIR, date.today().isoformat(), *relative.split("/"))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(os.path.join(settings.UPLOAD_DIR, relative), target)
+
+    def _purge_quarantine(self) -> int:
+        """Delete quarantine day directories older than STORAGE_QUARANTINE_DAYS. Returns bytes freed."""
+        root = settings.STORAGE_QUARANTINE_DIR
+        if not os.path.isdir(root):
+            return 0
+        expiry = date.today() - timedelta(days=settings.STORAGE_QUARANTINE_DAYS)
+        freed = 0
+        for name in os.listdir(root):
+            try:
+                day = date.fromisoformat(name)
+            except ValueError:
+                continue
+            if day >= expiry:
+                continue
+            directory = os.path.join(root, name)
+            for dirpath, _, filenames in os.walk(directory):
+                for filename in filenames:
+                    try:
+                        freed += os.path.getsize(os.path.join(dirpath, filename))
+                    except OSError:
+                        pass
+            shutil.rmtree(directory, ignore_errors=True)
+        return freed
+
+    def collect(self, db: Session, max_files: Optional[int] = None, dry_run: bool = False) -> dict:
+        """
+        Examine the next slice of the upload tree and remove or quarantine its orphans.
+
+        Args:
+            db: Database session
+            max_files: Files to examine in this run (default: STORAGE_GC_MAX_FILES_PER_RUN)
+            dry_run: Report orphans without touching them
+
+        Returns:
+            dict with collection statistics
+        """
+        mode = settings.STORAGE_GC_MODE
+        if mode not in GC_MODES:
+            raise ValueError(f"Unsupported STORAGE_GC_MODE: {mode}. Use one of: {', '.join(GC_MODES)}")
+
+        files = self._next_files(max_files or settings.STORAGE_GC_MAX_FILES_PER_RUN)
+        cutoff = time.time() - settings.STORAGE_GC_GRACE_HOURS * 3600
+        orphans = self._find_orphans(db, files, cutoff)
+
+        removed, reclaimed, errors = 0, 0, 0
+        if not dry_run:
+            for relative, kind, size in orphans:
+                # A re-upload of the same bytes may have reused the file since it was checked
+                # (PhotoStore.save refreshes its mtime); only collect it if it is still old
+                if not self._still_expired(relative, cutoff):
+                    continue
+                try:
+                    if mode == "quarantine":
+                        self._quarantine(relative)
+                    else:
+                        os.remove(os.path.join(settings.UPLOAD_DIR, relative))
+                except FileNotFoundError:
+                    continue
+                except OSError as e:
+                    errors += 1
+                    logger.error(f"Error collecting {relative}: {str(e)}")
+                    continue
+                removed += 1
+                reclaimed += size
+                STORAGE_GC_FILES.inc(kind=kind, action="quarantined" if mode == "quarantine" else "removed")
+                STORAGE_GC_BYTES.inc(size, kind=kind)
+        purged = self._purge_quarantine() if mode == "quarantine" and not dry_run else 0
+
+        return {
+            "status": "success",
+            "mode": "dry_run" if dry_run else mode,
+            "scanned_files": len(files),
+            "orphaned_files": len(orphans),
+            "collected_files": removed,
+            "reclaimed_bytes": reclaimed,
+            "purged_quarantine_bytes": purged,
+            "errors": errors,
+            "orphans": [relative for relative, _, _ in orphans] if dry_run else [],
+            "finished_at": datetime.now().isoformat()
+        }
+
+
+# Global instance
+storage_gc = StorageGarbageCollector()
@@ -0,0 +1,106 @@
+"""
+Refresh tokens with rotation.
+Login issues a short-lived access token and a refresh token. Exchanging the
+refresh token at /auth/refresh revokes it and issues a new pair in the same
+family, so clients renew access without sending the password (and running
+bcrypt) again. A revoked token presented a second time means it was copied,
+so the whole family is revoked and that login must start over.
+"""
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from sqlalchemy import update, delete
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.security import create_refresh_token, decode_refresh_token
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshTokenService:
+    """Service for issuing, rotating and revoking refresh tokens."""
+
+    @staticmethod
+    def issue(db: Session, user: User, family_id: Optional[str] = None) -> str:
+        """Create a refresh token for user (a new family unless one is given). Caller commits."""
+        jti = uuid.uuid4().hex
+        family_id = family_id or uuid.uuid4().hex
+        expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        db.add(RefreshToken(jti=jti, family_id=family_id, user_id=user.user_id, expires_at=expires_at))
+        return create_refresh_token(user.username, jti, family_id, expires_at)
+
+    @staticmethod
+    def rotate(db: Session, token: str) -> Optional[Tuple[User, str]]:
+        """
+        Revoke token and issue its replacement. Returns (user, new refresh token),
+        or None if the token is invalid, expired, revoked or its user is inactive.
+        """
+        payload = decode_refresh_token(token)
+        if payload is None:
+            return None
+
+        # Revoke atomically so two concurrent refreshes cannot both succeed
+        result = db.execute(
+            update(RefreshToken).where(
+                RefreshToken.jti == payload["jti"],
+                RefreshToken.revoked == False,
+                RefreshToken.expires_at > datetime.utcnow()
+            ).values(revoked=True)
+        )
+        if result.rowcount != 1:
+            reused = db.query(RefreshToken.jti).filter(
+                RefreshToken.jti == payload["jti"], RefreshToken.revoked == True
+            ).first()
+            if reused:
+                revoked = RefreshTokenService.revoke_family(db, payload["fam"])
+                logger.warning(
+                    f"Refresh token reuse for user {payload.get('sub')}; revoked {revoked} tokens in its family"
+                )
+            db.commit()
+            return None
+
+        user = db.query(User).filter(User.username == payload.get("sub")).first()
+        if user is None or not user.is_active:
+            db.commit()
+            return None
+
+        new_token = RefreshTokenService.issue(db, user, payload["fam"])
+        db.commit()
+        return user, new_token
+
+    @staticmethod
+    def revoke_family(db: Session, family_id: str) -> int:
+        """Revoke every token issued from one login. Caller commits."""
+        result = db.execute(
+            update(RefreshToken).where(
+                RefreshToken.family_id == family_id,
+                RefreshToken.revoked == False
+            ).values(revoked=True)
+        )
+        return result.rowcount
+
+    @staticmethod
+    def revoke(db: Session, token: str) -> bool:
+        """Log out: revoke the token's family. Returns False if the token is invalid."""
+        payload = decode_refresh_token(token)
+        if payload is None:
+            return False
+        RefreshTokenService.revoke_family(db, payload["fam"])
+        db.commit()
+        return True
+
+    @staticmethod
+    def prune_expired(db: Session) -> int:
+        """Delete expired tokens (they can no longer be used or replayed). Returns rows deleted."""
+        result = db.execute(
+            delete(RefreshToken).where(RefreshToken.expires_at <= datetime.utcnow())
+        )
+        db.commit()
+        return result.rowcount
+
+
+# Global instance
+refresh_token_service = RefreshTokenService()
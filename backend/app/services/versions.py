@@ -0,0 +1,225 @@
+"""
+Per-scope data versions.
+Every ORM write bumps the version of the affected classes, students and teachers
+in the same transaction, so caches and ETags can be keyed by versions and never
+serve stale data, across all workers. Bulk deletes that bypass the ORM (cleanup)
+bump the global epoch instead.
+"""
+import hashlib
+import logging
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Mapping, Set, Tuple
+from sqlalchemy import event, select, update, insert, or_, and_
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.user import User, StudentPhoto
+from app.models.attendance import Attendance
+from app.models.class_model import Class, Enrollment
+from app.models.data_version import DataVersion
+
+logger = logging.getLogger(__name__)
+
+versions = DataVersion.__table__
+enrollments = Enrollment.__table__
+
+SCOPE_CLASS = "class"  # Attendance, roster and details of a class
+SCOPE_STUDENT = "student"  # A student's attendance, enrollments and profile
+SCOPE_TEACHER = "teacher"  # The set and details of a teacher's classes
+SCOPE_GLOBAL = "global"  # Epoch bumped by bulk writes that bypass the ORM
+GLOBAL_ID = 0
+
+
+def _upsert_increment(connection: Connection, scope: str, scope_ids: Iterable[int]):
+    """Increment (or create at 1) the version of each scope id in one statement."""
+    # Sorted to take row locks in a consistent order across transactions
+    rows = [{"scope": scope, "scope_id": scope_id, "version": 1} for scope_id in sorted(scope_ids)]
+    if not rows:
+        return
+
+    dialect = connection.dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(versions)
+        stmt = stmt.on_duplicate_key_update(version=versions.c.version + 1)
+        connection.execute(stmt, rows)
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        stmt = sqlite_insert(versions)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[versions.c.scope, versions.c.scope_id],
+            set_={"version": versions.c.version + 1}
+        )
+        connection.execute(stmt, rows)
+    else:
+        existing = set(connection.execute(
+            select(versions.c.scope_id).where(
+                versions.c.scope == scope,
+                versions.c.scope_id.in_([row["scope_id"] for row in rows])
+            )
+        ).scalars())
+        for row in rows:
+            if row["scope_id"] in existing:
+                connection.execute(
+                    update(versions).where(
+                        versions.c.scope == scope,
+                        versions.c.scope_id == row["scope_id"]
+                    ).values(version=versions.c.version + 1)
+                )
+            else:
+                connection.execute(insert(versions), [row])
+
+
+class DataVersionService:
+    """Service for reading and bumping data versions."""
+
+    @staticmethod
+    def bump(db: Session, scope: str, scope_ids: Iterable[int]):
+        """Bump versions for the given scope ids in the session's current transaction."""
+        _upsert_increment(db.connection(), scope, set(scope_ids))
+
+    @staticmethod
+    def bump_global(db: Session):
+        """Bump the global epoch, invalidating every versioned cache and ETag."""
+        _upsert_increment(db.connection(), SCOPE_GLOBAL, [GLOBAL_ID])
+
+    @staticmethod
+    def get(db: Session, scope: str, scope_ids: Iterable[int]) -> Dict[int, int]:
+        """Current versions for the given scope ids (0 for ids never written)."""
+        scope_ids = set(scope_ids)
+        if not scope_ids:
+            return {}
+        found = dict(db.execute(
+            select(versions.c.scope_id, versions.c.version).where(
+                versions.c.scope == scope,
+                versions.c.scope_id.in_(scope_ids)
+            )
+        ).all())
+        return {scope_id: found.get(scope_id, 0) for scope_id in scope_ids}
+
+    @staticmethod
+    def get_many(db: Session, scopes: Mapping[str, Iterable[int]]) -> Dict[str, Dict[int, int]]:
+        """get() for several scopes at once, in one query."""
+        scopes = {scope: sorted(set(ids)) for scope, ids in scopes.items()}
+        if not any(scopes.values()):
+            return {scope: {} for scope in scopes}
+        found = {
+            (row.scope, row.scope_id): row.version
+            for row in db.execute(DataVersionService._etag_query(scopes))
+        }
+        return {
+            scope: {scope_id: found.get((scope, scope_id), 0) for scope_id in ids}
+            for scope, ids in scopes.items()
+        }
+
+    @staticmethod
+    def _etag_scopes(scopes: Mapping[str, Iterable[int]]) -> Dict[str, List[int]]:
+        scopes = {scope: sorted(set(ids)) for scope, ids in scopes.items()}
+        scopes[SCOPE_GLOBAL] = [GLOBAL_ID]
+        return scopes
+
+    @staticmethod
+    def _etag_query(scopes: Dict[str, List[int]]):
+        conditions = [
+            and_(versions.c.scope == scope, versions.c.scope_id.in_(ids))
+            for scope, ids in scopes.items() if ids
+        ]
+        return select(versions.c.scope, versions.c.scope_id, versions.c.version).where(or_(*conditions))
+
+    @staticmethod
+    def _etag_value(scopes: Dict[str, List[int]], rows, extra) -> str:
+        found = {(row.scope, row.scope_id): row.version for row in rows}
+        parts = [date.today().isoformat()]
+        for scope in sorted(scopes):
+            parts.append(scope + ":" + ",".join(
+                f"{scope_id}={found.get((scope, scope_id), 0)}" for scope_id in scopes[scope]
+            ))
+        parts.extend(repr(value) for value in extra)
+        return '"' + hashlib.sha1("|".join(parts).encode()).hexdigest() + '"'
+
+    @staticmethod
+    def etag(db: Session, scopes: Mapping[str, Iterable[int]], *extra) -> str:
+        """
+        Strong ETag over the versions of the given scopes, the global epoch and
+        today's date (date-windowed responses change at midnight without a write).
+        Extra values (e.g. query parameters) are mixed in as well. One query.
+        """
+        scopes = DataVersionService._etag_scopes(scopes)
+        rows = db.execute(DataVersionService._etag_query(scopes))
+        return DataVersionService._etag_value(scopes, rows, extra)
+
+    @staticmethod
+    async def etag_async(db: AsyncSession, scopes: Mapping[str, Iterable[int]], *extra) -> str:
+        """etag() for async sessions."""
+        scopes = DataVersionService._etag_scopes(scopes)
+        rows = await db.execute(DataVersionService._etag_query(scopes))
+        return DataVersionService._etag_value(scopes, rows, extra)
+
+
+def _changed(session: Session, obj) -> bool:
+    return obj in session.new or obj in session.deleted or session.is_modified(obj)
+
+
+def _changed_scopes(session: Session) -> Tuple[Dict[str, Set[int]], Set[int], Set[int]]:
+    """
+    Scope ids touched by the session's pending changes, plus the students whose
+    enrolled classes and the classes whose enrolled students need a bump too.
+    """
+    bumps: Dict[str, Set[int]] = defaultdict(set)
+    changed_students: Set[int] = set()
+    changed_classes: Set[int] = set()
+
+    for obj in list(session.new) + list(session.deleted) + list(session.dirty):
+        if not _changed(session, obj):
+            continue
+        if isinstance(obj, (Attendance, Enrollment)):
+            bumps[SCOPE_CLASS].add(obj.class_id)
+            bumps[SCOPE_STUDENT].add(obj.student_id)
+        elif isinstance(obj, Class):
+            bumps[SCOPE_CLASS].add(obj.class_id)
+            bumps[SCOPE_TEACHER].add(obj.teacher_id)
+            # Class names appear in enrolled students' views
+            changed_classes.add(obj.class_id)
+        elif isinstance(obj, User):
+            bumps[SCOPE_STUDENT].add(obj.user_id)
+            # Names, roll numbers and photos appear in class rosters
+            changed_students.add(obj.user_id)
+        elif isinstance(obj, StudentPhoto):
+            changed_students.add(obj.user_id)
+
+    for scope in bumps:
+        bumps[scope].discard(None)
+    changed_students.discard(None)
+    changed_classes.discard(None)
+    return bumps, changed_students, changed_classes
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_version_bumps(session, flush_context):
+    """
+    Bump versions in the same transaction as the flushed writes. Runs after the
+    flush so new rows have ids; new/dirty/deleted still describe the flush.
+    """
+    with session.no_autoflush:
+        bumps, changed_students, changed_classes = _changed_scopes(session)
+    if not bumps and not changed_students and not changed_classes:
+        return
+
+    connection = session.connection()
+    if changed_students:
+        bumps[SCOPE_CLASS].update(connection.execute(
+            select(enrollments.c.class_id).where(enrollments.c.student_id.in_(changed_students))
+        ).scalars())
+    if changed_classes:
+        bumps[SCOPE_STUDENT].update(connection.execute(
+            select(enrollments.c.student_id).where(enrollments.c.class_id.in_(changed_classes))
+        ).scalars())
+
+    # Fixed scope order keeps lock order consistent across transactions
+    for scope in sorted(bumps):
+        _upsert_increment(connection, scope, bumps[scope])
+
+
+# Global instance
+version_service = DataVersionService()
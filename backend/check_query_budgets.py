@@ -0,0 +1,241 @@
+"""
+Script to check that no endpoint's SQL statement count grows with the data.
+Seeds a scratch SQLite database at a small and a large size (students per
+class), calls each endpoint once at both sizes and fails if the large run
+issues more statements than the small one, listing the statement shapes
+that grew. An extra query inside a loop (N+1) shows up here as a failure.
+
+Each size runs in its own process so in-memory caches start empty. The
+configured database is not touched.
+
+Usage:
+    python check_query_budgets.py [--small 10] [--large 500] [--days 30]
+"""
+import sys
+import os
+import argparse
+import asyncio
+import json
+import subprocess
+import tempfile
+from datetime import date, timedelta
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _checks(ids):
+    """(label, method, path, user, body) for each endpoint under budget."""
+    class_id, other_class_id = ids["class_id"], ids["other_class_id"]
+    today = date.today().isoformat()
+    return [
+        ("teacher classes", "GET", "/classes/my-classes", "teacher", None),
+        ("class roster", "GET", f"/classes/{class_id}/students", "teacher", None),
+        ("class roster by attendance", "GET", f"/classes/{class_id}/students?sort=attendance", "teacher", None),
+        ("all students", "GET", "/students/", "teacher", None),
+        ("class attendance list", "GET", f"/attendance/?class_id={class_id}", "teacher", None),
+        ("class attendance export", "GET", f"/attendance/export?class_id={class_id}", "teacher", None),
+        ("below threshold", "GET", f"/attendance/analytics/class/{class_id}/below-threshold", "teacher", None),
+        ("heatmap", "GET", f"/attendance/analytics/class/{class_id}/heatmap", "teacher", None),
+        ("student profile", "GET", "/auth/me", "student", None),
+        ("student stats", "GET", "/attendance/my-stats", "student", None),
+        ("student calendar", "GET", "/attendance/calendar", "student", None),
+        ("student attendance list", "GET", "/attendance/", "student", None),
+        ("student classes", "GET", "/classes/my-enrolled-classes", "student", None),
+        # Writes whose size scales with the class
+        ("bulk attendance edit", "PUT", "/attendance/bulk", "teacher", {
+            "class_id": class_id,
+            "items": [
+                {"student_id": student_id, "attendance_date": today, "status": "present"}
+                for student_id in ids["student_ids"]
+            ]
+        }),
+        ("bulk enrollment", "POST", "/classes/enroll-bulk", "teacher", {
+            "class_id": other_class_id, "student_ids": ids["student_ids"]
+        }),
+    ]
+
+
+def seed(db, students: int, days: int) -> dict:
+    """One teacher with two classes; every student in the first, with photos and daily attendance."""
+    from sqlalchemy import insert, select
+    from app.models.user import User, StudentPhoto
+    from app.models.class_model import Class, Enrollment
+    from app.models.attendance import Attendance
+    from app.services.rollup import rollup_service
+
+    teacher = User(username="budget_teacher", email="budget_teacher@example.edu", full_name="Teacher",
+                   hashed_password="-", role="teacher")
+    db.add(teacher)
+    db.flush()
+    classes = [Class(class_name=name, class_code=name, teacher_id=teacher.user_id) for name in ("B1", "B2")]
+    db.add_all(classes)
+    db.flush()
+
+    db.execute(insert(User), [
+        {
+            "username": f"budget_student{i}", "email": f"budget_student{i}@example.edu",
+            "full_name": f"Student {i}", "hashed_password": "-", "role": "student",
+            "student_id": f"B{i:06d}", "branch": "CSE", "year_of_joining": date.today().year
+        }
+        for i in range(students)
+    ])
+    student_ids = db.execute(select(User.user_id).where(User.role == "student").order_by(User.user_id)).scalars().all()
+    db.execute(insert(StudentPhoto), [
+        {"user_id": student_id, "photo_path": f"uploads/photos/budget_{student_id}.jpg", "is_primary": True}
+        for student_id in student_ids
+    ])
+    db.execute(insert(Enrollment), [
+        {"student_id": student_id, "class_id": classes[0].class_id} for student_id in student_ids
+    ])
+    # History up to yesterday, so the bulk edit creates today's records
+    today = date.today()
+    db.execute(insert(Attendance), [
+        {
+            "student_id": student_id, "class_id": classes[0].class_id,
+            "attendance_date": today - timedelta(days=day),
+            "status": "present" if (student_id + day) % 4 else "absent", "marked_by": "system"
+        }
+        for student_id in student_ids
+        for day in range(1, days + 1)
+    ])
+    rollup_service.rebuild(db)
+    db.commit()
+    return {
+        "class_id": classes[0].class_id,
+        "other_class_id": classes[1].class_id,
+        "student_ids": list(student_ids),
+        "teacher": teacher.username,
+        "student": "budget_student0"
+    }
+
+
+async def _call(app, method: str, path: str, headers: dict, body=None):
+    """Call the ASGI app directly (no server, no lifespan jobs). Returns the status code."""
+    path, _, query = path.partition("?")
+    content = json.dumps(body).encode() if body is not None else b""
+    headers = dict(headers, **({"content-type": "application/json"} if body is not None else {}))
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query.encode(), "client": ("127.0.0.1", 0), "server": ("localhost", 80),
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()]
+    }
+    messages = [{"type": "http.request", "body": content, "more_body": False}]
+    result = {}
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+
+    await app(scope, receive, send)
+    return result.get("status", 0)
+
+
+async def _run_checks(app, checks, tokens, counter):
+    from app.core.database import async_engine
+    results = {}
+    try:
+        for label, method, path, user, body in checks:
+            counter.clear()
+            status = await _call(app, method, path, {"Authorization": f"Bearer {tokens[user]}"}, body)
+            results[label] = {"status": status, "count": sum(counter.values()), "shapes": dict(counter)}
+    finally:
+        await async_engine.dispose()
+    return results
+
+
+def measure(students: int, days: int) -> dict:
+    """Seed a scratch database with `students` students and count each endpoint's statements."""
+    directory = tempfile.mkdtemp(prefix="autoattend_budget_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'budget.db')}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ.pop("DATABASE_REPLICA_URL", None)
+
+    from collections import Counter
+    from sqlalchemy import event
+    from app.main import app
+    from app.core.database import Base, engine, async_engine, SessionLocal
+    from app.core.query_stats import statement_shape
+    from app.core.security import create_access_token
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        ids = seed(db, students, days)
+    finally:
+        db.close()
+    tokens = {
+        "teacher": create_access_token({"sub": ids["teacher"], "role": "teacher"}),
+        "student": create_access_token({"sub": ids["student"], "role": "student"})
+    }
+
+    counter = Counter()
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        counter[statement_shape(statement)] += 1
+
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", count_statement)
+    return asyncio.run(_run_checks(app, _checks(ids), tokens, counter))
+
+
+def _measure_in_subprocess(students: int, days: int) -> dict:
+    process = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--measure", str(students), "--days", str(days)],
+        capture_output=True, text=True
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Measuring {students} students failed:\n{process.stderr[-2000:]}")
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def check_query_budgets(small: int, large: int, days: int) -> int:
+    """Compare statement counts at both sizes. Returns the number of failing endpoints."""
+    print(f"Measuring with {small} and {large} students per class ({days} days of attendance)...")
+    small_results = _measure_in_subprocess(small, days)
+    large_results = _measure_in_subprocess(large, days)
+
+    failures = 0
+    print(f"{'endpoint':<32}{'status':>8}{small:>8}{large:>8}")
+    for label, before in small_results.items():
+        after = large_results[label]
+        ok = before["status"] < 400 and after["status"] < 400 and after["count"] <= before["count"]
+        print(f"{label:<32}{after['status']:>8}{before['count']:>8}{after['count']:>8}  {'ok' if ok else 'FAIL'}")
+        if ok:
+            continue
+        failures += 1
+        for shape, count in after["shapes"].items():
+            if count > before["shapes"].get(shape, 0):
+                print(f"      {before['shapes'].get(shape, 0)} -> {count}x {shape[:200]}")
+    print(f"Checked {len(small_results)} endpoints: {failures} over budget.")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that endpoint query counts do not grow with the data")
+    parser.add_argument("--small", type=int, default=10, help="Students per class in the small run")
+    parser.add_argument("--large", type=int, default=500, help="Students per class in the large run")
+    parser.add_argument("--days", type=int, default=30, help="Days of attendance per student")
+    parser.add_argument("--measure", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure is not None:
+        # Child process: print the measurements as JSON on the last line
+        print(json.dumps(measure(args.measure, args.days)))
+        sys.exit(0)
+
+    print("=" * 60)
+    print("AutoAttend - Query Budget Check")
+    print("=" * 60)
+    try:
+        failures = check_query_budgets(args.small, args.large, args.days)
+    except Exception as e:
+        print(f"Error checking query budgets: {e}")
+        sys.exit(1)
+    sys.exit(1 if failures else 0)
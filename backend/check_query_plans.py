@@ -0,0 +1,170 @@
+"""
+Script to check that the hot read paths use indexes.
+Runs the main read endpoints against the configured database as a real teacher
+and student, captures every SELECT they issue and EXPLAINs it. Fails if any of
+them scans a whole hot table (attendance, rollups, photos, enrollments).
+
+Run it after adding or changing queries or indexes. It needs some data:
+at least one class with enrolled students and attendance.
+
+Usage:
+    python check_query_plans.py
+"""
+import sys
+import os
+import re
+import asyncio
+import inspect
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event
+from starlette.requests import Request
+from starlette.responses import Response
+from app.core.config import settings
+from app.core.database import engine, async_engine, SessionLocal, AsyncSessionLocal
+from app.models.user import User
+from app.models.class_model import Class, Enrollment
+from app.models.attendance import Attendance
+from app.api import attendance as attendance_api
+from app.api import classes as classes_api
+from app.services.analytics import analytics_service
+
+HOT_TABLES = {"attendance", "attendance_rollups", "student_photos", "enrollments"}
+SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+
+
+def _request():
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""})
+
+
+def _base_table(name: str) -> str:
+    """Strip SQLAlchemy alias suffixes (attendance_1 -> attendance)."""
+    return re.sub(r"_\d+$", "", name or "")
+
+
+@contextmanager
+def capture_selects(label, captured):
+    """Record the SELECT statements executed (on the sync or async engine) under label."""
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((label, statement, parameters))
+
+    engines = [engine, async_engine.sync_engine]
+    for target in engines:
+        event.listen(target, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+
+async def run_checks(checks, db, captured):
+    """Run each check with an async session (async endpoints) or the sync one."""
+    try:
+        async with AsyncSessionLocal() as async_db:
+            for label, call in checks:
+                db.expire_all()
+                with capture_selects(label, captured):
+                    result = call(async_db)
+                    if inspect.isawaitable(result):
+                        await result
+    finally:
+        await async_engine.dispose()
+
+
+def full_scans(connection, statement, parameters):
+    """Hot tables the statement reads without an index."""
+    if engine.dialect.name == "mysql":
+        rows = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters).mappings().all()
+        return [
+            row["table"] for row in rows
+            if row["type"] == "ALL" and _base_table(row["table"]) in HOT_TABLES
+        ]
+    if engine.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        scans = []
+        for row in rows:
+            detail = row[-1]
+            match = SQLITE_SCAN.match(detail)
+            if match and "USING" not in detail and _base_table(match.group(1)) in HOT_TABLES:
+                scans.append(match.group(1))
+        return scans
+    raise RuntimeError(f"Unsupported database dialect: {engine.dialect.name}")
+
+
+def check_query_plans():
+    """EXPLAIN the hot read paths. Returns the number of failing queries."""
+    db = SessionLocal()
+    try:
+        row = db.query(Attendance.class_id, Attendance.student_id).join(
+            Enrollment,
+            (Enrollment.class_id == Attendance.class_id) & (Enrollment.student_id == Attendance.student_id)
+        ).order_by(Attendance.attendance_date.desc()).first()
+        if row is None:
+            print("No attendance for enrolled students found; add some data first.")
+            return 1
+
+        class_obj = db.query(Class).filter(Class.class_id == row.class_id).first()
+        teacher = db.query(User).filter(User.user_id == class_obj.teacher_id).first()
+        student = db.query(User).filter(User.user_id == row.student_id).first()
+        end_date = date.today()
+        start_date = end_date - timedelta(days=settings.ATTENDANCE_DEFAULT_WINDOW_DAYS)
+        month = end_date.strftime("%Y-%m")
+
+        # Each check takes the async session; async endpoints use it, sync ones use db
+        checks = [
+            ("teacher attendance list", lambda async_db: attendance_api.get_attendance(
+                _request(), Response(), class_id=class_obj.class_id, start_date=None, end_date=None,
+                cursor=None, limit=settings.ATTENDANCE_PAGE_SIZE, current_user=teacher, db=async_db
+            )),
+            ("student attendance list", lambda async_db: attendance_api.get_attendance(
+                _request(), Response(), class_id=None, start_date=None, end_date=None,
+                cursor=None, limit=settings.ATTENDANCE_PAGE_SIZE, current_user=student, db=async_db
+            )),
+            ("student stats", lambda async_db: attendance_api.get_my_attendance_stats(
+                _request(), Response(), class_id=None, current_user=student, db=async_db
+            )),
+            ("student calendar", lambda async_db: attendance_api.get_attendance_calendar(
+                class_id=None, start_month=month, end_month=month, current_user=student, db=async_db
+            )),
+            ("class roster", lambda async_db: classes_api.get_class_students(
+                _request(), Response(), class_id=class_obj.class_id, sort="attendance", order="asc",
+                skip=0, limit=None, current_user=teacher, db=db
+            )),
+            ("class analytics", lambda async_db: analytics_service.load_matrix(
+                db, [class_obj.class_id], start_date, end_date
+            )),
+        ]
+
+        captured = []
+        asyncio.run(run_checks(checks, db, captured))
+
+        failures = 0
+        with engine.connect() as connection:
+            for label, statement, parameters in captured:
+                scans = full_scans(connection, statement, parameters)
+                if scans:
+                    failures += 1
+                    print(f"FAIL  {label}: full scan of {', '.join(scans)}")
+                    print("      " + " ".join(statement.split()))
+        print(f"Checked {len(captured)} queries from {len(checks)} read paths: {failures} full scans.")
+        return failures
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("AutoAttend - Query Plan Check")
+    print("=" * 60)
+    try:
+        failures = check_query_plans()
+    except Exception as e:
+        print(f"Error checking query plans: {e}")
+        sys.exit(1)
+    sys.exit(1 if failures else 0)
@@ -1,4 +1,6 @@
 -- AutoAttend Database Schema
+-- Matches the models as of the latest migration. After loading it, run
+-- `python migrate.py` once to record the migrations (they detect the existing schema).
 -- Create database
 CREATE DATABASE IF NOT EXISTS autoattend CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
 USE autoattend;
@@ -13,6 +15,7 @@ CREATE TABLE IF NOT EXISTS users (
     role ENUM('student', 'teacher') NOT NULL DEFAULT 'student',
     student_id VARCHAR(20) UNIQUE NULL,  -- For students only
     branch VARCHAR(100) NULL,  -- Branch/Department for students and teachers
+    year_of_joining INT NULL,
     is_active BOOLEAN DEFAULT TRUE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
@@ -30,7 +33,8 @@ CREATE TABLE IF NOT EXISTS student_photos (
     is_primary BOOLEAN DEFAULT FALSE,
     uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
-    INDEX idx_user_id (user_id)
+    INDEX idx_user_id (user_id),
+    INDEX idx_photo_user_primary (user_id, is_primary)
 );
 
 -- Classes table
@@ -61,6 +65,7 @@ CREATE TABLE IF NOT EXISTS enrollments (
 );
 
 -- Attendance records table
+-- On large deployments run partition_attendance_table.py to range-partition it by month
 CREATE TABLE IF NOT EXISTS attendance (
     attendance_id INT AUTO_INCREMENT PRIMARY KEY,
     student_id INT NOT NULL,
@@ -76,7 +81,44 @@ CREATE TABLE IF NOT EXISTS attendance (
     UNIQUE KEY unique_attendance (student_id, class_id, attendance_date),
     INDEX idx_student_id (student_id),
     INDEX idx_class_id (class_id),
-    INDEX idx_attendance_date (attendance_date)
+    INDEX idx_attendance_date (attendance_date),
+    INDEX idx_attendance_class_date (class_id, attendance_date, student_id, status),
+    INDEX idx_attendance_student_date (student_id, attendance_date, class_id, status)
+);
+
+-- Monthly attendance rollups (per student, class and month)
+CREATE TABLE IF NOT EXISTS attendance_rollups (
+    rollup_id INT AUTO_INCREMENT PRIMARY KEY,
+    student_id INT NOT NULL,
+    class_id INT NOT NULL,
+    month DATE NOT NULL,  -- First day of the month
+    present_count INT NOT NULL DEFAULT 0,
+    absent_count INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (student_id) REFERENCES users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (class_id) REFERENCES classes(class_id) ON DELETE CASCADE,
+    UNIQUE KEY unique_rollup (student_id, class_id, month),
+    INDEX idx_class_id (class_id)
+);
+
+-- Data versions table (bumped on every write to a scope, used as cache keys)
+CREATE TABLE IF NOT EXISTS data_versions (
+    scope VARCHAR(20) NOT NULL,
+    scope_id INT NOT NULL,
+    version BIGINT NOT NULL DEFAULT 1,
+    PRIMARY KEY (scope, scope_id)
+);
+
+-- Refresh tokens (one row per issued token; rotated tokens are marked revoked)
+CREATE TABLE IF NOT EXISTS refresh_tokens (
+    jti VARCHAR(32) PRIMARY KEY,
+    family_id VARCHAR(32) NOT NULL,
+    user_id INT NOT NULL,
+    expires_at DATETIME NOT NULL,
+    revoked BOOLEAN NOT NULL DEFAULT FALSE,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+    INDEX idx_refresh_family (family_id),
+    INDEX idx_refresh_user (user_id),
+    INDEX idx_refresh_expires (expires_at)
 );
 
 -- Insert sample teacher (password: admin123)
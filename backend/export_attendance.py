@@ -0,0 +1,101 @@
+"""
+Script to export attendance records to CSV, gzip-compressed CSV or Parquet.
+Rows are streamed from the database in chunks, so memory use stays flat
+regardless of the exported date range.
+
+Usage:
+    python export_attendance.py <output_file> [--format csv|csv.gz|parquet]
+        [--class-id ID] [--student-id ID] [--branch BRANCH]
+        [--year-of-joining YEAR] [--start-date YYYY-MM-DD] [--end-date YYYY-MM-DD]
+        [--from-archive]
+
+Use "-" as the output file to write to stdout. With --from-archive, rows are read
+from the cold-storage archive files instead of the database (--start-date and
+--end-date required; --branch and --year-of-joining are not supported).
+"""
+import sys
+import os
+import argparse
+from datetime import date
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal
+from app.services.archive import archive_service
+from app.services.export import export_service, EXPORT_FORMATS
+
+
+def _guess_format(output: str) -> str:
+    """Guess the export format from the output file name."""
+    if output.endswith(".parquet"):
+        return "parquet"
+    if output.endswith(".gz"):
+        return "csv.gz"
+    return "csv"
+
+
+def export_attendance(args) -> int:
+    """Export attendance matching the given filters. Returns the number of bytes written."""
+    export_format = args.format or _guess_format(args.output)
+    db = SessionLocal()
+    try:
+        if args.from_archive:
+            rows = archive_service.iter_rows(
+                args.start_date,
+                args.end_date,
+                class_ids=[args.class_id] if args.class_id is not None else None,
+                student_id=args.student_id
+            )
+            chunks = archive_service.stream(rows, export_format)
+        else:
+            query = export_service.build_query(
+                db,
+                class_id=args.class_id,
+                student_id=args.student_id,
+                branch=args.branch,
+                year_of_joining=args.year_of_joining,
+                start_date=args.start_date,
+                end_date=args.end_date
+            )
+            chunks = export_service.stream(query, export_format, chunk_size=args.chunk_size)
+
+        out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+        written = 0
+        try:
+            for chunk in chunks:
+                out.write(chunk)
+                written += len(chunk)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+        return written
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export attendance records")
+    parser.add_argument("output", help='Output file path ("-" for stdout)')
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), help="Output format (default: from file extension)")
+    parser.add_argument("--class-id", type=int)
+    parser.add_argument("--student-id", type=int, help="Student user ID")
+    parser.add_argument("--branch")
+    parser.add_argument("--year-of-joining", type=int)
+    parser.add_argument("--start-date", type=date.fromisoformat)
+    parser.add_argument("--end-date", type=date.fromisoformat)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--from-archive", action="store_true", help="Read from archive files instead of the database")
+    args = parser.parse_args()
+
+    if args.from_archive and (args.start_date is None or args.end_date is None):
+        parser.error("--from-archive requires --start-date and --end-date")
+
+    try:
+        written = export_attendance(args)
+    except Exception as e:
+        print(f"Error exporting attendance: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.output != "-":
+        print(f"Exported attendance to {args.output} ({written} bytes)")
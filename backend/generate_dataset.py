@@ -0,0 +1,223 @@
+"""
+Script to fill a local database with a realistic institution for load testing.
+Creates teachers, students (with primary photos and random face encodings),
+classes grouped by branch, enrollments and months of attendance, using bulk
+inserts. Each class meets on fixed weekdays; each student has their own
+attendance rate (most between 70% and 95%, with a tail of poor attenders).
+
+All generated usernames start with "lt_" and share one password, so the load
+test can log in as any of them. Rollups are rebuilt at the end.
+
+Usage:
+    python generate_dataset.py [--students 20000] [--classes 800] [--teachers 200]
+        [--classes-per-student 6] [--months 6] [--seed 42] [--password loadtest123]
+"""
+import sys
+import os
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from sqlalchemy import insert, select
+from app.core.database import SessionLocal
+from app.core.security import get_password_hash
+from app.models.user import User, StudentPhoto
+from app.models.class_model import Class, Enrollment
+from app.models.attendance import Attendance
+from app.services.rollup import rollup_service
+from app.services.versions import version_service
+
+PREFIX = "lt_"
+BRANCHES = ['CSE', 'ISE', 'ECE', 'AIML', 'AICY', 'MEC', 'CIV']
+# Share of students per branch (roughly how large departments are)
+BRANCH_WEIGHTS = [0.25, 0.15, 0.18, 0.14, 0.08, 0.12, 0.08]
+SUBJECTS = ["Mathematics", "Physics", "Chemistry", "Programming", "Data Structures", "Networks",
+            "Databases", "Electronics", "Mechanics", "Machine Learning", "Security", "Design"]
+ENCODING_SIZE = 128
+
+
+def _insert_batches(db, table, rows, batch_size: int) -> int:
+    """Bulk insert rows (dicts) in batches. Returns the number inserted."""
+    for start in range(0, len(rows), batch_size):
+        db.execute(insert(table), rows[start:start + batch_size])
+    return len(rows)
+
+
+def _ids_by_username(db, prefix: str) -> dict:
+    return dict(db.execute(
+        select(User.username, User.user_id).where(User.username.like(prefix + "%"))
+    ).all())
+
+
+def generate_dataset(args):
+    rng = random.Random(args.seed)
+    np_rng = np.random.default_rng(args.seed)
+    db = SessionLocal()
+    try:
+        existing = db.execute(select(User.user_id).where(User.username.like(PREFIX + "%")).limit(1)).first()
+        if existing:
+            print(f"Error: generated users ({PREFIX}*) already exist. Recreate the database first.")
+            return False
+
+        hashed_password = get_password_hash(args.password)
+        current_year = date.today().year
+
+        # Teachers
+        print(f"Creating {args.teachers} teachers...")
+        _insert_batches(db, User.__table__, [
+            {
+                "username": f"{PREFIX}teacher{i}",
+                "email": f"{PREFIX}teacher{i}@example.edu",
+                "full_name": f"Teacher {i}",
+                "hashed_password": hashed_password,
+                "role": "teacher",
+                "branch": BRANCHES[i % len(BRANCHES)],
+                "is_active": True
+            }
+            for i in range(args.teachers)
+        ], args.batch_size)
+
+        # Students
+        print(f"Creating {args.students} students...")
+        student_branches = rng.choices(BRANCHES, weights=BRANCH_WEIGHTS, k=args.students)
+        _insert_batches(db, User.__table__, [
+            {
+                "username": f"{PREFIX}student{i}",
+                "email": f"{PREFIX}student{i}@example.edu",
+                "full_name": f"Student {i}",
+                "hashed_password": hashed_password,
+                "role": "student",
+                "student_id": f"LT{i:06d}",
+                "branch": student_branches[i],
+                "year_of_joining": current_year - rng.randint(0, 3),
+                "is_active": True
+            }
+            for i in range(args.students)
+        ], args.batch_size)
+        db.commit()
+
+        user_ids = _ids_by_username(db, PREFIX)
+        teacher_ids = [user_ids[f"{PREFIX}teacher{i}"] for i in range(args.teachers)]
+        student_ids = [user_ids[f"{PREFIX}student{i}"] for i in range(args.students)]
+
+        # Primary photos with random encodings, so recognition loads a full gallery
+        print("Creating student photos...")
+        _insert_batches(db, StudentPhoto.__table__, [
+            {
+                "user_id": student_id,
+                "photo_path": f"uploads/photos/{PREFIX}student_{student_id}.jpg",
+                "face_encoding": np_rng.normal(0, 0.1, ENCODING_SIZE).astype(np.float64).tobytes(),
+                "is_primary": True
+            }
+            for student_id in student_ids
+        ], args.batch_size)
+
+        # Classes: each belongs to a branch and meets on 2-4 fixed weekdays
+        print(f"Creating {args.classes} classes...")
+        class_branches = [BRANCHES[i % len(BRANCHES)] for i in range(args.classes)]
+        _insert_batches(db, Class.__table__, [
+            {
+                "class_name": f"{SUBJECTS[i % len(SUBJECTS)]} {class_branches[i]}-{i}",
+                "class_code": f"LT{i:05d}",
+                "description": "Generated for load testing",
+                "teacher_id": teacher_ids[i % len(teacher_ids)]
+            }
+            for i in range(args.classes)
+        ], args.batch_size)
+        db.commit()
+
+        class_ids = db.execute(
+            select(Class.class_id).where(Class.class_code.like("LT%")).order_by(Class.class_id)
+        ).scalars().all()
+        class_weekdays = [sorted(rng.sample(range(5), rng.randint(2, 4))) for _ in class_ids]
+        classes_by_branch = {}
+        for index, branch in enumerate(class_branches):
+            classes_by_branch.setdefault(branch, []).append(index)
+
+        # Enrollments: students take classes from their own branch
+        print("Creating enrollments...")
+        roster = {index: [] for index in range(len(class_ids))}
+        enrollment_rows = []
+        for student_index, student_id in enumerate(student_ids):
+            options = classes_by_branch[student_branches[student_index]]
+            for index in rng.sample(options, min(args.classes_per_student, len(options))):
+                roster[index].append(student_index)
+                enrollment_rows.append({"student_id": student_id, "class_id": class_ids[index]})
+        _insert_batches(db, Enrollment.__table__, enrollment_rows, args.batch_size)
+        db.commit()
+        print(f"  {len(enrollment_rows)} enrollments")
+
+        # Attendance: per-student rate from a Beta distribution, plus a few chronic absentees
+        print(f"Creating {args.months} months of attendance...")
+        rates = np_rng.beta(8, 2, args.students)
+        chronic = np_rng.random(args.students) < 0.05
+        rates[chronic] = np_rng.uniform(0.3, 0.6, chronic.sum())
+
+        end_date = date.today()
+        start_date = end_date - timedelta(days=int(args.months * 30.44))
+        days = [start_date + timedelta(days=n) for n in range((end_date - start_date).days + 1)]
+        total = 0
+        for index, class_id in enumerate(class_ids):
+            members = np.array(roster[index], dtype=np.int64)
+            if len(members) == 0:
+                continue
+            session_days = [day for day in days if day.weekday() in class_weekdays[index]]
+            present = np_rng.random((len(members), len(session_days))) < rates[members][:, None]
+            rows = [
+                {
+                    "student_id": student_ids[student_index],
+                    "class_id": class_id,
+                    "attendance_date": day,
+                    "status": "present" if present[row, column] else "absent",
+                    "marked_by": "teacher" if rng.random() < 0.05 else "system"
+                }
+                for row, student_index in enumerate(members)
+                for column, day in enumerate(session_days)
+            ]
+            total += _insert_batches(db, Attendance.__table__, rows, args.batch_size)
+            db.commit()
+            if (index + 1) % 50 == 0:
+                print(f"  {index + 1}/{len(class_ids)} classes, {total} records")
+        print(f"  {total} attendance records")
+
+        # Bulk inserts bypass the ORM listeners: rebuild rollups and invalidate caches
+        print("Rebuilding rollups...")
+        rollup_service.rebuild(db)
+        version_service.bump_global(db)
+        db.commit()
+        return True
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a realistic dataset for load testing")
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--classes", type=int, default=800)
+    parser.add_argument("--teachers", type=int, default=200)
+    parser.add_argument("--classes-per-student", type=int, default=6)
+    parser.add_argument("--months", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--password", default="loadtest123", help="Password for every generated user")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per bulk insert")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("AutoAttend - Load Test Dataset Generator")
+    print("=" * 60)
+    started = time.perf_counter()
+    try:
+        if not generate_dataset(args):
+            sys.exit(1)
+    except Exception as e:
+        print(f"Error generating dataset: {e}")
+        sys.exit(1)
+    print(f"Done in {time.perf_counter() - started:.1f}s. Log in as {PREFIX}teacher0 or {PREFIX}student0.")
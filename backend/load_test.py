@@ -0,0 +1,296 @@
+"""
+Script to run load scenarios against an in-process server and report latency
+percentiles per endpoint. The app is started with uvicorn on a free local port
+inside this process and driven by concurrent HTTP clients, so client and server
+share the machine: compare runs with each other rather than with production.
+Fill the database with generate_dataset.py first.
+
+Scenarios:
+    login      Login storm: all virtual users log in at once
+    dashboard  Dashboard polling: students and teachers reload their dashboards,
+               revalidating with If-None-Match like a browser
+    scan       Mass scans: teachers upload fake class photos for recognition
+
+Usage:
+    python load_test.py [--scenario login|dashboard|scan|all] [--users 200]
+        [--teachers 20] [--concurrency 50] [--duration 30] [--password loadtest123]
+"""
+import sys
+import os
+import argparse
+import http.client
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import uvicorn
+
+PREFIX = "lt_"
+SCENARIOS = ["login", "dashboard", "scan"]
+
+
+class LatencyStats:
+    """Thread-safe latency samples per endpoint."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def record(self, route: str, seconds: float, status: int):
+        with self.lock:
+            self.samples[route].append(seconds)
+            if status >= 400:
+                self.errors[route] += 1
+
+    def report(self, title: str, elapsed: float):
+        print()
+        print(f"{title} ({elapsed:.1f}s)")
+        print(f"{'endpoint':<60}{'count':>7}{'errors':>8}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+        for route in sorted(self.samples):
+            values = np.array(self.samples[route]) * 1000
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            print(
+                f"{route:<60}{len(values):>7}{self.errors[route]:>8}{len(values) / elapsed:>8.1f}"
+                f"{p50:>8.1f}ms{p95:>7.1f}ms{p99:>7.1f}ms{values.max():>7.1f}ms"
+            )
+
+
+class VirtualUser:
+    """One simulated user with a keep-alive connection, token and remembered ETags."""
+
+    def __init__(self, port: int, username: str):
+        self.port = port
+        self.username = username
+        self.token = None
+        self.etags = {}
+        self.class_ids = []
+        self.connection = None
+
+    def request(self, stats: LatencyStats, method: str, path: str, route: str, body=None, headers=None):
+        headers = dict(headers or {})
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+
+        start = time.perf_counter()
+        status, response, data = 599, None, b""
+        for attempt in range(2):
+            # The server closes idle keep-alive connections; retry once on a fresh one, as browsers do
+            reused = self.connection is not None
+            if not reused:
+                self.connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=120)
+            try:
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                data = response.read()
+                status = response.status
+                break
+            except (OSError, http.client.HTTPException):
+                self.connection.close()
+                self.connection = None
+                if not reused:
+                    break
+        stats.record(f"{method} {route}", time.perf_counter() - start, status)
+        return status, response, data
+
+    def login(self, stats: LatencyStats, password: str) -> bool:
+        status, _, data = self.request(
+            stats, "POST", "/auth/login", "/auth/login",
+            body={"username": self.username, "password": password}
+        )
+        if status == 200:
+            self.token = json.loads(data)["access_token"]
+        return status == 200
+
+    def poll(self, stats: LatencyStats, path: str, route: str):
+        """GET with If-None-Match, remembering the ETag like a browser cache."""
+        headers = {"If-None-Match": self.etags[path]} if path in self.etags else None
+        status, response, data = self.request(stats, "GET", path, route, headers=headers)
+        if response is not None and response.getheader("ETag"):
+            self.etags[path] = response.getheader("ETag")
+        return status, data
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int):
+    """Run the app with uvicorn in a background thread and wait until it accepts requests."""
+    from app.main import app
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("Server failed to start")
+        time.sleep(0.05)
+    return server, thread
+
+
+def run_until(deadline: float, concurrency: int, users, step):
+    """Run step(user) in a loop on `concurrency` workers, spreading users across them, until deadline."""
+    def worker(index: int):
+        mine = users[index::concurrency]
+        while mine and time.monotonic() < deadline:
+            for user in mine:
+                if time.monotonic() >= deadline:
+                    break
+                step(user)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+
+
+def scenario_login(port, args, students, teachers):
+    stats = LatencyStats()
+    users = [VirtualUser(port, user.username) for user in students + teachers]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(lambda user: user.login(stats, args.password), users))
+    stats.report(f"Login storm: {len(users)} users, concurrency {args.concurrency}", time.perf_counter() - started)
+
+
+def _student_dashboard(stats, user):
+    user.poll(stats, "/auth/me", "/auth/me")
+    user.poll(stats, "/attendance/my-stats", "/attendance/my-stats")
+    user.poll(stats, "/classes/my-enrolled-classes", "/classes/my-enrolled-classes")
+    user.poll(stats, "/attendance/calendar", "/attendance/calendar")
+    user.poll(stats, "/attendance/?limit=50", "/attendance/")
+
+
+def _teacher_dashboard(stats, user):
+    status, data = user.poll(stats, "/classes/my-classes", "/classes/my-classes")
+    if status == 200:
+        user.class_ids = [item["class_id"] for item in json.loads(data)]
+    if not user.class_ids:
+        return
+    class_id = random.choice(user.class_ids)
+    user.poll(stats, f"/classes/{class_id}/students", "/classes/{class_id}/students")
+    user.poll(stats, f"/attendance/?class_id={class_id}&limit=100", "/attendance/?class_id")
+    user.poll(
+        stats, f"/attendance/analytics/class/{class_id}/below-threshold",
+        "/attendance/analytics/class/{class_id}/below-threshold"
+    )
+
+
+def scenario_dashboard(port, args, students, teachers):
+    stats = LatencyStats()
+    started = time.perf_counter()
+    run_until(
+        time.monotonic() + args.duration, args.concurrency, students + teachers,
+        lambda user: (_teacher_dashboard if user.username.startswith(PREFIX + "teacher") else _student_dashboard)(stats, user)
+    )
+    stats.report(
+        f"Dashboard polling: {len(students)} students, {len(teachers)} teachers, concurrency {args.concurrency}",
+        time.perf_counter() - started
+    )
+
+
+def _fake_frames(count: int = 4):
+    """JPEG-encoded noise frames the size of a classroom photo."""
+    import cv2
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(count):
+        image = rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+        ok, encoded = cv2.imencode(".jpg", image)
+        frames.append(encoded.tobytes())
+    return frames
+
+
+def _multipart(filename: str, content: bytes):
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"photo\"; filename=\"{filename}\"\r\n"
+        f"Content-Type: image/jpeg\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+def scenario_scan(port, args, students, teachers):
+    stats = LatencyStats()
+    frames = _fake_frames()
+    for user in teachers:
+        status, data = user.poll(LatencyStats(), "/classes/my-classes", "/classes/my-classes")
+        if status == 200:
+            user.class_ids = [item["class_id"] for item in json.loads(data)]
+
+    def scan(user):
+        if not user.class_ids:
+            return
+        body, headers = _multipart("frame.jpg", random.choice(frames))
+        user.request(
+            stats, "POST", f"/facial-recognition/upload-class-photo/{random.choice(user.class_ids)}",
+            "/facial-recognition/upload-class-photo/{class_id}", body=body, headers=headers
+        )
+
+    started = time.perf_counter()
+    run_until(time.monotonic() + args.duration, min(args.concurrency, len(teachers)), teachers, scan)
+    stats.report(f"Mass scans: {len(teachers)} teachers", time.perf_counter() - started)
+
+
+def main(args) -> bool:
+    port = _free_port()
+    print(f"Starting in-process server on port {port}...")
+    server, thread = start_server(port)
+    try:
+        students = [VirtualUser(port, f"{PREFIX}student{i}") for i in range(args.users)]
+        teachers = [VirtualUser(port, f"{PREFIX}teacher{i}") for i in range(args.teachers)]
+        scenarios = SCENARIOS if args.scenario == "all" else [args.scenario]
+
+        if "login" in scenarios:
+            scenario_login(port, args, students, teachers)
+
+        # Later scenarios need tokens; log in outside the measurements
+        setup = LatencyStats()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            logged_in = sum(pool.map(lambda user: user.login(setup, args.password), students + teachers))
+        if logged_in < len(students) + len(teachers):
+            print(f"Error: only {logged_in} of {len(students) + len(teachers)} users could log in. "
+                  f"Run generate_dataset.py with at least {args.users} students and {args.teachers} teachers.")
+            return False
+
+        if "dashboard" in scenarios:
+            scenario_dashboard(port, args, students, teachers)
+        if "scan" in scenarios:
+            scenario_scan(port, args, students, teachers)
+        return True
+    finally:
+        server.should_exit = True
+        thread.join(timeout=30)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run load scenarios against an in-process server")
+    parser.add_argument("--scenario", choices=SCENARIOS + ["all"], default="all")
+    parser.add_argument("--users", type=int, default=200, help="Virtual students")
+    parser.add_argument("--teachers", type=int, default=20, help="Virtual teachers")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per timed scenario")
+    parser.add_argument("--password", default="loadtest123", help="Password used by generate_dataset.py")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("AutoAttend - Load Test")
+    print("=" * 60)
+    try:
+        if not main(args):
+            sys.exit(1)
+    except Exception as e:
+        print(f"Error running load test: {e}")
+        sys.exit(1)
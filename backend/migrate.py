@@ -0,0 +1,51 @@
+"""
+Script to apply schema migrations (app/migrations) to the configured database.
+Run this on every deploy; migrations already applied are skipped.
+
+Usage:
+    python migrate.py            Apply pending migrations
+    python migrate.py --status   List migrations and whether they are applied
+    python migrate.py --stamp    Mark all migrations applied without running them
+                                 (for a schema just created from the current models)
+"""
+import sys
+import os
+import argparse
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import engine
+from app import migrations
+
+
+def show_status():
+    """Print each migration with its applied state."""
+    with engine.begin() as connection:
+        applied = migrations.applied_versions(connection)
+    for migration in migrations.discover():
+        state = "applied" if migration.version in applied else "pending"
+        print(f"[{state:>7}] {migration.version}: {migration.description}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply schema migrations")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--status", action="store_true", help="Show migration status")
+    group.add_argument("--stamp", action="store_true", help="Mark all migrations as applied")
+    args = parser.parse_args()
+
+    try:
+        if args.status:
+            show_status()
+        elif args.stamp:
+            stamped = migrations.stamp(engine)
+            print(f"Marked {len(stamped)} migrations as applied.")
+        else:
+            applied = migrations.upgrade(engine)
+            for version in applied:
+                print(f"Applied {version}")
+            print(f"Database is up to date ({len(applied)} migrations applied).")
+    except Exception as e:
+        print(f"Error running migrations: {e}")
+        sys.exit(1)
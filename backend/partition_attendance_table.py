@@ -0,0 +1,46 @@
+"""
+Script to range-partition the attendance table by month (MySQL only).
+Run this script once to migrate your existing database. Afterwards the daily
+partition maintenance job keeps future partitions ready and the cleanup job
+drops expired ones. Re-running on a partitioned table only adds any missing
+future partitions.
+
+Note: MySQL does not allow foreign keys on partitioned tables, so the
+attendance foreign keys are dropped; deletes cascade through the ORM.
+"""
+import sys
+import os
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal
+from app.services.partitions import partition_manager
+
+
+def partition_attendance_table():
+    """Partition attendance by month, or top up future partitions if already partitioned."""
+    db = SessionLocal()
+    try:
+        if not partition_manager.supports_partitioning(db):
+            print("Partitioning requires MySQL; cleanup will use chunked deletes instead.")
+            return
+
+        if partition_manager.is_partitioned(db):
+            created = partition_manager.ensure_future_partitions(db)
+            print(f"attendance is already partitioned. Created {len(created)} future partitions.")
+            return
+
+        count = partition_manager.partition_table(db)
+        print(f"Successfully partitioned attendance into {count} monthly partitions.")
+    except Exception as e:
+        print(f"Error partitioning attendance table: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("Partitioning attendance table by month...")
+    partition_attendance_table()
+    print("Migration complete!")
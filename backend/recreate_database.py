@@ -12,8 +12,11 @@ from sqlalchemy import text, inspect
 from app.core.database import engine, Base
 from app.models.user import User, StudentPhoto
 from app.models.class_model import Class, Enrollment
-from app.models.attendance import Attendance
+from app.models.attendance import Attendance, AttendanceRollup
+from app.models.data_version import DataVersion
+from app.models.refresh_token import RefreshToken
 from app.core.security import get_password_hash
+from app import migrations
 
 def recreate_database():
     """Drop and recreate all tables"""
@@ -28,6 +31,10 @@ def recreate_database():
         with engine.connect() as conn:
             # Drop tables in correct order (respecting foreign keys)
             conn.execute(text("SET FOREIGN_KEY_CHECKS = 0"))
+            conn.execute(text("DROP TABLE IF EXISTS schema_migrations"))
+            conn.execute(text("DROP TABLE IF EXISTS refresh_tokens"))
+            conn.execute(text("DROP TABLE IF EXISTS data_versions"))
+            conn.execute(text("DROP TABLE IF EXISTS attendance_rollups"))
             conn.execute(text("DROP TABLE IF EXISTS attendance"))
             conn.execute(text("DROP TABLE IF EXISTS enrollments"))
             conn.execute(text("DROP TABLE IF EXISTS classes"))
@@ -45,6 +52,8 @@ def recreate_database():
     # Create all tables
     try:
         Base.metadata.create_all(bind=engine)
+        # Tables match the current models, so every migration is already applied
+        migrations.stamp(engine)
         print("[OK] Tables created successfully")
     except Exception as e:
         print(f"[ERROR] Error creating tables: {e}")
@@ -1,5 +1,5 @@
 import React, { createContext, useState, useEffect } from 'react';
-import { login as apiLogin, getMe } from '../services/api';
+import { login as apiLogin, logout as apiLogout, getMe } from '../services/api';
 
 export const AuthContext = createContext();
 
@@ -36,6 +36,7 @@ export const AuthProvider = ({ children }) => {
     } catch (error) {
       console.error('Error fetching user info:', error);
       localStorage.removeItem('token');
+      localStorage.removeItem('refreshToken');
       setUser(null);
       throw error; // Re-throw to let caller handle it
     } finally {
@@ -48,7 +49,7 @@ export const AuthProvider = ({ children }) => {
   const login = async (username, password) => {
     try {
       const response = await apiLogin(username, password);
-      const { access_token } = response.data;
+      const { access_token, refresh_token } = response.data;
       
       if (!access_token) {
         return {
@@ -58,6 +59,9 @@ export const AuthProvider = ({ children }) => {
       }
       
       localStorage.setItem('token', access_token);
+      if (refresh_token) {
+        localStorage.setItem('refreshToken', refresh_token);
+      }
       
       // Get user info after setting token (don't set loading state here)
       try {
@@ -66,8 +70,9 @@ export const AuthProvider = ({ children }) => {
         return { success: true };
       } catch (error) {
         console.error('Error getting user info after login:', error);
-        // Clear token if getUserInfo fails
+        // Clear tokens if getUserInfo fails
         localStorage.removeItem('token');
+        localStorage.removeItem('refreshToken');
         return {
           success: false,
           message: error.response?.data?.detail || 'Failed to fetch user information. Please try again.',
@@ -83,7 +88,15 @@ export const AuthProvider = ({ children }) => {
   };
 
   const logout = () => {
+    const refreshToken = localStorage.getItem('refreshToken');
+    if (refreshToken) {
+      // Revoke the session server-side; local state is cleared either way
+      apiLogout(refreshToken).catch((error) => {
+        console.error('Error revoking session on logout:', error);
+      });
+    }
     localStorage.removeItem('token');
+    localStorage.removeItem('refreshToken');
     setUser(null);
   };
 
@@ -24,6 +24,8 @@ const Attendance = () => {
   const [photoPreview, setPhotoPreview] = useState(null);
   const [attendanceDate, setAttendanceDate] = useState(new Date().toISOString().split('T')[0]);
   const [stats, setStats] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchData();
@@ -45,6 +47,7 @@ const Attendance = () => {
       
       const results = await Promise.all(promises);
       setAttendance(results[0].data);
+      setNextCursor(results[0].headers['x-next-cursor'] || null);
       setClasses(results[1].data);
       
       if (user.role === 'student' && results[2]) {
@@ -57,6 +60,21 @@ const Attendance = () => {
     }
   };
 
+  const handleLoadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const params = selectedClass ? { class_id: selectedClass } : {};
+      const response = await getAttendance({ ...params, cursor: nextCursor });
+      setAttendance((prev) => [...prev, ...response.data]);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      console.error('Error loading more attendance:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleScan = async (classId) => {
     setScanning(true);
     try {
@@ -341,6 +359,17 @@ const Attendance = () => {
                   ))}
                 </tbody>
               </table>
+              {nextCursor && (
+                <div className="text-center mt-4">
+                  <button
+                    onClick={handleLoadMore}
+                    disabled={loadingMore}
+                    className="px-4 py-2 bg-primary-600 text-white rounded-lg hover:bg-primary-700 transition-colors disabled:opacity-50"
+                  >
+                    {loadingMore ? 'Loading...' : 'Load more'}
+                  </button>
+                </div>
+              )}
             </div>
           )}
         </div>
@@ -1,8 +1,40 @@
 import React, { useState, useEffect, useCallback } from 'react';
 import { useAuth } from '../context/AuthContext';
-import { getAttendanceCalendar, getClasses } from '../services/api';
+import { getAttendanceCalendar, getMyEnrolledClasses } from '../services/api';
 import { CalendarIcon, ChevronLeftIcon, ChevronRightIcon, ArrowPathIcon } from '@heroicons/react/24/outline';
 
+const formatDateKey = (year, monthIndex, day) => {
+  return `${year}-${String(monthIndex + 1).padStart(2, '0')}-${String(day).padStart(2, '0')}`;
+};
+
+// Expand per-class day bitmaps into a date -> { status, classes } map
+const decodeCalendarMonths = (months) => {
+  const calendarMap = {};
+  months.forEach(({ month, days, classes }) => {
+    const [year, monthNumber] = month.split('-').map(Number);
+    classes.forEach((cls) => {
+      for (let day = 1; day <= days; day++) {
+        const bit = 2 ** (day - 1);
+        const present = Math.floor(cls.present / bit) % 2 === 1;
+        const absent = Math.floor(cls.absent / bit) % 2 === 1;
+        if (!present && !absent) continue;
+
+        const dateKey = formatDateKey(year, monthNumber - 1, day);
+        const status = present ? 'present' : 'absent';
+        if (!calendarMap[dateKey]) {
+          calendarMap[dateKey] = { status, classes: [] };
+        }
+        calendarMap[dateKey].classes.push({ class_id: cls.class_id, class_name: cls.class_name, status });
+        // If any class is present, mark overall as present
+        if (present) {
+          calendarMap[dateKey].status = 'present';
+        }
+      }
+    });
+  });
+  return calendarMap;
+};
+
 const AttendanceCalendar = () => {
   const { user } = useAuth();
   const [calendarData, setCalendarData] = useState({});
@@ -11,21 +43,23 @@ const AttendanceCalendar = () => {
   const [currentDate, setCurrentDate] = useState(new Date());
   const [loading, setLoading] = useState(true);
 
+  const currentMonth = `${currentDate.getFullYear()}-${String(currentDate.getMonth() + 1).padStart(2, '0')}`;
+
   const fetchData = useCallback(async () => {
     setLoading(true);
     try {
       const [calendarResponse, classesResponse] = await Promise.all([
-        getAttendanceCalendar(selectedClass ? parseInt(selectedClass) : null),
-        getClasses(),
+        getAttendanceCalendar(selectedClass ? parseInt(selectedClass) : null, currentMonth),
+        getMyEnrolledClasses(),
       ]);
-      setCalendarData(calendarResponse.data.calendar || {});
+      setCalendarData(decodeCalendarMonths(calendarResponse.data.months || []));
       setClasses(classesResponse.data);
     } catch (error) {
       console.error('Error fetching calendar data:', error);
     } finally {
       setLoading(false);
     }
-  }, [selectedClass]);
+  }, [selectedClass, currentMonth]);
 
   useEffect(() => {
     if (user.role === 'student') {
@@ -58,7 +92,7 @@ const AttendanceCalendar = () => {
 
   const getDateKey = (date) => {
     if (!date) return null;
-    return date.toISOString().split('T')[0];
+    return formatDateKey(date.getFullYear(), date.getMonth(), date.getDate());
   };
 
   const getAttendanceStatus = (date) => {
@@ -200,6 +200,11 @@ const Students = () => {
   const branchOptions = ['CSE', 'ISE', 'ECE', 'AIML', 'AICY', 'MEC', 'CIV'];
 
   const getStudentPhotoUrl = (student) => {
+    // Prefer the small thumbnail; photos uploaded before thumbnails existed fall back to the original
+    const thumbnail = student.thumbnail_url || student.primary_photo?.thumbnail_url;
+    if (thumbnail) {
+      return `http://localhost:8000${thumbnail}`;
+    }
     if (student.primary_photo?.photo_path) {
       const path = student.primary_photo.photo_path.startsWith('/') 
         ? student.primary_photo.photo_path 
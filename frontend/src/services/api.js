@@ -25,12 +25,55 @@ api.interceptors.request.use(
   }
 );
 
+// Auth endpoints that must never trigger a token refresh
+const NO_REFRESH_URLS = ['/auth/login', '/auth/refresh', '/auth/logout'];
+
+// Refresh in flight, shared so concurrent 401s only rotate the refresh token once
+let refreshPromise = null;
+
+const refreshAccessToken = () => {
+  if (!refreshPromise) {
+    const refreshToken = localStorage.getItem('refreshToken');
+    refreshPromise = axios
+      .post(`${API_BASE_URL}/auth/refresh`, { refresh_token: refreshToken })
+      .then((response) => {
+        localStorage.setItem('token', response.data.access_token);
+        localStorage.setItem('refreshToken', response.data.refresh_token);
+        return response.data.access_token;
+      })
+      .finally(() => {
+        refreshPromise = null;
+      });
+  }
+  return refreshPromise;
+};
+
 // Add response interceptor for error handling
 api.interceptors.response.use(
   (response) => {
     return response;
   },
-  (error) => {
+  async (error) => {
+    const originalRequest = error.config;
+    
+    // Access token expired - renew it with the refresh token and retry once
+    if (
+      error.response?.status === 401 &&
+      originalRequest &&
+      !originalRequest._retry &&
+      !NO_REFRESH_URLS.includes(originalRequest.url) &&
+      localStorage.getItem('refreshToken')
+    ) {
+      originalRequest._retry = true;
+      try {
+        const token = await refreshAccessToken();
+        originalRequest.headers.Authorization = `Bearer ${token}`;
+        return api(originalRequest);
+      } catch (refreshError) {
+        localStorage.removeItem('refreshToken');
+      }
+    }
+    
     console.error('API Error:', {
       url: error.config?.url,
       method: error.config?.method,
@@ -54,6 +97,10 @@ export const login = (username, password) => {
   return api.post('/auth/login', { username, password });
 };
 
+export const logout = (refreshToken) => {
+  return api.post('/auth/logout', { refresh_token: refreshToken });
+};
+
 export const register = (userData) => {
   return api.post('/auth/register', userData);
 };
@@ -79,14 +126,20 @@ export const getMyStats = (classId) => {
   return api.get('/attendance/my-stats', { params: { class_id: classId } });
 };
 
-export const getAttendanceCalendar = (classId) => {
-  return api.get('/attendance/calendar', { params: { class_id: classId } });
+export const getAttendanceCalendar = (classId, startMonth, endMonth = startMonth) => {
+  return api.get('/attendance/calendar', {
+    params: { class_id: classId, start_month: startMonth, end_month: endMonth },
+  });
 };
 
 export const updateAttendance = (attendanceId, data) => {
   return api.put(`/attendance/${attendanceId}`, data);
 };
 
+export const bulkUpdateAttendance = (items, classId = null) => {
+  return api.put('/attendance/bulk', { class_id: classId, items });
+};
+
 // Student endpoints
 export const getStudents = () => {
   return api.get('/students/');